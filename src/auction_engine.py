@@ -0,0 +1,216 @@
+from itertools import accumulate
+from src.order_components import OrderSide, OrderStatus, OrderType, Order
+from src.order_queue import OrderQueue
+from src.risk import SelfTradePrevention
+from src.logger import Logger
+
+
+class AuctionEngine:
+    """
+    Uncrosses every pending Order in one pass at a single clearing price.
+    The clearing price maximises executable volume, then minimises imbalance;
+    remaining ties go to the lowest price.
+    Every Order takes part at its own price, so a MARKET Order should carry an
+    aggressive one; only LIMIT and POST_ONLY remainders rest afterwards.
+    POST_ONLY Orders that cross the auction or the book, FOK Orders that cannot
+    fill in full and Orders cancelled by self_trade_prevention are expired
+    before the uncross, which then runs again without them. Of two Orders of
+    one user, the incoming one is the one that arrived last.
+    """
+
+    def __init__(
+        self,
+        logger: Logger | None = None,
+        self_trade_prevention: SelfTradePrevention | None = None,
+    ) -> None:
+        self.logger = logger
+        self.self_trade_prevention = self_trade_prevention
+
+    def uncross(self, order_queue: OrderQueue) -> tuple[float | None, list[tuple]]:
+        orders: list[Order] = []
+        while order_queue.queue:
+            orders.append(order_queue.pop_next_order())
+        arrival = {order.order_id: index for index, order in enumerate(orders)}
+
+        remaining = orders
+        dropped = self._crossing_post_only(orders, order_queue)
+        while True:
+            if dropped:
+                for order in dropped:
+                    order_queue.expire_order(order)
+                dropped_ids = {order.order_id for order in dropped}
+                remaining = [
+                    order for order in remaining if order.order_id not in dropped_ids
+                ]
+            buys = [order for order in remaining if order.side == OrderSide.BUY]
+            sells = [order for order in remaining if order.side == OrderSide.SELL]
+            clearing_price, volume = self.find_clearing_price(buys, sells)
+            pairs: list[tuple] = []
+            if not volume:
+                break
+            pairs, dropped = self._pair(buys, sells, clearing_price, volume, arrival)
+            if not dropped:
+                break
+
+        matches = self._allocate(pairs, clearing_price, order_queue)
+        for order in remaining:
+            if order.quantity > 0:
+                if order.order_type in (OrderType.LIMIT, OrderType.POST_ONLY):
+                    order_queue.update_orderbooks(order)
+                else:
+                    order_queue.expire_order(order)
+
+        self._log_uncross(clearing_price, volume, orders)
+        return clearing_price, matches
+
+    @staticmethod
+    def _crossing_post_only(
+        orders: list[Order], order_queue: OrderQueue
+    ) -> list[Order]:
+        """POST_ONLY Orders that would take liquidity from the auction or book"""
+        bids = [order.price for order in orders if order.side == OrderSide.BUY]
+        asks = [order.price for order in orders if order.side == OrderSide.SELL]
+        for prices, depth in (
+            (bids, order_queue.buy_depth),
+            (asks, order_queue.sell_depth),
+        ):
+            if depth.best_price() is not None:
+                prices.append(depth.best_price())
+        best_bid, best_ask = max(bids, default=None), min(asks, default=None)
+        crossing = []
+        for order in orders:
+            if order.order_type is not OrderType.POST_ONLY:
+                continue
+            if order.side == OrderSide.BUY:
+                if best_ask is not None and best_ask <= order.price:
+                    crossing.append(order)
+            elif best_bid is not None and best_bid >= order.price:
+                crossing.append(order)
+        return crossing
+
+    @staticmethod
+    def find_clearing_price(
+        buys: list[Order], sells: list[Order]
+    ) -> tuple[float | None, int]:
+        """Returns (clearing price, executable volume) from per-level aggregates."""
+        demand: dict[float, int] = {}
+        supply: dict[float, int] = {}
+        for order in buys:
+            demand[order.price] = demand.get(order.price, 0) + order.quantity
+        for order in sells:
+            supply[order.price] = supply.get(order.price, 0) + order.quantity
+
+        prices = sorted(demand.keys() | supply.keys())
+        if not prices:
+            return None, 0
+        # Buyers accept any price at or below their limit, sellers at or above
+        cumulative_demand = list(
+            accumulate(demand.get(price, 0) for price in reversed(prices))
+        )[::-1]
+        cumulative_supply = list(accumulate(supply.get(price, 0) for price in prices))
+
+        best_price, best_key = None, (0, 0)
+        for price, bid, ask in zip(prices, cumulative_demand, cumulative_supply):
+            key = (min(bid, ask), -abs(bid - ask))
+            if key[0] and (best_price is None or key > best_key):
+                best_price, best_key = price, key
+        return best_price, best_key[0]
+
+    def _pair(
+        self,
+        buys: list[Order],
+        sells: list[Order],
+        price: float,
+        volume: int,
+        arrival: dict,
+    ) -> tuple[list[tuple], list[Order]]:
+        """
+        Returns the (buy, sell, quantity) pairs that fill volume at price, and
+        the Orders that must leave the auction first: those cancelled by the
+        first self-trade met, else the FOK Orders the pairs leave short.
+        """
+        # Stable sorts keep arrival order within a price
+        buys = sorted(
+            (order for order in buys if order.price >= price),
+            key=lambda order: -order.price,
+        )
+        sells = sorted(
+            (order for order in sells if order.price <= price),
+            key=lambda order: order.price,
+        )
+        pairs = []
+        filled: dict = {}
+        buy_index = sell_index = 0
+        while volume > 0:
+            best_buy, best_sell = buys[buy_index], sells[sell_index]
+            if self.self_trade_prevention and best_buy.user_id == best_sell.user_id:
+                return pairs, self._self_trade(best_buy, best_sell, arrival)
+            buy_filled = filled.get(best_buy.order_id, 0)
+            sell_filled = filled.get(best_sell.order_id, 0)
+            matched_quantity = min(
+                best_buy.quantity - buy_filled,
+                best_sell.quantity - sell_filled,
+                volume,
+            )
+            pairs.append((best_buy, best_sell, matched_quantity))
+            volume -= matched_quantity
+            filled[best_buy.order_id] = buy_filled + matched_quantity
+            filled[best_sell.order_id] = sell_filled + matched_quantity
+            if filled[best_buy.order_id] == best_buy.quantity:
+                buy_index += 1
+            if filled[best_sell.order_id] == best_sell.quantity:
+                sell_index += 1
+
+        short = [
+            order
+            for order in buys + sells
+            if order.order_type is OrderType.FOK
+            and filled.get(order.order_id, 0) < order.quantity
+        ]
+        return pairs, short
+
+    def _self_trade(self, buy: Order, sell: Order, arrival: dict) -> list[Order]:
+        """The Orders self_trade_prevention cancels when buy meets sell"""
+        resting, incoming = sorted((buy, sell), key=lambda o: arrival[o.order_id])
+        cancelled = []
+        if self.self_trade_prevention is not SelfTradePrevention.CANCEL_INCOMING:
+            cancelled.append(resting)
+        if self.self_trade_prevention is not SelfTradePrevention.CANCEL_RESTING:
+            cancelled.append(incoming)
+        return cancelled
+
+    @staticmethod
+    def _allocate(
+        pairs: list[tuple], price: float, order_queue: OrderQueue
+    ) -> list[tuple]:
+        matches = []
+        risk = order_queue.risk
+        for best_buy, best_sell, matched_quantity in pairs:
+            matches.append((best_buy, best_sell, price, matched_quantity))
+            best_buy.quantity -= matched_quantity
+            best_sell.quantity -= matched_quantity
+            best_buy.status = OrderStatus.PARTIALLY_FILLED
+            best_sell.status = OrderStatus.PARTIALLY_FILLED
+            if risk:
+                risk.record_fill(best_buy, best_sell, price, matched_quantity)
+            if best_buy.quantity == 0:
+                best_buy.status = OrderStatus.FILLED
+                order_queue.add_filled_order(best_buy)
+            if best_sell.quantity == 0:
+                best_sell.status = OrderStatus.FILLED
+                order_queue.add_filled_order(best_sell)
+        return matches
+
+    def _log_uncross(
+        self, price: float | None, volume: int, orders: list[Order]
+    ) -> None:
+        if self.logger:
+            if price is None:
+                self.logger.info(f"-- Auction: {len(orders)} orders, no clearing price")
+            else:
+                # CompactOrder prices are ticks
+                price = type(orders[0]).to_price(price)
+                self.logger.info(
+                    f"-- Auction: {len(orders)} orders uncrossed {volume} units "
+                    f"at ${price:.2f}"
+                )
@@ -0,0 +1,398 @@
+import argparse
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from src.order_components import OrderSide, Order, CompactOrder
+from src.order_queue import OrderQueue
+from src.match_engine import MatchEngine
+from src.order_processor import OrderProcessor
+
+MID_PRICE = 100.0
+TICK = 0.01
+
+# A workload is a list of operations:
+#   ("new", user_id, side, price, quantity)
+#   ("cancel", index of an earlier "new" operation)
+
+
+def _new(rng: random.Random, side: OrderSide, price: float, quantity: int) -> tuple:
+    return ("new", f"user{rng.randint(1, 100)}", side, round(price, 2), quantity)
+
+
+def _side(rng: random.Random) -> OrderSide:
+    return OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+
+
+def uniform_workload(rng: random.Random, operations: int) -> list[tuple]:
+    """Prices spread evenly over +-10% of the mid, like create_random_order."""
+    return [
+        _new(rng, _side(rng), rng.uniform(90, 110), rng.randint(1, 20))
+        for _ in range(operations)
+    ]
+
+
+def clustered_workload(rng: random.Random, operations: int) -> list[tuple]:
+    """Prices normally distributed a few ticks around the mid."""
+    return [
+        _new(rng, _side(rng), rng.gauss(MID_PRICE, 10 * TICK), rng.randint(1, 20))
+        for _ in range(operations)
+    ]
+
+
+def cancel_heavy_workload(rng: random.Random, operations: int) -> list[tuple]:
+    """Half of all operations cancel an earlier order."""
+    workload = []
+    new_indexes = []
+    for _ in range(operations):
+        if new_indexes and rng.random() < 0.5:
+            workload.append(("cancel", rng.choice(new_indexes)))
+        else:
+            new_indexes.append(len(workload))
+            side = _side(rng)
+            offset = rng.uniform(0, 2)
+            price = MID_PRICE - offset if side == OrderSide.BUY else MID_PRICE + offset
+            workload.append(_new(rng, side, price, rng.randint(1, 20)))
+    return workload
+
+
+def deep_book_workload(rng: random.Random, operations: int) -> list[tuple]:
+    """Mostly passive orders over a thousand levels per side, a few at the touch."""
+    workload = []
+    for _ in range(operations):
+        side = _side(rng)
+        if rng.random() < 0.9:
+            offset = rng.randint(1, 1000) * TICK
+        else:
+            offset = -rng.randint(0, 5) * TICK
+        price = MID_PRICE - offset if side == OrderSide.BUY else MID_PRICE + offset
+        workload.append(_new(rng, side, price, rng.randint(1, 20)))
+    return workload
+
+
+def sweep_workload(rng: random.Random, operations: int) -> list[tuple]:
+    """Passive orders refilling the book, every tenth a large aggressor sweeping it."""
+    workload = []
+    for index in range(operations):
+        side = _side(rng)
+        if index % 10 == 9:
+            price = MID_PRICE + 5 if side == OrderSide.BUY else MID_PRICE - 5
+            workload.append(_new(rng, side, price, rng.randint(100, 300)))
+        else:
+            offset = rng.randint(1, 500) * TICK
+            price = MID_PRICE - offset if side == OrderSide.BUY else MID_PRICE + offset
+            workload.append(_new(rng, side, price, rng.randint(1, 20)))
+    return workload
+
+
+WORKLOADS = {
+    "uniform": uniform_workload,
+    "clustered": clustered_workload,
+    "cancel_heavy": cancel_heavy_workload,
+    "deep_book": deep_book_workload,
+    "sweep": sweep_workload,
+}
+
+
+def generate_workload(name: str, operations: int, seed: int = 0) -> list[tuple]:
+    return WORKLOADS[name](random.Random(seed), operations)
+
+
+def _time_order_queue(workload: list[tuple], order_class) -> list[int]:
+    """add_order + get_next_order (resting without matching), or cancel_order"""
+    order_queue = OrderQueue()
+    orders = {}
+    latencies = []
+    clock = time.perf_counter_ns
+    for index, operation in enumerate(workload):
+        if operation[0] == "new":
+            order = order_class(*operation[1:])
+            t0 = clock()
+            order_queue.add_order(order)
+            order_queue.get_next_order()
+            latencies.append(clock() - t0)
+            orders[index] = order
+        else:
+            order_id = orders[operation[1]].order_id
+            t0 = clock()
+            order_queue.cancel_order(order_id)
+            latencies.append(clock() - t0)
+    return latencies
+
+
+def _time_intake(workload: list[tuple], order_class) -> list[int]:
+    """
+    add_order + get_next_order, or cancel_order, with every order added before
+    any is taken so cancels hit PENDING orders in a deep intake queue
+    """
+    order_queue = OrderQueue()
+    orders = {}
+    slots = {}
+    latencies = []
+    clock = time.perf_counter_ns
+    for index, operation in enumerate(workload):
+        if operation[0] == "new":
+            order = orders[index] = order_class(*operation[1:])
+            t0 = clock()
+            order_queue.add_order(order)
+            latencies.append(clock() - t0)
+            slots[order.order_id] = len(latencies) - 1
+        else:
+            order_id = orders[operation[1]].order_id
+            t0 = clock()
+            order_queue.cancel_order(order_id)
+            latencies.append(clock() - t0)
+    while order_queue.queue:
+        t0 = clock()
+        order = order_queue.get_next_order()
+        latencies[slots[order.order_id]] += clock() - t0
+    return latencies
+
+
+def _time_match_engine(workload: list[tuple], order_class) -> list[int]:
+    """match_orders after each new order rests; cancels are applied untimed"""
+    order_queue = OrderQueue()
+    match_engine = MatchEngine()
+    orders = {}
+    latencies = []
+    clock = time.perf_counter_ns
+    for index, operation in enumerate(workload):
+        if operation[0] == "new":
+            order = orders[index] = order_class(*operation[1:])
+            order_queue.add_order(order)
+            order_queue.get_next_order()
+            t0 = clock()
+            match_engine.match_orders(order_queue)
+            latencies.append(clock() - t0)
+        else:
+            order_queue.cancel_order(orders[operation[1]].order_id)
+    return latencies
+
+
+def _time_order_processor(
+    workload: list[tuple], order_class, match_on_arrival: bool = False
+) -> list[int]:
+    """receive_order + process_single_order, or cancel_order"""
+    order_processor = OrderProcessor(
+        OrderQueue(),
+        MatchEngine(),
+        order_class=order_class,
+        match_on_arrival=match_on_arrival,
+    )
+    orders = {}
+    latencies = []
+    clock = time.perf_counter_ns
+    for index, operation in enumerate(workload):
+        if operation[0] == "new":
+            t0 = clock()
+            orders[index] = order_processor.receive_order(*operation[1:])
+            order_processor.process_single_order()
+            latencies.append(clock() - t0)
+        else:
+            order_id = orders[operation[1]].order_id
+            t0 = clock()
+            order_processor.cancel_order(order_id)
+            latencies.append(clock() - t0)
+    return latencies
+
+
+COMPONENTS = {
+    "order_queue": _time_order_queue,
+    "intake": _time_intake,
+    "match_engine": _time_match_engine,
+    "order_processor": _time_order_processor,
+    "order_processor_arrival": lambda workload, order_class: _time_order_processor(
+        workload, order_class, match_on_arrival=True
+    ),
+}
+ORDER_CLASSES = {"Order": Order, "CompactOrder": CompactOrder}
+
+
+def percentile(sorted_values: list[int], fraction: float) -> int:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0
+    rank = max(0, min(len(sorted_values) - 1, int(fraction * len(sorted_values))))
+    return sorted_values[rank]
+
+
+def latency_histogram(latencies: list[int]) -> list[list[int]]:
+    """[upper bound in ns, count] pairs over power-of-two buckets."""
+    buckets: dict[int, int] = {}
+    for latency in latencies:
+        bound = 1 << max(latency - 1, 0).bit_length()
+        buckets[bound] = buckets.get(bound, 0) + 1
+    return [[bound, buckets[bound]] for bound in sorted(buckets)]
+
+
+def run_case(
+    workload_name: str,
+    component: str,
+    operations: int,
+    seed: int = 0,
+    order_class_name: str = "Order",
+) -> dict:
+    """Benchmark one component on one workload; the result is JSON-serialisable."""
+    order_class = ORDER_CLASSES[order_class_name]
+    order_class.reset_id_generator()
+    workload = generate_workload(workload_name, operations, seed)
+
+    t0 = time.perf_counter()
+    latencies = COMPONENTS[component](workload, order_class)
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    count = len(latencies)
+    timed = sum(latencies)
+    return {
+        "workload": workload_name,
+        "component": component,
+        "order_class": order_class_name,
+        "operations": count,
+        "seconds": elapsed,
+        # Over the timed calls only, excluding workload setup and untimed cancels
+        "throughput_ops": count * 1e9 / timed if timed else 0.0,
+        "latency_ns": {
+            "mean": sum(latencies) / count if count else 0,
+            "p50": percentile(latencies, 0.50),
+            "p99": percentile(latencies, 0.99),
+            "p99.9": percentile(latencies, 0.999),
+            "max": latencies[-1] if latencies else 0,
+        },
+        "histogram_ns": latency_histogram(latencies),
+        # Kilobytes on Linux; per case only when run in its own process
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    operations: int = 100_000,
+    workloads: list[str] | None = None,
+    components: list[str] | None = None,
+    order_classes: list[str] | None = None,
+    seed: int = 0,
+    isolate: bool = True,
+) -> dict:
+    """
+    Runs every workload x component x order class case. With isolate, each case
+    runs in a fresh worker process so peak RSS is measured per case.
+    """
+    cases = [
+        (workload, component, operations, seed, order_class)
+        for workload in workloads or WORKLOADS
+        for component in components or COMPONENTS
+        for order_class in order_classes or ["Order"]
+    ]
+    if isolate:
+        with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+            results = [executor.submit(run_case, *case).result() for case in cases]
+    else:
+        results = [run_case(*case) for case in cases]
+    return {
+        "metadata": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "operations": operations,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare_results(baseline: dict, current: dict) -> list[dict]:
+    """
+    Throughput and p99 ratios (current / baseline) for cases present in both.
+    throughput_ratio is None when the baseline recorded no throughput.
+    """
+
+    def key(result):
+        return result["workload"], result["component"], result["order_class"]
+
+    previous = {key(result): result for result in baseline["results"]}
+    comparison = []
+    for result in current["results"]:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        throughput_ratio = (
+            result["throughput_ops"] / before["throughput_ops"]
+            if before["throughput_ops"]
+            else None
+        )
+        comparison.append(
+            {
+                "workload": result["workload"],
+                "component": result["component"],
+                "order_class": result["order_class"],
+                "throughput_ratio": throughput_ratio,
+                "p99_ratio": result["latency_ns"]["p99"]
+                / max(before["latency_ns"]["p99"], 1),
+            }
+        )
+    return comparison
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the matching stack.")
+    parser.add_argument("--operations", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS))
+    parser.add_argument("--components", nargs="+", choices=list(COMPONENTS))
+    parser.add_argument(
+        "--order-classes", nargs="+", choices=list(ORDER_CLASSES), default=["Order"]
+    )
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="earlier JSON output to compare against")
+    parser.add_argument("--no-isolate", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = run_suite(
+        args.operations,
+        args.workloads,
+        args.components,
+        args.order_classes,
+        args.seed,
+        isolate=not args.no_isolate,
+    )
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    for result in report["results"]:
+        latency = result["latency_ns"]
+        print(
+            f"{result['workload']:>12} {result['component']:>23} "
+            f"{result['order_class']:>12} {result['throughput_ops']:>12,.0f} ops/s "
+            f"p50 {latency['p50']:>8,} p99 {latency['p99']:>9,} "
+            f"p99.9 {latency['p99.9']:>10,} ns  rss {result['peak_rss_kb']:,} kB"
+        )
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        for row in compare_results(baseline, report):
+            ratio = row["throughput_ratio"]
+            throughput = "n/a" if ratio is None else f"x{ratio:.2f}"
+            print(
+                f"{row['workload']:>12} {row['component']:>23} "
+                f"{row['order_class']:>12} throughput {throughput} "
+                f"p99 x{row['p99_ratio']:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
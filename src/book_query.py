@@ -0,0 +1,104 @@
+import time
+from src.depth_index import DepthIndex
+from src.order_components import OrderSide
+from src.order_queue import OrderQueue
+
+
+class BookQuery:
+    """
+    Read-only statistics of the book of an OrderQueue, answered from its
+    DepthIndex aggregates in O(levels touched) rather than from the heaps.
+    Queries may run on a monitoring thread while the matcher changes the book.
+    Each is an optimistic, seqlock-style read: it is retried when a version of
+    the sides it read was odd or moved on meanwhile, so it returns a state the
+    book was actually in and the matcher never waits for it.
+    Prices are in the units of the order class, i.e. ticks for CompactOrder.
+    """
+
+    def __init__(self, order_queue: OrderQueue) -> None:
+        self.order_queue = order_queue
+        self.retries = 0
+
+    def best_bid(self) -> tuple[float, int] | None:
+        """(price, quantity) of the best bid, None if there is none"""
+        buy_depth = self.order_queue.buy_depth
+        return self._read(lambda: self._best(buy_depth), buy_depth)
+
+    def best_ask(self) -> tuple[float, int] | None:
+        sell_depth = self.order_queue.sell_depth
+        return self._read(lambda: self._best(sell_depth), sell_depth)
+
+    def top(self) -> tuple[tuple[float, int] | None, tuple[float, int] | None]:
+        """Best bid and best ask, read together"""
+        buy_depth, sell_depth = self.order_queue.buy_depth, self.order_queue.sell_depth
+        return self._read(
+            lambda: (self._best(buy_depth), self._best(sell_depth)),
+            buy_depth,
+            sell_depth,
+        )
+
+    def spread(self) -> float | None:
+        """Best ask less best bid, None unless both sides hold orders"""
+        bid, ask = self.top()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def depth(self, side: OrderSide, levels: int | None = None) -> list[tuple]:
+        """(price, quantity) of the best levels of side, best first"""
+        depth = self.order_queue.depth(side)
+        return self._read(lambda: depth.levels(levels), depth)
+
+    def cumulative_quantity(self, side: OrderSide, price: float) -> int:
+        """Quantity resting on side at price or better"""
+        depth = self.order_queue.depth(side)
+        return self._read(lambda: depth.available(price), depth)
+
+    def vwap(self, side: OrderSide, quantity: int) -> float | None:
+        """
+        Average price of taking quantity from the levels of side, best first:
+        the asks for a buyer, the bids for a seller. None if side holds less.
+        """
+        if quantity <= 0:
+            raise ValueError("quantity must be positive")
+        depth = self.order_queue.depth(side)
+        return self._read(lambda: self._vwap(depth, quantity), depth)
+
+    def _read(self, query, *depths: DepthIndex):
+        while True:
+            versions = [depth.version for depth in depths]
+            if not any(version & 1 for version in versions):
+                try:
+                    result = query()
+                except (KeyError, IndexError):
+                    # A level went away between reading its price and quantity
+                    pass
+                else:
+                    if versions == [depth.version for depth in depths]:
+                        return result
+            self.retries += 1
+            # Let a matcher interrupted mid-change finish it
+            time.sleep(0)
+
+    @staticmethod
+    def _best(depth: DepthIndex) -> tuple[float, int] | None:
+        keys = depth.keys
+        if not keys:
+            return None
+        price = depth.sign * keys[0]
+        return price, depth.quantities[price]
+
+    @staticmethod
+    def _vwap(depth: DepthIndex, quantity: int) -> float | None:
+        sign = depth.sign
+        quantities = depth.quantities
+        remaining = quantity
+        notional = 0.0
+        for key in depth.keys:
+            price = sign * key
+            taken = min(remaining, quantities[price])
+            notional += price * taken
+            remaining -= taken
+            if not remaining:
+                return notional / quantity
+        return None
@@ -0,0 +1,263 @@
+import csv
+import gc
+import json
+import mmap
+import os
+from array import array
+from contextlib import contextmanager
+from itertools import repeat
+from typing import Iterator
+from src.order_components import (
+    OrderSide,
+    OrderStatus,
+    OrderType,
+    Order,
+    CompactOrder,
+    SIDES_BY_VALUE,
+)
+
+MAGIC = b"TSCOL1\n"
+STRING_SEPARATOR = "\n"
+
+
+def write_columns(
+    path: str, columns: dict[str, array | list[str]], metadata: dict | None = None
+) -> None:
+    """
+    Writes equally long columns to path, replacing it atomically.
+    array columns are stored as raw machine values. list[str] columns are stored
+    as one newline-joined utf-8 blob, so values must not contain newlines, or as
+    indexes into their distinct values when those repeat.
+    """
+    blobs = []
+    layout = []
+    for name, column in columns.items():
+        entry = {"name": name, "rows": len(column)}
+        if isinstance(column, array):
+            entry["type"] = column.typecode
+            blob = column.tobytes()
+        else:
+            values = dict.fromkeys(column)
+            if len(values) * 2 <= len(column):
+                # Repetitive columns are stored once per value plus an index
+                index = {value: code for code, value in enumerate(values)}
+                codes = array("I", map(index.__getitem__, column))
+                entry["type"] = "dict"
+                entry["values"] = list(values)
+                blob = codes.tobytes()
+            else:
+                entry["type"] = "str"
+                blob = STRING_SEPARATOR.join(column).encode()
+        entry["size"] = len(blob)
+        layout.append(entry)
+        blobs.append(blob)
+    header = json.dumps({"metadata": metadata or {}, "columns": layout}).encode()
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(8, "little"))
+        file.write(header)
+        for blob in blobs:
+            file.write(blob)
+    os.replace(temporary_path, path)
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Pauses cyclic garbage collection, e.g. while building objects that all survive"""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _read_header(view: mmap.mmap, path: str) -> tuple[dict, int]:
+    if view[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a columnar file")
+    offset = len(MAGIC) + 8
+    header_size = int.from_bytes(view[len(MAGIC) : offset], "little")
+    return json.loads(view[offset : offset + header_size]), offset + header_size
+
+
+def _decode_column(entry: dict, blob: bytes) -> array | list[str]:
+    if entry["type"] == "str":
+        return blob.decode().split(STRING_SEPARATOR) if entry["rows"] else []
+    if entry["type"] == "dict":
+        codes = array("I")
+        codes.frombytes(blob)
+        return list(map(entry["values"].__getitem__, codes))
+    column = array(entry["type"])
+    column.frombytes(blob)
+    return column
+
+
+def read_columns(path: str) -> tuple[dict, dict[str, array | list[str]]]:
+    """Returns (metadata, columns) written by write_columns."""
+    with open(path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as view:
+        header, offset = _read_header(view, path)
+        columns = {}
+        for entry in header["columns"]:
+            blob = view[offset : offset + entry["size"]]
+            offset += entry["size"]
+            columns[entry["name"]] = _decode_column(entry, blob)
+    return header["metadata"], columns
+
+
+class ColumnReader:
+    """
+    Row access to a write_columns file that stays mmapped. Fixed-width columns
+    decode only the rows asked for; newline-joined str columns can only be
+    split whole, so each is decoded on first use and kept.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self.view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header, offset = _read_header(self.view, path)
+        except ValueError:
+            self.view.close()
+            raise
+        self.metadata = header["metadata"]
+        self.entries: dict[str, tuple[dict, int]] = {}
+        for entry in header["columns"]:
+            self.entries[entry["name"]] = entry, offset
+            offset += entry["size"]
+        self._decoded: dict[str, list[str]] = {}
+
+    def column(self, name: str) -> array | list[str]:
+        entry, offset = self.entries[name]
+        return _decode_column(entry, self.view[offset : offset + entry["size"]])
+
+    def row(self, index: int) -> dict[str, array | list[str]]:
+        """Every column cut down to row index, e.g. for restore_orders."""
+        columns = {}
+        for name, (entry, offset) in self.entries.items():
+            if entry["type"] == "str":
+                if name not in self._decoded:
+                    self._decoded[name] = self.column(name)
+                columns[name] = self._decoded[name][index : index + 1]
+                continue
+            typecode = "I" if entry["type"] == "dict" else entry["type"]
+            column = array(typecode)
+            start = offset + index * column.itemsize
+            column.frombytes(self.view[start : start + column.itemsize])
+            if entry["type"] == "dict":
+                column = [entry["values"][column[0]]]
+            columns[name] = column
+        return columns
+
+    def close(self) -> None:
+        self.view.close()
+
+
+def write_order_file(
+    path: str,
+    user_ids: list[str],
+    sides: array,
+    prices: array,
+    quantities: array,
+) -> None:
+    """
+    Writes new orders for OrderProcessor.load_orders: sides as OrderSide values
+    in a "b" array, prices as floats in a "d" array, quantities in a "q" array.
+    """
+    write_columns(
+        path,
+        {
+            "user_id": user_ids,
+            "side": sides,
+            "price": prices,
+            "quantity": quantities,
+        },
+        {"rows": len(quantities)},
+    )
+
+
+def convert_order_csv(csv_path: str, path: str) -> int:
+    """
+    Converts a CSV with user_id, side, price and quantity columns, named in its
+    header, to an order file. side is BUY, SELL or their OrderSide value.
+    Returns the number of rows.
+    """
+    side_values = {side.name: side.value for side in OrderSide}
+    side_values.update({str(side.value): side.value for side in OrderSide})
+    user_ids: list[str] = []
+    sides, prices, quantities = array("b"), array("d"), array("q")
+    with open(csv_path, newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        try:
+            user, side, price, quantity = (
+                header.index(name) for name in ("user_id", "side", "price", "quantity")
+            )
+        except ValueError:
+            raise ValueError(f"{csv_path} lacks a user_id,side,price,quantity header")
+        for row in reader:
+            user_ids.append(row[user])
+            sides.append(side_values[row[side].upper()])
+            prices.append(float(row[price]))
+            quantities.append(int(row[quantity]))
+    write_order_file(path, user_ids, sides, prices, quantities)
+    return len(quantities)
+
+
+def order_columns(
+    orders: list[Order] | list[CompactOrder],
+    order_class: type[Order] | type[CompactOrder] = Order,
+) -> dict[str, array | list[str]]:
+    """
+    One column per Order field, ready for write_columns. Order ids are stored
+    as integers, so only generated ids can be written.
+    """
+    compact = issubclass(order_class, CompactOrder)
+    order_ids = [order.order_id for order in orders]
+    return {
+        "order_id": array("q", order_ids if compact else map(int, order_ids)),
+        "user_id": [str(order.user_id) for order in orders],
+        "side": array("b", [order.side.value for order in orders]),
+        "price": array("q" if compact else "d", [order.price for order in orders]),
+        "quantity": array("q", [order.quantity for order in orders]),
+        "status": array("b", [order.status.value for order in orders]),
+        "timestamp": array(
+            "q", [order_class.encode_timestamp(order.timestamp) for order in orders]
+        ),
+        "symbol": [order.symbol for order in orders],
+        "order_type": array("b", [order.order_type.value for order in orders]),
+    }
+
+
+def restore_orders(
+    columns: dict[str, array | list[str]],
+    order_class: type[Order] | type[CompactOrder] = Order,
+) -> list[Order] | list[CompactOrder]:
+    """Inverse of order_columns."""
+    statuses = {status.value: status for status in OrderStatus}
+    order_types = {order_type.value: order_type for order_type in OrderType}
+    order_ids = columns["order_id"]
+    # Files written before integer ids hold str ids
+    if isinstance(order_ids, array) and not issubclass(order_class, CompactOrder):
+        order_ids = map(order_class.format_id, order_ids)
+    # Restored objects all survive, so collecting while allocating them is wasted
+    with gc_paused():
+        return list(
+            map(
+                order_class.restore,
+                order_ids,
+                columns["user_id"],
+                map(SIDES_BY_VALUE.__getitem__, columns["side"]),
+                columns["price"],
+                columns["quantity"],
+                map(statuses.__getitem__, columns["status"]),
+                order_class.decode_timestamps(columns["timestamp"]),
+                columns["symbol"],
+                # Files written before order types existed hold only LIMIT orders
+                map(order_types.__getitem__, columns.get("order_type", repeat(0))),
+            )
+        )
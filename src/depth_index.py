@@ -0,0 +1,94 @@
+from bisect import bisect_left, insort
+from src.order_components import OrderSide
+
+
+class DepthIndex:
+    """
+    Resting quantity per price level for one side of the book.
+    Level prices are also kept sorted best first (negated for buys), so the
+    liquidity available up to a limit price is a walk over only the levels
+    it crosses, and a new level costs one bisect insert.
+    changed collects the prices of touched levels while a market-data
+    publisher is attached; it is None otherwise.
+    version is odd while the index is being changed and moves on after every
+    change, so BookQuery can read it from another thread without a lock.
+    """
+
+    def __init__(self, side: OrderSide) -> None:
+        self.side = side
+        self.sign = -1 if side == OrderSide.BUY else 1
+        self.quantities: dict[float, int] = {}
+        self.keys: list[float] = []  # sign * price, best first
+        self.changed: set[float] | None = None
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, price: float, quantity: int) -> None:
+        self.version += 1
+        try:
+            quantities = self.quantities
+            total = quantities.get(price)
+            if total is None:
+                quantities[price] = quantity
+                insort(self.keys, self.sign * price)
+            else:
+                quantities[price] = total + quantity
+            if self.changed is not None:
+                self.changed.add(price)
+        finally:
+            self.version += 1
+
+    def remove(self, price: float, quantity: int) -> None:
+        self.version += 1
+        try:
+            remaining = self.quantities[price] - quantity
+            if remaining:
+                self.quantities[price] = remaining
+            else:
+                del self.quantities[price]
+                keys = self.keys
+                del keys[bisect_left(keys, self.sign * price)]
+            if self.changed is not None:
+                self.changed.add(price)
+        finally:
+            self.version += 1
+
+    def best_price(self) -> float | None:
+        return self.sign * self.keys[0] if self.keys else None
+
+    def available(self, limit: float | None = None, wanted: int | None = None) -> int:
+        """
+        Quantity resting at limit or better, all of it if limit is None.
+        Stops walking levels once wanted is reached.
+        """
+        sign = self.sign
+        quantities = self.quantities
+        bound = None if limit is None else sign * limit
+        total = 0
+        for key in self.keys:
+            if bound is not None and key > bound:
+                break
+            total += quantities[sign * key]
+            if wanted is not None and total >= wanted:
+                break
+        return total
+
+    def levels(self, count: int | None = None) -> list[tuple[float, int]]:
+        """(price, quantity) of the best count levels, best first"""
+        sign = self.sign
+        keys = self.keys if count is None else self.keys[:count]
+        return [(sign * key, self.quantities[sign * key]) for key in keys]
+
+    def load(self, levels: list[tuple[float, int]]) -> None:
+        """Replace the index with (price, quantity) levels, e.g. from a snapshot"""
+        self.version += 1
+        try:
+            if self.changed is not None:
+                self.changed.update(self.quantities)
+                self.changed.update(price for price, _ in levels)
+            self.quantities = {price: quantity for price, quantity in levels}
+            self.keys = sorted(self.sign * price for price in self.quantities)
+        finally:
+            self.version += 1
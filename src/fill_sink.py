@@ -0,0 +1,133 @@
+from array import array
+from src.order_components import Order, CompactOrder
+
+COLUMNS = ("buy_id", "sell_id", "price", "quantity", "sequence")
+
+
+class FillSink:
+    """
+    Fills written straight into preallocated array columns instead of one
+    (buy Order, sell Order, price, quantity) tuple each: 40 bytes per fill and
+    no Order kept reachable. Order ids are stored as integers, prices as ticks
+    for CompactOrder, and sequence numbers every fill since the sink was made.
+    Full columns are copied into ones twice the size, so memoryviews a consumer
+    still holds stay valid. clear() reuses the buffers.
+    """
+
+    def __init__(
+        self,
+        order_class: type[Order] | type[CompactOrder] = Order,
+        capacity: int = 1 << 16,
+    ) -> None:
+        self.order_class = order_class
+        self.capacity = capacity
+        self.typecodes = {
+            "buy_id": "q",
+            "sell_id": "q",
+            "price": "q" if issubclass(order_class, CompactOrder) else "d",
+            "quantity": "q",
+            "sequence": "q",
+        }
+        self.count = 0
+        self.sequence = 0
+        self.buy_ids, self.sell_ids, self.prices, self.quantities, self.sequences = (
+            self._allocate(name, capacity) for name in COLUMNS
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(
+        self, buy_id: str | int, sell_id: str | int, price: float, quantity: int
+    ) -> None:
+        row = self.count
+        if row == self.capacity:
+            self._grow()
+        self.buy_ids[row] = int(buy_id)
+        self.sell_ids[row] = int(sell_id)
+        self.prices[row] = price
+        self.quantities[row] = quantity
+        self.sequences[row] = self.sequence
+        self.sequence += 1
+        self.count = row + 1
+
+    def view(self, start: int = 0, stop: int | None = None) -> "FillView":
+        return FillView(self, start, self.count if stop is None else stop)
+
+    def columns(self) -> dict[str, memoryview]:
+        """Zero-copy views of every recorded fill, e.g. for numpy.frombuffer"""
+        return self.view().columns()
+
+    def clear(self) -> None:
+        """Forget recorded fills; views taken before read the next ones instead"""
+        self.count = 0
+
+    def _allocate(self, name: str, capacity: int) -> array:
+        column = array(self.typecodes[name])
+        column.frombytes(bytes(column.itemsize * capacity))
+        return column
+
+    def _grow(self) -> None:
+        capacity = self.capacity * 2
+        grown = []
+        for name, column in zip(COLUMNS, self._columns()):
+            new_column = self._allocate(name, capacity)
+            new_column[: self.capacity] = column
+            grown.append(new_column)
+        self.buy_ids, self.sell_ids, self.prices, self.quantities, self.sequences = (
+            grown
+        )
+        self.capacity = capacity
+
+    def _columns(self) -> tuple[array, ...]:
+        return self.buy_ids, self.sell_ids, self.prices, self.quantities, self.sequences
+
+
+class FillView:
+    """
+    The fills one match call wrote to a FillSink, standing in for its list of
+    tuples: len() counts them and iterating yields (buy id, sell id, price,
+    quantity) with ids in the form the Order class uses.
+    """
+
+    def __init__(self, sink: FillSink, start: int, stop: int) -> None:
+        self.sink = sink
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __bool__(self) -> bool:
+        return self.stop > self.start
+
+    def __iter__(self):
+        sink = self.sink
+        rows = slice(self.start, self.stop)
+        format_id = sink.order_class.format_id
+        return zip(
+            map(format_id, sink.buy_ids[rows]),
+            map(format_id, sink.sell_ids[rows]),
+            sink.prices[rows],
+            sink.quantities[rows],
+        )
+
+    def __getitem__(self, index: int) -> tuple:
+        if not -len(self) <= index < len(self):
+            raise IndexError("fill index out of range")
+        row = self.start + index % len(self)
+        sink = self.sink
+        format_id = sink.order_class.format_id
+        return (
+            format_id(sink.buy_ids[row]),
+            format_id(sink.sell_ids[row]),
+            sink.prices[row],
+            sink.quantities[row],
+        )
+
+    def columns(self) -> dict[str, memoryview]:
+        rows = slice(self.start, self.stop)
+        return {
+            name: memoryview(column)[rows]
+            for name, column in zip(COLUMNS, self.sink._columns())
+        }
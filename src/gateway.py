@@ -0,0 +1,326 @@
+import asyncio
+import math
+import struct
+import time
+from enum import IntEnum
+from typing import Iterator
+from src.order_components import OrderSide, OrderStatus, Order, CompactOrder
+from src.order_processor import OrderProcessor
+from src.fill_sink import FillView
+from src.logger import Logger
+
+
+class MessageType(IntEnum):
+    NEW_ORDER = 1
+    CANCEL_ORDER = 2
+    ACK = 3
+    FILL = 4
+
+
+# Every frame is a 1-byte MessageType followed by its fixed-size body
+MESSAGE_BODIES = {
+    # client sequence, side, price, quantity, user id
+    MessageType.NEW_ORDER: struct.Struct("<IBdI16s"),
+    # client sequence, order id
+    MessageType.CANCEL_ORDER: struct.Struct("<I16s"),
+    # client sequence, order status, order id
+    MessageType.ACK: struct.Struct("<IB16s"),
+    # order id, price, quantity
+    MessageType.FILL: struct.Struct("<16sdI"),
+}
+
+
+def encode(message_type: MessageType, *fields) -> bytes:
+    return bytes((message_type,)) + MESSAGE_BODIES[message_type].pack(*fields)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[MessageType, tuple]:
+    """Raises ValueError on an unknown message type"""
+    message_type = MessageType((await reader.readexactly(1))[0])
+    body = MESSAGE_BODIES[message_type]
+    return message_type, body.unpack(await reader.readexactly(body.size))
+
+
+def fill_rows(
+    matches: list[tuple] | FillView, order_class: type[Order] | type[CompactOrder]
+) -> Iterator[tuple[str, str, float, int]]:
+    """
+    (buy id, sell id, price, quantity) of each fill, with ids as the gateway
+    sends them and prices in price units, whether or not the MatchEngine
+    writes its fills to a FillSink.
+    """
+    to_price = order_class.to_price
+    if isinstance(matches, FillView):
+        format_id = order_class.format_id
+        for buy_id, sell_id, price, quantity in matches:
+            buy_id, sell_id = format_id(buy_id), format_id(sell_id)
+            yield str(buy_id), str(sell_id), to_price(price), quantity
+    else:
+        for buy, sell, price, quantity in matches:
+            yield str(buy.order_id), str(sell.order_id), to_price(price), quantity
+
+
+def valid_frame(message_type: MessageType, fields: tuple) -> bool:
+    """Whether a client frame can be sequenced, as intake.run_producer checks"""
+    try:
+        if message_type == MessageType.NEW_ORDER:
+            _, side, price, quantity, user_id = fields
+            user_id.rstrip(b"\0").decode()
+            return side in (1, 2) and quantity > 0 and 0 < price < math.inf
+        if message_type == MessageType.CANCEL_ORDER:
+            fields[1].rstrip(b"\0").decode()
+            return True
+    except UnicodeDecodeError:
+        return False
+    return False
+
+
+class OrderGateway:
+    """
+    Asyncio order-entry gateway in front of an OrderProcessor.
+    Client connections only parse frames into the inbox; a single sequencer
+    task drains it in batches, runs them through the processor and writes
+    acknowledgements and fills back without waiting on any client.
+    The inbox holds at most max_inbox frames; while it is full, connections
+    stop reading, so clients feel backpressure through their sockets.
+    Clients whose unsent output exceeds max_write_buffer are disconnected, as
+    are clients sending an unknown message type, after which their stream
+    cannot be framed. Malformed orders and cancels are acked REJECTED, as is
+    a cancel that did not cancel an order of the same connection.
+    """
+
+    def __init__(
+        self,
+        order_processor: OrderProcessor,
+        logger: Logger | None = None,
+        max_batch: int = 1024,
+        max_write_buffer: int = 1 << 20,
+        max_inbox: int = 1 << 16,
+    ) -> None:
+        self.order_processor = order_processor
+        self.logger = logger
+        self.max_batch = max_batch
+        self.max_write_buffer = max_write_buffer
+        self.inbox: asyncio.Queue = asyncio.Queue(maxsize=max_inbox)
+        self.owners: dict[str, asyncio.StreamWriter] = {}
+        self.server: asyncio.AbstractServer | None = None
+        self._sequencer: asyncio.Task | None = None
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 0, path: str | None = None
+    ) -> None:
+        """Listen on a Unix socket when path is given, otherwise on TCP."""
+        if path:
+            self.server = await asyncio.start_unix_server(self._handle_client, path)
+        else:
+            self.server = await asyncio.start_server(self._handle_client, host, port)
+        self._sequencer = asyncio.create_task(self._sequence())
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+        self._sequencer.cancel()
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                message_type, fields = await read_frame(reader)
+                if not valid_frame(message_type, fields):
+                    # Sequenced like any frame, so acks keep the client's order
+                    message_type, fields = None, fields[:1]
+                await self.inbox.put((writer, message_type, fields))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as error:
+            if self.logger:
+                self.logger.warning(f"Disconnecting gateway client: {error}")
+        finally:
+            writer.close()
+
+    async def _sequence(self) -> None:
+        while True:
+            batch = [await self.inbox.get()]
+            while len(batch) < self.max_batch and not self.inbox.empty():
+                batch.append(self.inbox.get_nowait())
+            for writer, message_type, fields in batch:
+                if message_type == MessageType.NEW_ORDER:
+                    self._new_order(writer, *fields)
+                elif message_type == MessageType.CANCEL_ORDER:
+                    self._cancel_order(writer, *fields)
+                else:
+                    self._send(
+                        writer,
+                        encode(
+                            MessageType.ACK, fields[0], OrderStatus.REJECTED.value, b""
+                        ),
+                    )
+            # Let connections read and flush before the next batch
+            await asyncio.sleep(0)
+
+    def _new_order(
+        self,
+        writer: asyncio.StreamWriter,
+        client_sequence: int,
+        side: int,
+        price: float,
+        quantity: int,
+        user_id: bytes,
+    ) -> None:
+        order = self.order_processor.receive_order(
+            user_id.rstrip(b"\0").decode(), OrderSide(side), price, quantity
+        )
+        order_id = str(order.order_id)
+        self.owners[order_id] = writer
+        matches = self.order_processor.process_single_order()
+        self._send(
+            writer,
+            encode(
+                MessageType.ACK, client_sequence, order.status.value, order_id.encode()
+            ),
+        )
+        order_class = self.order_processor.order_class
+        order_map = self.order_processor.order_queue.order_map
+        for buy_id, sell_id, fill_price, fill_quantity in fill_rows(
+            matches, order_class
+        ):
+            for filled_id in (buy_id, sell_id):
+                owner = self.owners.get(filled_id)
+                if owner is None:
+                    continue
+                self._send(
+                    owner,
+                    encode(
+                        MessageType.FILL,
+                        filled_id.encode(),
+                        fill_price,
+                        fill_quantity,
+                    ),
+                )
+                filled = order_map.get(order_class.parse_id(filled_id))
+                # Retention may already have evicted a filled order
+                if filled is None or filled.status == OrderStatus.FILLED:
+                    self.owners.pop(filled_id)
+        if order.status in (OrderStatus.CANCELLED, OrderStatus.REJECTED):
+            self.owners.pop(order_id, None)
+
+    def _cancel_order(
+        self, writer: asyncio.StreamWriter, client_sequence: int, order_id: bytes
+    ) -> None:
+        order_id = order_id.rstrip(b"\0").decode()
+        status = OrderStatus.REJECTED
+        # Only live orders of this connection have it as their owner
+        if self.owners.get(order_id) is writer:
+            order_map = self.order_processor.order_queue.order_map
+            order = order_map.get(order_id)
+            if order is None and order_id.isdigit():
+                # CompactOrder ids are integers
+                order = order_map.get(int(order_id))
+            if order is not None and self.order_processor.cancel_order(
+                order.order_id
+            ):
+                self.owners.pop(order_id)
+                status = OrderStatus.CANCELLED
+        self._send(
+            writer, encode(MessageType.ACK, client_sequence, status.value, b"")
+        )
+
+    def _send(self, writer: asyncio.StreamWriter, frame: bytes) -> None:
+        if writer.is_closing():
+            return
+        writer.write(frame)
+        if writer.transport.get_write_buffer_size() > self.max_write_buffer:
+            if self.logger:
+                self.logger.warning("Disconnecting slow gateway client")
+            writer.close()
+
+
+class GatewayClient:
+    """Test and benchmark client measuring order-to-ack latency in nanoseconds."""
+
+    def __init__(self) -> None:
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        self.sent_at: dict[int, int] = {}
+        self.latencies: list[int] = []
+        self.acks: list[tuple] = []
+        self.fills: list[tuple] = []
+        self._next_sequence = 1
+        self._receiver: asyncio.Task | None = None
+
+    async def connect(
+        self, host: str = "127.0.0.1", port: int = 0, path: str | None = None
+    ) -> None:
+        if path:
+            self.reader, self.writer = await asyncio.open_unix_connection(path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+        self._receiver = asyncio.create_task(self._receive())
+
+    def send_order(
+        self, user_id: str, side: OrderSide, price: float, quantity: int
+    ) -> int:
+        sequence = self._next_frame()
+        self.writer.write(
+            encode(
+                MessageType.NEW_ORDER,
+                sequence,
+                side.value,
+                price,
+                quantity,
+                user_id.encode(),
+            )
+        )
+        return sequence
+
+    def send_cancel(self, order_id: str) -> int:
+        sequence = self._next_frame()
+        self.writer.write(encode(MessageType.CANCEL_ORDER, sequence, order_id.encode()))
+        return sequence
+
+    async def wait_for_acks(self, count: int, timeout: float = 10.0) -> None:
+        await self._wait_for(self.acks, count, timeout)
+
+    async def wait_for_fills(self, count: int, timeout: float = 10.0) -> None:
+        await self._wait_for(self.fills, count, timeout)
+
+    async def close(self) -> None:
+        self._receiver.cancel()
+        self.writer.close()
+        await asyncio.gather(self._receiver, return_exceptions=True)
+
+    @staticmethod
+    async def _wait_for(records: list, count: int, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while len(records) < count and time.monotonic() < deadline:
+            await asyncio.sleep(0.001)
+
+    def _next_frame(self) -> int:
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        self.sent_at[sequence] = time.perf_counter_ns()
+        return sequence
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                message_type, fields = await read_frame(self.reader)
+                if message_type == MessageType.ACK:
+                    sequence, status, order_id = fields
+                    self.latencies.append(
+                        time.perf_counter_ns() - self.sent_at.pop(sequence)
+                    )
+                    self.acks.append(
+                        (sequence, OrderStatus(status), order_id.rstrip(b"\0").decode())
+                    )
+                else:
+                    order_id, price, quantity = fields
+                    order_id = order_id.rstrip(b"\0").decode()
+                    self.fills.append((order_id, price, quantity))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
@@ -0,0 +1,113 @@
+import time
+from multiprocessing import shared_memory
+
+
+class Stat:
+    """Slot indexes of a StatsPage; plain ints index ~3x faster than IntEnum."""
+
+    # Control word: time one in every SAMPLE_EVERY calls, 0 disables timing
+    SAMPLE_EVERY = 0
+    HEAP_PUSHES = 1
+    HEAP_POPS = 2
+    TOMBSTONE_POPS = 3
+    CANCELS_PENDING = 4
+    CANCELS_PROCESSING = 5
+    CANCELS_FAILED = 6
+    AGGRESSORS = 7
+    MATCHES = 8
+    MAX_MATCHES_PER_AGGRESSOR = 9
+    BOOK_DEPTH = 10
+    QUEUE_LENGTH = 11
+    MATCH_ORDERS_CALLS = 12
+    MATCH_ORDERS_SAMPLES = 13
+    MATCH_ORDERS_NS = 14
+    MATCH_ORDERS_MAX_NS = 15
+    GET_NEXT_ORDER_CALLS = 16
+    GET_NEXT_ORDER_SAMPLES = 17
+    GET_NEXT_ORDER_NS = 18
+    GET_NEXT_ORDER_MAX_NS = 19
+    MATCH_INCOMING_ORDER_CALLS = 20
+    MATCH_INCOMING_ORDER_SAMPLES = 21
+    MATCH_INCOMING_ORDER_NS = 22
+    MATCH_INCOMING_ORDER_MAX_NS = 23
+    POP_NEXT_ORDER_CALLS = 24
+    POP_NEXT_ORDER_SAMPLES = 25
+    POP_NEXT_ORDER_NS = 26
+    POP_NEXT_ORDER_MAX_NS = 27
+
+
+STAT_NAMES = sorted(
+    (name for name in vars(Stat) if name.isupper()),
+    key=lambda name: getattr(Stat, name),
+)
+
+
+class Timer:
+    """First of the (calls, samples, total ns, max ns) Stat slots of a timer."""
+
+    MATCH_ORDERS = Stat.MATCH_ORDERS_CALLS
+    GET_NEXT_ORDER = Stat.GET_NEXT_ORDER_CALLS
+    MATCH_INCOMING_ORDER = Stat.MATCH_INCOMING_ORDER_CALLS
+    POP_NEXT_ORDER = Stat.POP_NEXT_ORDER_CALLS
+
+
+class StatsPage:
+    """
+    Counters, gauges and sampled timers in one page of shared memory.
+    Every slot is a single 8-byte store, so another process attached with
+    the same name reads consistent values while the engine keeps running,
+    and can switch sampling on or off through set_sampling.
+    Components take stats=None by default, leaving a single falsy check on
+    the hot path when instrumentation is off.
+    """
+
+    def __init__(self, name: str | None = None, create: bool = True) -> None:
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=create, size=len(STAT_NAMES) * 8
+        )
+        self.slots = self.shm.buf.cast("q")
+        if create:
+            self.reset()
+            self.slots[Stat.SAMPLE_EVERY] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def set_sampling(self, every: int) -> None:
+        """Time one in every `every` calls; 0 turns sampled timing off."""
+        self.slots[Stat.SAMPLE_EVERY] = every
+
+    def start_timer(self, timer: Timer) -> int:
+        """Counts the call; returns a start time if it is sampled, else 0."""
+        slots = self.slots
+        calls = slots[timer] + 1
+        slots[timer] = calls
+        every = slots[Stat.SAMPLE_EVERY]
+        if every and calls % every == 0:
+            return time.perf_counter_ns()
+        return 0
+
+    def stop_timer(self, timer: Timer, started: int) -> None:
+        elapsed = time.perf_counter_ns() - started
+        slots = self.slots
+        slots[timer + 1] += 1
+        slots[timer + 2] += elapsed
+        if elapsed > slots[timer + 3]:
+            slots[timer + 3] = elapsed
+
+    def read(self) -> dict[str, int]:
+        return {name: self.slots[index] for index, name in enumerate(STAT_NAMES)}
+
+    def reset(self) -> None:
+        """Zero every counter, keeping the sampling setting."""
+        for index in range(len(STAT_NAMES)):
+            if index != Stat.SAMPLE_EVERY:
+                self.slots[index] = 0
+
+    def close(self) -> None:
+        self.slots.release()
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
@@ -0,0 +1,199 @@
+import math
+import multiprocessing as mp
+import time
+from enum import IntEnum
+from itertools import chain
+from typing import Iterable
+from src.gateway import MESSAGE_BODIES, MessageType
+from src.order_components import (
+    OrderStatus,
+    OrderType,
+    CompactOrder,
+    IdBlockAllocator,
+    PackedIdGenerator,
+    SEQUENCE_MASK,
+    SIDES_BY_VALUE,
+)
+from src.order_processor import OrderProcessor
+from src.ring_buffer import SharedRingBuffer
+
+
+class IntakeRecord(IntEnum):
+    NEW_ORDER = 1
+    INVALID = 2
+    END = 3
+
+
+# kind, order id, side, price in ticks, quantity, timestamp, user id.
+# END records carry the producer's backpressure stalls in quantity.
+INTAKE_FORMAT = "<BqBdqq16s"
+
+NEW_ORDER_BODY = MESSAGE_BODIES[MessageType.NEW_ORDER]
+
+
+def run_producer(
+    frames: list[bytes],
+    ring_name: str,
+    ring_capacity: int,
+    session: int,
+    allocator: IdBlockAllocator,
+    tick_size: float,
+) -> None:
+    """
+    Parse and validate gateway NEW_ORDER bodies and build the Order fields,
+    ids included, handing them to the matcher through this producer's ring.
+    Sequence numbers come from the pipeline's shared allocator.
+    Waits while the ring is full.
+    """
+    ring = SharedRingBuffer(INTAKE_FORMAT, ring_capacity, name=ring_name, create=False)
+    CompactOrder.set_tick_size(tick_size)
+    generate_id = PackedIdGenerator(session=session, allocator=allocator).generate_id
+    to_ticks = CompactOrder.to_ticks
+    monotonic_ns = time.monotonic_ns
+    put = ring.put
+    stalls = 0
+
+    for frame in frames:
+        _, side, price, quantity, user_id = NEW_ORDER_BODY.unpack(frame)
+        if side not in (1, 2) or quantity <= 0 or not 0 < price < math.inf:
+            record = (IntakeRecord.INVALID, 0, side, 0.0, 0, 0, user_id)
+        else:
+            record = (
+                IntakeRecord.NEW_ORDER,
+                generate_id(),
+                side,
+                to_ticks(price),
+                quantity,
+                monotonic_ns(),
+                user_id,
+            )
+        while not put(*record):
+            stalls += 1
+            time.sleep(0)
+    while not put(IntakeRecord.END, 0, 0, 0.0, stalls, 0, b""):
+        time.sleep(0)
+    ring.close()
+
+
+class IntakePipeline:
+    """
+    Order intake split over producer processes feeding one matching loop.
+    Each producer parses, validates and prepares orders from its source of
+    gateway NEW_ORDER bodies and hands them over through its own
+    SharedRingBuffer, a single-producer single-consumer ring that makes it
+    wait when full. run() is the only writer of the book: it drains the rings
+    in turn, submits each Order to the OrderProcessor and matches it, so
+    processing stays strictly sequenced in the order run() saw them.
+    Producer ids are packed with session = producer number + 1, leaving
+    session 0 to orders received directly; the processor must therefore
+    build CompactOrder. Their sequence numbers come from one shared
+    IdBlockAllocator per pipeline, advanced past the ids already in the book,
+    so neither a later start() nor a restored book sees an id twice.
+    """
+
+    def __init__(
+        self, order_processor: OrderProcessor, ring_capacity: int = 1 << 14
+    ) -> None:
+        if not issubclass(order_processor.order_class, CompactOrder):
+            raise ValueError("IntakePipeline needs an integer-id CompactOrder class")
+        self.order_processor = order_processor
+        self.ring_capacity = ring_capacity
+        self.allocator = IdBlockAllocator(shared=True)
+        order_queue = order_processor.order_queue
+        self.advance_past(
+            chain(
+                order_queue.order_map,
+                (order.order_id for order in order_queue.filled_orders),
+            )
+        )
+        self.rings: list[SharedRingBuffer] = []
+        self.producers: list[mp.Process] = []
+        self.submitted = 0
+        self.invalid = 0
+        self.stalls = 0
+
+    def start(self, sources: list[list[bytes]]) -> None:
+        """Start one producer process per source"""
+        for session, frames in enumerate(sources, start=1):
+            ring = SharedRingBuffer(INTAKE_FORMAT, self.ring_capacity)
+            producer = mp.Process(
+                target=run_producer,
+                args=(
+                    frames,
+                    ring.name,
+                    self.ring_capacity,
+                    session,
+                    self.allocator,
+                    self.order_processor.order_class.tick_size,
+                ),
+                daemon=True,
+            )
+            producer.start()
+            self.rings.append(ring)
+            self.producers.append(producer)
+
+    def advance_past(self, order_ids: Iterable[int]) -> None:
+        """Never hand out the sequence of any of order_ids, e.g. restored ones"""
+        last = max((order_id & SEQUENCE_MASK for order_id in order_ids), default=0)
+        if last:
+            self.allocator.advance_past(last)
+
+    def run(self) -> int:
+        """Match until every producer has finished; returns the orders submitted"""
+        order_processor = self.order_processor
+        queue = order_processor.order_queue.queue
+        restore = order_processor.order_class.restore
+        submit_order = order_processor.submit_order
+        process_single_order = order_processor.process_single_order
+        sides = SIDES_BY_VALUE
+        pending, limit = OrderStatus.PENDING, OrderType.LIMIT
+        producers = dict(zip(self.rings, self.producers))
+        active = list(self.rings)
+        submitted = 0
+
+        while active:
+            drained = False
+            for ring in list(active):
+                for kind, order_id, side, price, quantity, timestamp, user_id in (
+                    ring.drain()
+                ):
+                    drained = True
+                    if kind == IntakeRecord.NEW_ORDER:
+                        submit_order(
+                            restore(
+                                order_id,
+                                user_id.rstrip(b"\0").decode(),
+                                sides[side],
+                                price,
+                                quantity,
+                                pending,
+                                timestamp,
+                                "",
+                                limit,
+                            )
+                        )
+                        submitted += 1
+                    elif kind == IntakeRecord.INVALID:
+                        self.invalid += 1
+                    else:
+                        self.stalls += quantity
+                        active.remove(ring)
+                while queue:
+                    process_single_order()
+            if not drained:
+                # A producer that died without its END record leaves for good;
+                # one that exited normally has its END still in the ring
+                for ring in list(active):
+                    if not producers[ring].is_alive() and not len(ring):
+                        active.remove(ring)
+                time.sleep(0)
+        self.submitted += submitted
+        return submitted
+
+    def close(self) -> None:
+        for producer in self.producers:
+            producer.join()
+        for ring in self.rings:
+            ring.close()
+            ring.unlink()
+        self.producers, self.rings = [], []
@@ -0,0 +1,299 @@
+import mmap
+import os
+import struct
+import time
+from enum import Enum, IntEnum
+from src.order_components import (
+    OrderSide,
+    OrderStatus,
+    OrderType,
+    Order,
+    CompactOrder,
+    SIDES_BY_VALUE,
+)
+
+
+class JournalEvent(IntEnum):
+    NEW_ORDER = 1
+    PROCESS_ORDER = 2
+    REST_ORDER = 3
+    CANCEL_ORDER = 4
+    FILL = 5
+    EXPIRE_ORDER = 6
+    AMEND_ORDER = 7
+
+
+class FsyncPolicy(Enum):
+    EVERY_EVENT = 1
+    INTERVAL = 2
+    NEVER = 3
+
+
+# sequence, event, side, order id (buy id for fills), user id (sell id for fills),
+# symbol, price, quantity, timestamp. New orders carry their OrderType in the
+# high nibble of the side byte, so older records read back as LIMIT.
+RECORD = struct.Struct("<QBB16s16s16sdqq")
+
+
+class EventJournal:
+    """
+    Sequenced, append-only binary journal of order-entry, cancel and fill events.
+    Records are batched in memory and written once batch_size is reached.
+    fsync_policy decides how often the file is synced to disk: after every event,
+    once fsync_interval_ms has elapsed since the last sync, or never.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fsync_policy: FsyncPolicy = FsyncPolicy.INTERVAL,
+        fsync_interval_ms: int = 10,
+        batch_size: int = 1024,
+    ) -> None:
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.fsync_interval_ns = fsync_interval_ms * 1_000_000
+        self.batch_size = batch_size
+        self.file = open(path, "ab")
+        self.sequence = os.path.getsize(path) // RECORD.size
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._last_sync = time.monotonic_ns()
+
+    def record_new_order(self, order: Order | CompactOrder) -> None:
+        self._append(
+            JournalEvent.NEW_ORDER,
+            order.side.value | order.order_type.value << 4,
+            str(order.order_id).encode(),
+            str(order.user_id).encode(),
+            order.symbol.encode(),
+            order.price,
+            order.quantity,
+            order.encode_timestamp(order.timestamp),
+        )
+
+    def record_process_order(self, order: Order | CompactOrder) -> None:
+        self._append_order_event(JournalEvent.PROCESS_ORDER, order.order_id)
+
+    def record_rest_order(self, order: Order | CompactOrder) -> None:
+        self._append_order_event(JournalEvent.REST_ORDER, order.order_id)
+
+    def record_cancel_order(self, order_id: str | int) -> None:
+        self._append_order_event(JournalEvent.CANCEL_ORDER, order_id)
+
+    def record_expire_order(self, order_id: str | int) -> None:
+        self._append_order_event(JournalEvent.EXPIRE_ORDER, order_id)
+
+    def record_amend_order(self, order: Order | CompactOrder) -> None:
+        self._append(
+            JournalEvent.AMEND_ORDER,
+            0,
+            str(order.order_id).encode(),
+            b"",
+            b"",
+            order.price,
+            order.quantity,
+            0,
+        )
+
+    def record_fill(
+        self,
+        buy_order: Order | CompactOrder,
+        sell_order: Order | CompactOrder,
+        price: float,
+        quantity: int,
+    ) -> None:
+        self.record_fill_ids(buy_order.order_id, sell_order.order_id, price, quantity)
+
+    def record_fill_ids(
+        self, buy_id: str | int, sell_id: str | int, price: float, quantity: int
+    ) -> None:
+        self._append(
+            JournalEvent.FILL,
+            0,
+            str(buy_id).encode(),
+            str(sell_id).encode(),
+            b"",
+            price,
+            quantity,
+            0,
+        )
+
+    def flush(self, sync: bool = False) -> None:
+        if self._buffer:
+            self.file.write(self._buffer)
+            self.file.flush()
+            self._buffer.clear()
+            self._buffered = 0
+        if sync:
+            os.fsync(self.file.fileno())
+            self._last_sync = time.monotonic_ns()
+
+    def close(self) -> None:
+        self.flush(sync=self.fsync_policy != FsyncPolicy.NEVER)
+        self.file.close()
+
+    def __enter__(self) -> "EventJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _append_order_event(self, event: JournalEvent, order_id: str | int) -> None:
+        self._append(event, 0, str(order_id).encode(), b"", b"", 0, 0, 0)
+
+    def _append(self, *fields) -> None:
+        self._buffer += RECORD.pack(self.sequence, *fields)
+        self.sequence += 1
+        self._buffered += 1
+
+        if self.fsync_policy == FsyncPolicy.EVERY_EVENT:
+            self.flush(sync=True)
+        elif (
+            self.fsync_policy == FsyncPolicy.INTERVAL
+            and time.monotonic_ns() - self._last_sync >= self.fsync_interval_ns
+        ):
+            self.flush(sync=True)
+        elif self._buffered >= self.batch_size:
+            self.flush()
+
+
+def read_journal(path: str, from_sequence: int = 0):
+    """Yields raw journal records from a memory-mapped view of the file."""
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        usable = size - size % RECORD.size
+        if usable <= from_sequence * RECORD.size:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            data = memoryview(view)[from_sequence * RECORD.size : usable]
+            try:
+                yield from RECORD.iter_unpack(data)
+            finally:
+                data.release()
+
+
+def replay_journal(
+    path: str,
+    order_queue,
+    order_class: type[Order] | type[CompactOrder] = Order,
+    from_sequence: int = 0,
+) -> int:
+    """
+    Rebuilds order_queue by re-applying every journaled event in sequence.
+    order_queue must be configured like the one that wrote the journal.
+    Returns the number of events replayed.
+    """
+    order_map = order_queue.order_map
+    # Orders already in the book, e.g. restored from a snapshot
+    resting = {
+        order_id
+        for order_id, order in order_map.items()
+        if order.status != OrderStatus.PENDING
+    }
+    parse_id = order_class.parse_id
+    decode_timestamp = order_class.decode_timestamp
+    restore = order_class.restore
+    get_best_buy = order_queue.get_best_buy_order
+    get_best_sell = order_queue.get_best_sell_order
+    sides = SIDES_BY_VALUE
+    # Prices are journaled as doubles in the order class's units; CompactOrder
+    # keeps int ticks
+    journaled_price = int if issubclass(order_class, CompactOrder) else float
+    order_types = {order_type.value: order_type for order_type in OrderType}
+    journal, order_queue.journal = order_queue.journal, None
+    # Plain ints compare much faster than IntEnum members in the hot loop
+    (
+        new_order,
+        process_order,
+        rest_order,
+        cancel_order,
+        fill,
+        expire_order,
+        amend_order,
+    ) = (event.value for event in JournalEvent)
+    last_id = None
+    count = 0
+
+    def remove_resting(order):
+        if order.side == OrderSide.BUY:
+            best, remove_best = get_best_buy(), order_queue.remove_best_buy_order
+        else:
+            best, remove_best = get_best_sell(), order_queue.remove_best_sell_order
+        if best is order:
+            remove_best()
+        else:
+            # Fills only happen at the top of the book; search the book should
+            # it still have diverged from the journal
+            order_queue._discard_from_orderbook(order)
+            order_queue.orderbook_size -= 1
+
+    # Fills are journaled after the match that expired or, under self-trade
+    # prevention, cancelled an order's remainder, which already released its
+    # exposure
+    expired = {}
+    risk = order_queue.risk
+
+    def apply_fill(order_id, quantity):
+        order = order_map.get(order_id)
+        if order is None:
+            expired[order_id].quantity -= quantity
+            return
+        order.quantity -= quantity
+        order.status = OrderStatus.PARTIALLY_FILLED
+        if risk:
+            risk.fill(order, quantity)
+        is_resting = order.order_id in resting
+        if is_resting:
+            order_queue.depth(order.side).remove(order.price, quantity)
+        if order.quantity == 0:
+            order.status = OrderStatus.FILLED
+            if is_resting:
+                resting.discard(order.order_id)
+                remove_resting(order)
+            order_queue.add_filled_order(order)
+
+    try:
+        for record in read_journal(path, from_sequence):
+            _, event, side, order_id, other_id, symbol, price, quantity, ts = record
+            order_id = parse_id(order_id.rstrip(b"\0").decode())
+            count += 1
+            if event == new_order:
+                order = restore(
+                    order_id,
+                    other_id.rstrip(b"\0").decode(),
+                    sides[side & 0xF],
+                    price,
+                    quantity,
+                    OrderStatus.PENDING,
+                    decode_timestamp(ts),
+                    symbol.rstrip(b"\0").decode(),
+                    order_types[side >> 4],
+                )
+                order_queue.add_order(order)
+                last_id = order_id
+            elif event == process_order:
+                order_queue.pop_next_order()
+            elif event == rest_order:
+                order_queue.update_orderbooks(order_map[order_id])
+                resting.add(order_id)
+            elif event == cancel_order:
+                order = order_map.get(order_id)
+                if order_queue.cancel_order(order_id):
+                    expired[order_id] = order
+                resting.discard(order_id)
+            elif event == fill:
+                sell_id = parse_id(other_id.rstrip(b"\0").decode())
+                apply_fill(order_id, quantity)
+                apply_fill(sell_id, quantity)
+            elif event == expire_order:
+                order = expired[order_id] = order_map[order_id]
+                order_queue.expire_order(order)
+            elif event == amend_order:
+                order_queue.amend_order(order_id, quantity, journaled_price(price))
+    finally:
+        order_queue.journal = journal
+
+    if last_id is not None:
+        order_class.id_generator.advance_past(last_id)
+    return count
@@ -1,4 +1,9 @@
 import logging.config
+import multiprocessing as mp
+import os
+import time
+from enum import IntEnum
+from src.ring_buffer import SharedRingBuffer
 
 
 class Logger:
@@ -43,6 +48,225 @@ LOGGING_CONFIG = {
 }
 
 
+class LogEvent(IntEnum):
+    TEXT = 0
+    ORDER_RECEIVED = 1
+    PROCESSING_ORDER = 2
+    BEFORE_MATCHING = 3
+    MATCHED = 4
+    PROCESSING_SUMMARY = 5
+    ORDER_CANCELLED = 6
+    ORDER_EXPIRED = 7
+    ORDER_AMENDED = 8
+    ORDER_REJECTED = 9
+
+
+# Fields: order id {0}, other order id {1}, price {2}, counters {3}-{6}
+LOG_TEMPLATES = {
+    LogEvent.ORDER_RECEIVED: "Order received: {0}, Orders (Total, Pending) ({3}, {4})",
+    LogEvent.PROCESSING_ORDER: "Processing order: {0}",
+    LogEvent.BEFORE_MATCHING: (
+        "-- Before matching - Orders (Total, Remaining): ({3}, {4})"
+    ),
+    LogEvent.MATCHED: "-- Matched: Buy {0} Sell {1} for {3} units at ${2:.2f}",
+    LogEvent.PROCESSING_SUMMARY: (
+        "-- Orders (Total, Remaining, Filled, Transactions): ({3}, {4}, {5}, {6})"
+    ),
+    LogEvent.ORDER_CANCELLED: "Order cancelled: {0}",
+    LogEvent.ORDER_EXPIRED: "Order expired: {0}, unfilled {3}",
+    LogEvent.ORDER_AMENDED: "Order amended: {0}, price {2}, quantity {3}",
+    LogEvent.ORDER_REJECTED: "Order rejected: {0}, reason {3}",
+}
+
+# event, level, wall-clock ns, order id, other order id, price, four counters.
+# TEXT records carry 32 bytes of message in the id fields; counter 0 is set
+# while more chunks follow.
+LOG_RECORD_FORMAT = "<BBq16s16sdqqqq"
+TEXT_CHUNK = 32
+
+
+def run_log_writer(
+    ring_name: str,
+    capacity: int,
+    name: str,
+    log_config: dict,
+    file_name: str | None,
+    stop: mp.Event,
+    flush_interval: float,
+    niceness: int,
+) -> None:
+    """Writer process: formats ring records and emits them through a Logger."""
+    if niceness and hasattr(os, "nice"):
+        # Leave the CPU to the matching process when they share a core
+        os.nice(niceness)
+    ring = SharedRingBuffer(LOG_RECORD_FORMAT, capacity, name=ring_name, create=False)
+    logger = Logger(name, log_config, file_name).logger
+    templates = {event.value: template for event, template in LOG_TEMPLATES.items()}
+    text = []
+
+    while True:
+        # Everything published before stop was set is drained below
+        stopping = stop.is_set()
+        records = ring.drain()
+        for event, level, ns, order_id, other_id, price, *counters in records:
+            if event == LogEvent.TEXT:
+                text.append(order_id + other_id)
+                if counters[0]:
+                    continue
+                message = b"".join(text).rstrip(b"\0").decode()
+                text.clear()
+            else:
+                message = templates[event].format(
+                    order_id.rstrip(b"\0").decode(),
+                    other_id.rstrip(b"\0").decode(),
+                    price,
+                    *counters,
+                )
+            record = logger.makeRecord(name, level, "", 0, message, None, None)
+            # Stamp the record with the time of the event, not of the write
+            record.created = ns / 1e9
+            record.msecs = ns // 1_000_000 % 1000
+            logger.handle(record)
+        if stopping:
+            break
+        if not records:
+            time.sleep(flush_interval)
+    ring.close()
+
+
+class AsyncLogger:
+    """
+    Stands in for the logging.Logger handed to the engine components.
+    log_event packs a fixed-layout record into a preallocated SharedRingBuffer;
+    a writer process formats the records and emits them through a Logger built
+    from the same log_config, so no formatting or file I/O happens on the hot
+    path. The producer waits for space rather than drop audit records, so
+    capacity should absorb the largest expected burst.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        log_config: dict,
+        file_name: str | None,
+        capacity: int = 1 << 16,
+        flush_interval_ms: int = 5,
+        writer_niceness: int = 10,
+    ) -> None:
+        self.ring = SharedRingBuffer(LOG_RECORD_FORMAT, capacity)
+        self.stalls = 0
+        self._stop = mp.Event()
+        self.writer = mp.Process(
+            target=run_log_writer,
+            args=(
+                self.ring.name,
+                capacity,
+                name,
+                log_config,
+                file_name,
+                self._stop,
+                flush_interval_ms / 1000,
+                writer_niceness,
+            ),
+            daemon=True,
+        )
+        self.writer.start()
+
+    def log_event(
+        self,
+        event: LogEvent,
+        order_id: str | int = "",
+        other_id: str | int = "",
+        price: float = 0.0,
+        first: int = 0,
+        second: int = 0,
+        third: int = 0,
+        fourth: int = 0,
+        level: int = logging.INFO,
+    ) -> None:
+        # Inlined rather than through _put: this runs for every engine event
+        while not self.ring.put(
+            event,
+            level,
+            time.time_ns(),
+            str(order_id).encode(),
+            str(other_id).encode(),
+            price,
+            first,
+            second,
+            third,
+            fourth,
+        ):
+            self.stalls += 1
+            time.sleep(0)
+
+    def log(self, level: int, message: str) -> None:
+        data = message.encode()
+        now = time.time_ns()
+        for start in range(0, max(len(data), 1), TEXT_CHUNK):
+            chunk = data[start : start + TEXT_CHUNK]
+            more = start + TEXT_CHUNK < len(data)
+            self._put(
+                LogEvent.TEXT, level, now, chunk[:16], chunk[16:], 0.0, more, 0, 0, 0
+            )
+
+    def info(self, message: str) -> None:
+        self.log(logging.INFO, message)
+
+    def warning(self, message: str) -> None:
+        self.log(logging.WARNING, message)
+
+    def error(self, message: str) -> None:
+        self.log(logging.ERROR, message)
+
+    def close(self) -> None:
+        """Write out every pending record and stop the writer process."""
+        self._stop.set()
+        self.writer.join()
+        self.ring.close()
+        self.ring.unlink()
+
+    def __enter__(self) -> "AsyncLogger":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _put(self, *fields) -> None:
+        while not self.ring.put(*fields):
+            self.stalls += 1
+            time.sleep(0)
+
+
+def log_event(
+    logger: "logging.Logger | AsyncLogger",
+    event: LogEvent,
+    order_id: str | int = "",
+    other_id: str | int = "",
+    price: float = 0.0,
+    first: int = 0,
+    second: int = 0,
+    third: int = 0,
+    fourth: int = 0,
+    level: int = logging.INFO,
+) -> None:
+    """
+    Emits event through either kind of engine logger: an AsyncLogger packs it
+    for its writer process, a logging.Logger gets its LOG_TEMPLATES text.
+    """
+    if isinstance(logger, AsyncLogger):
+        logger.log_event(
+            event, order_id, other_id, price, first, second, third, fourth, level
+        )
+    else:
+        logger.log(
+            level,
+            LOG_TEMPLATES[event].format(
+                order_id, other_id, price, first, second, third, fourth
+            ),
+        )
+
+
 if __name__ == "__main__":
     # log_file_name = os.path.join(
     #     Config.WORKING_DIRECTORY,
@@ -1,10 +1,21 @@
+import asyncio
+import copy
+import os
 import random
+import tempfile
 import time
-from src.order_components import OrderSide
+import tracemalloc
+from array import array
+from src.order_components import OrderSide, Order, CompactOrder
 from src.order_queue import OrderQueue
 from src.order_processor import OrderProcessor
+from src.columnar import write_order_file
 from src.match_engine import MatchEngine
-from src.logger import Logger, LOGGING_CONFIG
+from src.shard_router import ShardRouter
+from src.gateway import OrderGateway, GatewayClient, MESSAGE_BODIES, MessageType
+from src.intake import IntakePipeline
+from src.simulator import OrderFlow, Simulator
+from src.logger import Logger, AsyncLogger, LOGGING_CONFIG
 
 
 def create_random_order() -> tuple[str, OrderSide, float, int]:
@@ -15,18 +26,26 @@ def create_random_order() -> tuple[str, OrderSide, float, int]:
     return user_id, side, price, quantity
 
 
-def simulate_trading(op: OrderProcessor, oq: OrderQueue, duration: int):
-    end_time = time.time() + duration
-    while time.time() < end_time:
-        # Simulate order creation
-        if random.random() < 0.7:
-            op.receive_order(*create_random_order())
+def create_random_symbol_order(
+    symbols: list[str],
+) -> tuple[str, str, OrderSide, float, int]:
+    return random.choice(symbols), *create_random_order()
 
-        # Process a single order
-        op.process_single_order()
 
-        # Simulate time passing
-        time.sleep(random.uniform(0.1, 2.0))
+def simulate_trading(op: OrderProcessor, oq: OrderQueue, duration: int, seed: int = 0):
+    """Simulate duration seconds of seeded order flow on a virtual clock"""
+    simulator = Simulator(op)
+    t0 = time.perf_counter()
+    events = simulator.run(OrderFlow(seed=seed).events(duration))
+    elapsed = time.perf_counter() - t0
+    print(
+        f"Simulated {duration} s with {events} events in {elapsed:.2f} s "
+        f"({events / elapsed:.0f} events/s): {simulator.submitted} orders, "
+        f"{simulator.cancelled} cancels, {simulator.fills} fills, "
+        f"digest {simulator.digest()}"
+    )
+    if not op.logger:
+        return
 
     # Log final statistics
     op.logger.info("Simulation completed. Final orderbook state:")
@@ -34,17 +53,14 @@ def simulate_trading(op: OrderProcessor, oq: OrderQueue, duration: int):
     op.logger.info(f"Transactions: {op.transactions}")
     op.logger.info(f"Pending orders: {len(op.order_queue.queue)}")
 
-    # Log remaining buy orders
-    op.logger.info("Remaining buy orders:")
-    for orders in sorted(oq.buy_orders.values()):
-        for order in orders:
-            op.logger.info(f"{order.__dict__}")
+    # Log remaining depth per price level, best first
+    op.logger.info("Remaining buy levels:")
+    for price, quantity in oq.buy_depth.levels():
+        op.logger.info(f"{price}: {quantity}")
 
-    # Log remaining sell orders
-    op.logger.info("Remaining sell orders:")
-    for orders in sorted(oq.sell_orders.values()):
-        for order in orders:
-            op.logger.info(f"{order.__dict__}")
+    op.logger.info("Remaining sell levels:")
+    for price, quantity in oq.sell_depth.levels():
+        op.logger.info(f"{price}: {quantity}")
 
     op.logger.info(f"{oq.queue = }")
     op.logger.info("Filled orders:")
@@ -69,21 +85,216 @@ def run_matches_from_given_orders(op: OrderProcessor, orders: int):
     print(f"Matching {orders:,} orders took {t2 - t1}")
 
 
+def run_bulk_matches_from_file(op: OrderProcessor, orders: int):
+    print("Run bulk-loaded orders started..")
+    user_ids, sides, prices, quantities = [], array("b"), array("d"), array("q")
+    for _ in range(orders):
+        user_id, side, price, quantity = create_random_order()
+        user_ids.append(user_id)
+        sides.append(side.value)
+        prices.append(price)
+        quantities.append(quantity)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "orders")
+        write_order_file(path, user_ids, sides, prices, quantities)
+        t0 = time.time()
+        op.load_orders(path)
+        t1 = time.time()
+    print(f"Loading {orders:,} orders from file took {t1 - t0}")
+
+    op.process_orders()
+    t2 = time.time()
+    print(f"Matching {orders:,} orders took {t2 - t1}")
+
+
+def run_auction_from_given_orders(op: OrderProcessor, orders: int):
+    print("Run auction started..")
+    t0 = time.time()
+    for _ in range(orders):
+        op.receive_order(*create_random_order())
+    t1 = time.time()
+    print(f"Adding {orders:,} orders took {t1 - t0}")
+
+    clearing_price = op.process_auction()
+    t2 = time.time()
+    print(f"Uncrossing {orders:,} orders at {clearing_price} took {t2 - t1}")
+
+
+def run_multi_symbol_matches(num_shards: int, symbols: int, orders: int):
+    print(f"Run {symbols:,} symbols on {num_shards} shards started..")
+    symbol_names = [f"SYM{i}" for i in range(symbols)]
+    router = ShardRouter(num_shards)
+    router.start()
+    t0 = time.time()
+    for _ in range(orders):
+        router.submit_order(*create_random_symbol_order(symbol_names))
+    results = router.stop()
+    t1 = time.time()
+    print(
+        f"Matching {orders:,} orders took {t1 - t0} ({len(results):,} results, "
+        f"{orders / (t1 - t0):,.0f} orders/s)"
+    )
+
+
+async def run_gateway_latency(clients: int, orders_per_client: int):
+    print(f"Run gateway with {clients:,} clients started..")
+    gateway = OrderGateway(OrderProcessor(OrderQueue(), MatchEngine()))
+    await gateway.start()
+    host, port = gateway.address[:2]
+    connections = [GatewayClient() for _ in range(clients)]
+    for client in connections:
+        await client.connect(host, port)
+
+    t0 = time.time()
+    for _ in range(orders_per_client):
+        for client in connections:
+            client.send_order(*create_random_order())
+        await asyncio.sleep(0)
+    for client in connections:
+        await client.wait_for_acks(orders_per_client)
+    t1 = time.time()
+
+    latencies = sorted(
+        latency for client in connections for latency in client.latencies
+    )
+    p50 = latencies[len(latencies) // 2] / 1_000
+    p99 = latencies[int(len(latencies) * 0.99)] / 1_000
+    print(
+        f"{len(latencies):,} orders took {t1 - t0}, "
+        f"order-to-ack p50 {p50:.0f}us p99 {p99:.0f}us"
+    )
+    for client in connections:
+        await client.close()
+    await gateway.stop()
+
+
+def run_pipelined_intake(producers: int, orders: int):
+    """
+    Intake plus matching throughput from gateway NEW_ORDER bodies, on the
+    caller's thread and through an IntakePipeline with producer processes.
+    """
+    random.seed(0)
+    body = MESSAGE_BODIES[MessageType.NEW_ORDER]
+    frames = []
+    for sequence in range(orders):
+        user_id, side, price, quantity = create_random_order()
+        frames.append(
+            body.pack(sequence, side.value, price, quantity, user_id.encode())
+        )
+
+    CompactOrder.reset_id_generator()
+    op = OrderProcessor(OrderQueue(), MatchEngine(), order_class=CompactOrder)
+    t0 = time.time()
+    for frame in frames:
+        _, side, price, quantity, user_id = body.unpack(frame)
+        op.receive_order(
+            user_id.rstrip(b"\0").decode(), OrderSide(side), price, quantity
+        )
+        op.process_single_order()
+    t1 = time.time()
+    print(f"Direct intake of {orders:,} orders: {orders / (t1 - t0):,.0f} orders/s")
+
+    op = OrderProcessor(OrderQueue(), MatchEngine(), order_class=CompactOrder)
+    pipeline = IntakePipeline(op)
+    t0 = time.time()
+    pipeline.start([frames[index::producers] for index in range(producers)])
+    pipeline.run()
+    t1 = time.time()
+    pipeline.close()
+    print(
+        f"Pipelined intake with {producers} producers: "
+        f"{orders / (t1 - t0):,.0f} orders/s, {pipeline.stalls:,} producer stalls"
+    )
+
+
+def run_orderbook_heap_operations(
+    order_class: type[Order] | type[CompactOrder], orders: int
+):
+    """Time resting orders on, then removing them from, the heap order books."""
+    random.seed(0)
+    oq = OrderQueue()
+    given_orders = [order_class(*create_random_order()) for _ in range(orders)]
+    t0 = time.time()
+    for order in given_orders:
+        oq.update_orderbooks(order)
+    t1 = time.time()
+    while oq.remove_best_buy_order() or oq.remove_best_sell_order():
+        pass
+    t2 = time.time()
+    print(f"Pushing {orders:,} orders onto the heaps took {t1 - t0}")
+    print(f"Popping {orders:,} orders off the heaps took {t2 - t1}")
+
+
+def run_logging_overhead(orders: int):
+    """Matching throughput without a logger, with Logger and with AsyncLogger."""
+    random.seed(0)
+    given_orders = [create_random_order() for _ in range(orders)]
+    loggers = {
+        "no logger": lambda: None,
+        "Logger": lambda: Logger(
+            "sync_logger", copy.deepcopy(LOGGING_CONFIG), "sync.log"
+        ).logger,
+        "AsyncLogger": lambda: AsyncLogger(
+            "async_logger", copy.deepcopy(LOGGING_CONFIG), "async.log"
+        ),
+    }
+    for name, create_logger in loggers.items():
+        logger = create_logger()
+        op = OrderProcessor(OrderQueue(logger), MatchEngine(logger), logger)
+        t0 = time.time()
+        for order in given_orders:
+            op.receive_order(*order)
+        op.process_orders()
+        t1 = time.time()
+        print(f"Matching {orders:,} orders with {name} took {t1 - t0}")
+        if isinstance(logger, AsyncLogger):
+            logger.close()
+
+
+def measure_order_memory(order_class: type[Order] | type[CompactOrder], orders: int):
+    """Bytes held per order, including the arguments it was created from."""
+    tracemalloc.start()
+    created = [order_class(*create_random_order()) for _ in range(orders)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{order_class.__name__} takes {current / len(created):.1f} bytes per order")
+
+
 def main():
     # logger = Logger(__name__, LOGGING_CONFIG, "test.log").logger
 
-    oq = OrderQueue(logger=None)
-    me = MatchEngine(logger=None)
-    op = OrderProcessor(oq, me, logger=None)
-
-    # Simulate trading for n seconds
-    # simulate_trading(op, oq, duration=10)
-    run_matches_from_given_orders(op, 10)
-    run_matches_from_given_orders(op, 100)
-    run_matches_from_given_orders(op, 1_000)
-    run_matches_from_given_orders(op, 10_000)
-    run_matches_from_given_orders(op, 100_000)
-    run_matches_from_given_orders(op, 1_000_000)
+    for order_class in (Order, CompactOrder):
+        print(f"Order class: {order_class.__name__}")
+        measure_order_memory(order_class, 100_000)
+        run_orderbook_heap_operations(order_class, 1_000_000)
+
+        oq = OrderQueue(logger=None)
+        me = MatchEngine(logger=None)
+        op = OrderProcessor(oq, me, logger=None, order_class=order_class)
+
+        # Simulate an hour of trading on a virtual clock
+        oq_sim = OrderQueue(logger=None, lazy_cancel=True)
+        op_sim = OrderProcessor(oq_sim, me, logger=None, order_class=order_class)
+        simulate_trading(op_sim, oq_sim, duration=3600)
+
+        run_matches_from_given_orders(op, 10)
+        run_matches_from_given_orders(op, 100)
+        run_matches_from_given_orders(op, 1_000)
+        run_matches_from_given_orders(op, 10_000)
+        run_matches_from_given_orders(op, 100_000)
+        run_matches_from_given_orders(op, 1_000_000)
+        run_bulk_matches_from_file(op, 1_000_000)
+        run_auction_from_given_orders(op, 1_000_000)
+
+    run_logging_overhead(100_000)
+
+    asyncio.run(run_gateway_latency(clients=2_000, orders_per_client=50))
+
+    for num_shards in (1, 2, 4, 8):
+        run_multi_symbol_matches(num_shards, symbols=1_000, orders=1_000_000)
+
+    for producers in (1, 2, 4):
+        run_pipelined_intake(producers, orders=1_000_000)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+from enum import IntEnum
+from src.order_components import OrderSide
+from src.order_queue import OrderQueue
+from src.ring_buffer import SharedRingBuffer
+
+
+class MarketDataEvent(IntEnum):
+    SNAPSHOT = 0
+    LEVEL = 1
+    TOP = 2
+
+
+# sequence, event, side, price, quantity, ask price, ask quantity.
+# LEVEL: an L2 level of side now holding quantity, 0 once it is gone.
+# TOP: best bid in price/quantity and best ask in the ask fields (0 when empty).
+# SNAPSHOT: the next quantity LEVEL records replace the whole book.
+RECORD_FORMAT = "QBBdqdq"
+
+EMPTY_TOP = (0.0, 0, 0.0, 0)
+
+
+class Subscription:
+    """Publisher-side state of one subscriber: its ring and conflated backlog"""
+
+    def __init__(self, ring: SharedRingBuffer, conflate_every: int) -> None:
+        self.ring = ring
+        self.conflate_every = conflate_every
+        self.levels: dict[tuple[int, float], int] = {}
+        self.top: tuple | None = None
+        self.needs_snapshot = True
+
+
+class MarketDataPublisher:
+    """
+    Publishes the book of an OrderQueue as sequenced L2 level deltas, L1 top of
+    book and full snapshots, over one SharedRingBuffer per subscriber.
+    Attaching turns on change tracking in the queue's DepthIndex, so a publish
+    reads only the levels touched since the previous one; the heaps are never
+    scanned.
+    Updates a subscriber has no room for, or that arrive between its
+    conflate_every publishes, are conflated to the latest quantity per level.
+    A backlog that could never fit its ring is replaced by a snapshot.
+    """
+
+    def __init__(self, order_queue: OrderQueue, snapshot_every: int = 0) -> None:
+        self.order_queue = order_queue
+        self.snapshot_every = snapshot_every
+        self.sequence = 0
+        self.publishes = 0
+        self.subscriptions: dict[str, Subscription] = {}
+        self.top = self._top()
+        order_queue.buy_depth.changed = set()
+        order_queue.sell_depth.changed = set()
+
+    def subscribe(self, capacity: int = 1 << 12, conflate_every: int = 1) -> str:
+        """
+        Returns the ring name for a MarketDataSubscriber, which starts from a
+        snapshot. capacity must exceed the number of levels in the book.
+        """
+        ring = SharedRingBuffer(RECORD_FORMAT, capacity)
+        subscription = Subscription(ring, conflate_every)
+        self.subscriptions[ring.name] = subscription
+        self._flush(subscription)
+        return ring.name
+
+    def unsubscribe(self, name: str) -> None:
+        ring = self.subscriptions.pop(name).ring
+        ring.close()
+        ring.unlink()
+
+    def publish(self) -> None:
+        """Send what changed since the last publish, called after each book update."""
+        changes = self._collect_changes()
+        top = self._top()
+        top_changed = top != self.top
+        self.publishes += 1
+        snapshot = self.snapshot_every and self.publishes % self.snapshot_every == 0
+        if changes or top_changed or snapshot:
+            self.sequence += 1
+            self.top = top
+        for subscription in self.subscriptions.values():
+            if snapshot:
+                subscription.needs_snapshot = True
+            elif not subscription.needs_snapshot:
+                subscription.levels.update(changes)
+                if top_changed:
+                    subscription.top = top
+            if self.publishes % subscription.conflate_every == 0:
+                self._flush(subscription)
+
+    def close(self) -> None:
+        for name in list(self.subscriptions):
+            self.unsubscribe(name)
+        self.order_queue.buy_depth.changed = None
+        self.order_queue.sell_depth.changed = None
+
+    def _collect_changes(self) -> dict[tuple[int, float], int]:
+        changes = {}
+        for depth in (self.order_queue.buy_depth, self.order_queue.sell_depth):
+            if depth.changed:
+                side = depth.side.value
+                quantities = depth.quantities
+                for price in depth.changed:
+                    changes[side, price] = quantities.get(price, 0)
+                depth.changed.clear()
+        return changes
+
+    def _top(self) -> tuple:
+        buy_depth, sell_depth = self.order_queue.buy_depth, self.order_queue.sell_depth
+        bid, ask = buy_depth.best_price(), sell_depth.best_price()
+        if bid is None and ask is None:
+            return EMPTY_TOP
+        return (
+            (0.0, 0) if bid is None else (bid, buy_depth.quantities[bid])
+        ) + ((0.0, 0) if ask is None else (ask, sell_depth.quantities[ask]))
+
+    def _flush(self, subscription: Subscription) -> None:
+        """Write the backlog only when all of it fits, so no publish is split"""
+        ring = subscription.ring
+        free = ring.capacity - len(ring)
+        sequence = self.sequence
+        if subscription.needs_snapshot:
+            levels = [
+                (depth.side.value, price, quantity)
+                for depth in (self.order_queue.buy_depth, self.order_queue.sell_depth)
+                for price, quantity in depth.levels()
+            ]
+            if len(levels) + 2 > free:
+                return
+            ring.put(sequence, MarketDataEvent.SNAPSHOT, 0, 0.0, len(levels), 0.0, 0)
+            for side, price, quantity in levels:
+                ring.put(sequence, MarketDataEvent.LEVEL, side, price, quantity, 0.0, 0)
+            ring.put(sequence, MarketDataEvent.TOP, 0, *self.top)
+            subscription.needs_snapshot = False
+            subscription.levels.clear()
+            subscription.top = None
+            return
+
+        backlog = subscription.levels
+        records = len(backlog) + (subscription.top is not None)
+        if not records:
+            return
+        if records > free:
+            if records >= ring.capacity:
+                subscription.needs_snapshot = True
+                backlog.clear()
+                subscription.top = None
+            return
+        for (side, price), quantity in backlog.items():
+            ring.put(sequence, MarketDataEvent.LEVEL, side, price, quantity, 0.0, 0)
+        backlog.clear()
+        if subscription.top is not None:
+            ring.put(sequence, MarketDataEvent.TOP, 0, *subscription.top)
+            subscription.top = None
+
+
+class MarketDataSubscriber:
+    """
+    Rebuilds the published book from a subscription ring, e.g. in another
+    process. A poll racing the publisher may apply part of a publish; the next
+    poll completes it.
+    """
+
+    def __init__(self, name: str, capacity: int = 1 << 12) -> None:
+        self.ring = SharedRingBuffer(RECORD_FORMAT, capacity, name=name, create=False)
+        self.bids: dict[float, int] = {}
+        self.asks: dict[float, int] = {}
+        self.top = EMPTY_TOP
+        self.sequence = 0
+
+    def poll(self) -> int:
+        """Apply every record published so far; returns how many there were"""
+        records = self.ring.drain()
+        for sequence, event, side, price, quantity, ask_price, ask_quantity in records:
+            self.sequence = sequence
+            if event == MarketDataEvent.LEVEL:
+                levels = self.bids if side == OrderSide.BUY.value else self.asks
+                if quantity:
+                    levels[price] = quantity
+                else:
+                    levels.pop(price, None)
+            elif event == MarketDataEvent.TOP:
+                self.top = (price, quantity, ask_price, ask_quantity)
+            else:
+                self.bids.clear()
+                self.asks.clear()
+        return len(records)
+
+    def levels(self, side: OrderSide, count: int | None = None) -> list[tuple]:
+        """(price, quantity) of the best count levels of side, best first"""
+        levels = self.bids if side == OrderSide.BUY else self.asks
+        prices = sorted(levels, reverse=side == OrderSide.BUY)[:count]
+        return [(price, levels[price]) for price in prices]
+
+    def close(self) -> None:
+        self.ring.close()
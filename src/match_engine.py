@@ -1,15 +1,44 @@
-from src.order_components import OrderStatus, Order
+from src.order_components import OrderSide, OrderStatus, OrderType, Order
 from src.order_queue import OrderQueue
-from src.logger import Logger
+from src.depth_index import DepthIndex
+from src.fill_sink import FillSink, FillView
+from src.risk import SelfTradePrevention
+from src.logger import Logger, AsyncLogger, LogEvent, log_event
+from src.instrumentation import StatsPage, Stat, Timer
 
 
 class MatchEngine:
-    def __init__(self, logger: Logger | None = None) -> None:
+    """
+    fill_sink: fills are written to its columns, and match calls return a
+    FillView of them in place of the list of (buy Order, sell Order, price,
+    quantity) tuples.
+    self_trade_prevention: orders of one user that would trade with each other
+    are cancelled instead, as chosen.
+    """
+
+    def __init__(
+        self,
+        logger: Logger | AsyncLogger | None = None,
+        stats: StatsPage | None = None,
+        fill_sink: FillSink | None = None,
+        self_trade_prevention: SelfTradePrevention | None = None,
+    ) -> None:
         self.logger = logger
+        self.stats = stats
+        self.fill_sink = fill_sink
+        self.self_trade_prevention = self_trade_prevention
 
-    def match_orders(self, order_queue: OrderQueue) -> tuple[int, list[tuple]]:
+    def match_orders(
+        self, order_queue: OrderQueue
+    ) -> tuple[int, list[tuple] | FillView]:
+        started = self.stats.start_timer(Timer.MATCH_ORDERS) if self.stats else 0
         matches = []
         num_removed_orders = 0
+        sink = self.fill_sink
+        start = sink.count if sink is not None else 0
+        buy_depth, sell_depth = order_queue.buy_depth, order_queue.sell_depth
+        risk = order_queue.risk
+        self_trade_prevention = self.self_trade_prevention
 
         while True:
             best_buy: Order = order_queue.get_best_buy_order()
@@ -18,37 +47,248 @@ class MatchEngine:
             # Case for stopping matching process
             if not best_buy or not best_sell or best_sell.price > best_buy.price:
                 break
+            if self_trade_prevention and best_buy.user_id == best_sell.user_id:
+                if best_buy.sequence > best_sell.sequence:
+                    self._prevent_self_trade(order_queue, best_sell, best_buy, True)
+                else:
+                    self._prevent_self_trade(order_queue, best_buy, best_sell, True)
+                continue
 
             matched_quantity = min(best_buy.quantity, best_sell.quantity)
-            matches.append((best_buy, best_sell, best_sell.price, matched_quantity))
+            if sink is not None:
+                sink.record(
+                    best_buy.order_id,
+                    best_sell.order_id,
+                    best_sell.price,
+                    matched_quantity,
+                )
+            else:
+                matches.append(
+                    (best_buy, best_sell, best_sell.price, matched_quantity)
+                )
 
             # Subtract quantity as result of transaction
             best_buy.quantity -= matched_quantity
             best_sell.quantity -= matched_quantity
+            buy_depth.remove(best_buy.price, matched_quantity)
+            sell_depth.remove(best_sell.price, matched_quantity)
             # Mark each as partially_filled as preliminary action
             best_buy.status = OrderStatus.PARTIALLY_FILLED
             best_sell.status = OrderStatus.PARTIALLY_FILLED
+            if risk:
+                risk.record_fill(best_buy, best_sell, best_sell.price, matched_quantity)
 
             # Remove buy or sell order when their quantities reach zero
             if best_buy.quantity == 0:
                 num_removed_orders += 1
                 best_buy.status = OrderStatus.FILLED
                 order_queue.remove_best_buy_order()
-                order_queue.filled_orders.append(best_buy)
+                order_queue.add_filled_order(best_buy)
             if best_sell.quantity == 0:
                 num_removed_orders += 1
                 best_sell.status = OrderStatus.FILLED
                 order_queue.remove_best_sell_order()
-                order_queue.filled_orders.append(best_sell)
+                order_queue.add_filled_order(best_sell)
 
             self._log_matched_orders(
                 best_buy, best_sell, matched_quantity, best_sell.price
             )
 
+        if sink is not None:
+            matches = sink.view(start)
+        if self.stats:
+            self._count_matches(matches)
+            if started:
+                self.stats.stop_timer(Timer.MATCH_ORDERS, started)
+        return num_removed_orders, matches
+
+    def match_incoming_order(
+        self, order: Order, order_queue: OrderQueue
+    ) -> tuple[int, list[tuple] | FillView]:
+        """
+        Match an incoming Order directly against the opposite side of the book.
+        Only the remainder of a LIMIT or POST_ONLY Order is placed in the
+        orderbooks; fills are identical to placing it first and calling
+        match_orders. The remainder of the other types is expired, and one that
+        cannot trade at all (a FOK short of liquidity, a crossing POST_ONLY) is
+        expired before touching the book.
+        """
+        started = (
+            self.stats.start_timer(Timer.MATCH_INCOMING_ORDER) if self.stats else 0
+        )
+        matches = []
+        num_removed_orders = 0
+        sink = self.fill_sink
+        start = sink.count if sink is not None else 0
+
+        if order.side == OrderSide.BUY:
+            get_best_resting = order_queue.get_best_sell_order
+            remove_best_resting = order_queue.remove_best_sell_order
+            resting_depth = order_queue.sell_depth
+        else:
+            get_best_resting = order_queue.get_best_buy_order
+            remove_best_resting = order_queue.remove_best_buy_order
+            resting_depth = order_queue.buy_depth
+
+        order_type = order.order_type
+        if order_type is not OrderType.LIMIT and not self._executable(
+            order, order_queue, resting_depth
+        ):
+            order_queue.expire_order(order)
+            if started:
+                self.stats.stop_timer(Timer.MATCH_INCOMING_ORDER, started)
+            return num_removed_orders, sink.view(start) if sink is not None else matches
+        # A MARKET Order takes any price the book offers
+        bounded = order_type is not OrderType.MARKET
+        risk = order_queue.risk
+        self_trade_prevention = self.self_trade_prevention
+
+        while order.quantity > 0:
+            resting: Order = get_best_resting()
+            if not resting:
+                break
+            if order.side == OrderSide.BUY:
+                best_buy, best_sell = order, resting
+            else:
+                best_buy, best_sell = resting, order
+
+            # Case for stopping matching process
+            if bounded and best_sell.price > best_buy.price:
+                break
+            if self_trade_prevention and best_buy.user_id == best_sell.user_id:
+                self._prevent_self_trade(order_queue, resting, order, False)
+                if order.status is OrderStatus.CANCELLED:
+                    break
+                continue
+
+            # Trades happen at the sell price, like match_orders; a MARKET Order
+            # has no price of its own, so it takes the resting price
+            price = best_sell.price if bounded else resting.price
+            matched_quantity = min(best_buy.quantity, best_sell.quantity)
+            if sink is not None:
+                sink.record(
+                    best_buy.order_id, best_sell.order_id, price, matched_quantity
+                )
+            else:
+                matches.append((best_buy, best_sell, price, matched_quantity))
+
+            best_buy.quantity -= matched_quantity
+            best_sell.quantity -= matched_quantity
+            resting_depth.remove(resting.price, matched_quantity)
+            best_buy.status = OrderStatus.PARTIALLY_FILLED
+            best_sell.status = OrderStatus.PARTIALLY_FILLED
+            if risk:
+                risk.record_fill(best_buy, best_sell, price, matched_quantity)
+
+            # Only the resting side has to leave the orderbooks
+            if best_buy.quantity == 0:
+                num_removed_orders += 1
+                best_buy.status = OrderStatus.FILLED
+                if best_buy is resting:
+                    remove_best_resting()
+                order_queue.add_filled_order(best_buy)
+            if best_sell.quantity == 0:
+                num_removed_orders += 1
+                best_sell.status = OrderStatus.FILLED
+                if best_sell is resting:
+                    remove_best_resting()
+                order_queue.add_filled_order(best_sell)
+
+            self._log_matched_orders(best_buy, best_sell, matched_quantity, price)
+
+        if order.quantity > 0 and order.status is not OrderStatus.CANCELLED:
+            if order_type is OrderType.LIMIT or order_type is OrderType.POST_ONLY:
+                order_queue.update_orderbooks(order)
+            else:
+                order_queue.expire_order(order)
+
+        if sink is not None:
+            matches = sink.view(start)
+        if self.stats:
+            self._count_matches(matches)
+            if started:
+                self.stats.stop_timer(Timer.MATCH_INCOMING_ORDER, started)
         return num_removed_orders, matches
 
+    def _prevent_self_trade(
+        self,
+        order_queue: OrderQueue,
+        resting: Order,
+        incoming: Order,
+        incoming_rests: bool,
+    ) -> None:
+        """
+        Cancel one or both orders of a self-trade. An incoming Order that is
+        not in the orderbooks is expired instead.
+        """
+        if self.self_trade_prevention is not SelfTradePrevention.CANCEL_INCOMING:
+            order_queue.cancel_order(resting.order_id)
+        if self.self_trade_prevention is not SelfTradePrevention.CANCEL_RESTING:
+            if incoming_rests:
+                order_queue.cancel_order(incoming.order_id)
+            else:
+                order_queue.expire_order(incoming)
+
+    def _executable(
+        self, order: Order, order_queue: OrderQueue, resting_depth: DepthIndex
+    ) -> bool:
+        """Whether a FOK or POST_ONLY Order may trade, decided from the depth index"""
+        if order.order_type is OrderType.FOK:
+            available = resting_depth.available(order.price, order.quantity)
+            if available >= order.quantity and self.self_trade_prevention:
+                # The depth index counts the user's own orders too
+                available = self._fillable_around_self_trades(order, order_queue)
+            return available >= order.quantity
+        if order.order_type is OrderType.POST_ONLY:
+            best_price = resting_depth.best_price()
+            if best_price is None:
+                return True
+            if order.side == OrderSide.BUY:
+                return best_price > order.price
+            return best_price < order.price
+        return True
+
+    def _fillable_around_self_trades(
+        self, order: Order, order_queue: OrderQueue
+    ) -> int:
+        """
+        Quantity order would fill under self-trade prevention, counted up to
+        order.quantity. The user's own orders are skipped when they would be
+        cancelled, and end the count where order would be.
+        """
+        buying = order.side == OrderSide.BUY
+        resting_side = OrderSide.SELL if buying else OrderSide.BUY
+        skip_own = self.self_trade_prevention is SelfTradePrevention.CANCEL_RESTING
+        fillable = 0
+        for resting in order_queue.resting_orders(resting_side):
+            if resting.price > order.price if buying else resting.price < order.price:
+                break
+            if resting.user_id == order.user_id:
+                if skip_own:
+                    continue
+                break
+            fillable += resting.quantity
+            if fillable >= order.quantity:
+                break
+        return fillable
+
+    def _count_matches(self, matches: list[tuple] | FillView) -> None:
+        """Each call matches at most one aggressor against the book"""
+        if matches:
+            slots = self.stats.slots
+            slots[Stat.AGGRESSORS] += 1
+            slots[Stat.MATCHES] += len(matches)
+            if len(matches) > slots[Stat.MAX_MATCHES_PER_AGGRESSOR]:
+                slots[Stat.MAX_MATCHES_PER_AGGRESSOR] = len(matches)
+
     def _log_matched_orders(self, buy_order, sell_order, quantity, price):
         if self.logger:
-            self.logger.info(
-                f"-- Matched: Buy {buy_order.order_id} Sell {sell_order.order_id} for {quantity} units at ${price:.2f}"
+            log_event(
+                self.logger,
+                LogEvent.MATCHED,
+                buy_order.order_id,
+                sell_order.order_id,
+                # CompactOrder prices are ticks
+                type(buy_order).to_price(price),
+                quantity,
             )
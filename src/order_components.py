@@ -1,5 +1,12 @@
+import multiprocessing as mp
+import sys
+import time
+from collections.abc import Iterable, Iterator
 from enum import Enum
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from itertools import chain, count, repeat
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 class OrderSide(Enum):
@@ -7,12 +14,31 @@ class OrderSide(Enum):
     SELL = 2
 
 
+# Decodes OrderSide values from columns and frames without an Enum call each
+SIDES_BY_VALUE = {side.value: side for side in OrderSide}
+
+
 class OrderStatus(Enum):
     CANCELLED = 0
     PENDING = 1
     PROCESSING = 2
     PARTIALLY_FILLED = 3
     FILLED = 4
+    REJECTED = 5
+
+
+class OrderType(Enum):
+    """
+    LIMIT rests its unfilled remainder. MARKET trades at any price and IOC up to
+    its limit, both cancelling the remainder. FOK trades only if it fills in
+    full. POST_ONLY is cancelled instead of trading if it would cross the book.
+    """
+
+    LIMIT = 0
+    MARKET = 1
+    IOC = 2
+    FOK = 3
+    POST_ONLY = 4
 
 
 class OrderIdGenerator:
@@ -24,15 +50,195 @@ class OrderIdGenerator:
         self._next_id += 1
         return order_id
 
+    def generate_ids(self, number: int) -> Iterable[str]:
+        """number consecutive ids, claimed at once"""
+        return map("{:08d}".format, self._claim(number))
+
     def reset(self):
         self._next_id = 1
 
+    @property
+    def next_id(self) -> int:
+        """Above every id generated so far"""
+        return self._next_id
+
+    def advance_past(self, order_id: str | int) -> None:
+        """Make sure ids restored from disk are never generated again."""
+        self._next_id = max(self._next_id, int(order_id) + 1)
+
+    def _claim(self, number: int) -> range:
+        start = self._next_id
+        self._next_id = start + number
+        return range(start, start + number)
+
+
+class IntOrderIdGenerator(OrderIdGenerator):
+    def generate_id(self) -> int:
+        order_id = self._next_id
+        self._next_id += 1
+        return order_id
+
+    def generate_ids(self, number: int) -> range:
+        return self._claim(number)
+
+
+# Packed ids fill 53 bits: exact as doubles, and at most 16 decimal digits, the
+# width of the id fields in journal, log and gateway records
+SHARD_BITS = 8
+SESSION_BITS = 8
+SEQUENCE_BITS = 37
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+
+def pack_id(shard: int, session: int, sequence: int) -> int:
+    return (shard << SESSION_BITS | session) << SEQUENCE_BITS | sequence
+
+
+def unpack_id(order_id: int) -> tuple[int, int, int]:
+    """(shard, session, sequence) of a packed id"""
+    prefix = order_id >> SEQUENCE_BITS
+    return (
+        prefix >> SESSION_BITS,
+        prefix & ((1 << SESSION_BITS) - 1),
+        order_id & SEQUENCE_MASK,
+    )
+
+
+def format_packed_id(order_id: int) -> str:
+    """Readable shard-session-sequence form, for logs and gateway replies"""
+    return "{}-{}-{}".format(*unpack_id(order_id))
+
+
+class IdBlockAllocator:
+    """
+    Hands out disjoint blocks of block_size sequence numbers, so producers
+    synchronise once per block rather than once per order.
+    Threads share an in-process allocator: claiming is a single next() on an
+    itertools.count. shared=True keeps the counter in shared memory behind a
+    lock instead; pass the allocator to the producer processes.
+    """
+
+    def __init__(self, block_size: int = 1 << 16, shared: bool = False) -> None:
+        self.block_size = block_size
+        self.shared = shared
+        self._blocks = mp.Value("q", 0) if shared else count()
+
+    def claim(self) -> int:
+        """First sequence number of a fresh block; sequence 0 is never used"""
+        if self.shared:
+            with self._blocks.get_lock():
+                block = self._blocks.value
+                self._blocks.value = block + 1
+        else:
+            block = next(self._blocks)
+        return block * self.block_size + 1
+
+    def advance_past(self, sequence: int) -> None:
+        needed = (sequence - 1) // self.block_size + 1
+        if self.shared:
+            with self._blocks.get_lock():
+                self._blocks.value = max(self._blocks.value, needed)
+        else:
+            self._blocks = count(max(next(self._blocks), needed))
+
+    def reset(self) -> None:
+        if self.shared:
+            self._blocks.value = 0
+        else:
+            self._blocks = count()
+
+
+class PackedIdGenerator:
+    """
+    64-bit integer ids packing shard, session and a sequence drawn in blocks
+    from an IdBlockAllocator, for CompactOrder and other integer-id classes.
+    Generating an id is a next() on the current block's itertools.count, and
+    the block and its end are swapped as one tuple, so threads can share one
+    generator without a lock; processes share the allocator instead, or use
+    distinct shards or sessions. Render ids with format_packed_id or str() at
+    the edges only.
+    """
+
+    def __init__(
+        self,
+        shard: int = 0,
+        session: int = 0,
+        allocator: IdBlockAllocator | None = None,
+    ) -> None:
+        if not (0 <= shard < 1 << SHARD_BITS and 0 <= session < 1 << SESSION_BITS):
+            raise ValueError(f"shard {shard} or session {session} out of range")
+        self.prefix = pack_id(shard, session, 0)
+        self.allocator = allocator or IdBlockAllocator()
+        self._block = (count(), 0)
+
+    def generate_id(self) -> int:
+        ids, end = self._block
+        order_id = next(ids)
+        if order_id < end:
+            return order_id
+        return self._next_block()
+
+    def generate_ids(self, number: int) -> Iterable[int]:
+        """
+        number ids from whole blocks claimed afresh, so threads drawing from
+        the current block meanwhile never see them. What the last block has
+        left over becomes the current block.
+        """
+        block_size = self.allocator.block_size
+        ranges = []
+        while number > 0:
+            order_id = self._claim_block()
+            taken = min(number, block_size)
+            ranges.append(range(order_id, order_id + taken))
+            number -= taken
+        if ranges:
+            # Even a used up block records its end, which next_id reports
+            self._block = (count(order_id + taken), order_id + block_size)
+        return chain.from_iterable(ranges)
+
+    def reset(self) -> None:
+        self.allocator.reset()
+        self._block = (count(), 0)
+
+    @property
+    def next_id(self) -> int:
+        """Above every id generated so far"""
+        return self._block[1] or self.prefix + 1
+
+    def advance_past(self, order_id: str | int) -> None:
+        """Make sure ids restored from disk are never generated again."""
+        order_id = int(order_id)
+        if order_id & ~SEQUENCE_MASK == self.prefix:
+            self.allocator.advance_past(order_id & SEQUENCE_MASK)
+            self._block = (count(), 0)
+
+    def _next_block(self) -> int:
+        order_id = self._claim_block()
+        ids = count(order_id + 1)
+        self._block = (ids, order_id + self.allocator.block_size)
+        return order_id
+
+    def _claim_block(self) -> int:
+        """First id of a fresh block"""
+        start = self.allocator.claim()
+        if start + self.allocator.block_size - 1 > SEQUENCE_MASK:
+            raise OverflowError("packed order id sequence exhausted")
+        return self.prefix | start
+
 
 class Order:
     id_generator = OrderIdGenerator()
+    # Orderbook arrival sequence, set by OrderQueue whenever the Order rests
+    sequence = 0
 
     def __init__(
-        self, user_id: str, side: OrderSide, price: float, quantity: int
+        self,
+        user_id: str,
+        side: OrderSide,
+        price: float,
+        quantity: int,
+        symbol: str = "",
+        order_type: OrderType = OrderType.LIMIT,
     ) -> None:
         self.order_id = self.id_generator.generate_id()
         self.user_id = user_id
@@ -41,7 +247,193 @@ class Order:
         self.quantity = quantity
         self.status = OrderStatus.PENDING
         self.timestamp = datetime.now(tz=timezone.utc)
+        self.symbol = symbol
+        self.order_type = order_type
 
     @classmethod
     def reset_id_generator(cls) -> None:
         cls.id_generator.reset()
+
+    @classmethod
+    def restore(
+        cls,
+        order_id: str,
+        user_id: str,
+        side: OrderSide,
+        price: float,
+        quantity: int,
+        status: OrderStatus,
+        timestamp: datetime,
+        symbol: str = "",
+        order_type: OrderType = OrderType.LIMIT,
+    ) -> "Order":
+        """Rebuild an Order from persisted fields without drawing a new id."""
+        order = cls.__new__(cls)
+        order.order_id = order_id
+        order.user_id = user_id
+        order.side = side
+        order.price = price
+        order.quantity = quantity
+        order.status = status
+        order.timestamp = timestamp
+        order.symbol = symbol
+        order.order_type = order_type
+        return order
+
+    @staticmethod
+    def parse_id(order_id: str) -> str:
+        return order_id
+
+    @staticmethod
+    def format_id(order_id: int) -> str:
+        """Inverse of int(order_id) for generated ids."""
+        return f"{order_id:08d}"
+
+    @staticmethod
+    def parse_price(price: float) -> float:
+        return price
+
+    @staticmethod
+    def to_price(price: float) -> float:
+        """Inverse of parse_price"""
+        return price
+
+    @staticmethod
+    def encode_timestamp(timestamp: datetime) -> int:
+        """Microseconds since the epoch, exact in both directions."""
+        return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+    @staticmethod
+    def current_timestamp() -> datetime:
+        return datetime.now(tz=timezone.utc)
+
+    @staticmethod
+    def decode_timestamp(value: int) -> datetime:
+        return EPOCH + timedelta(microseconds=value)
+
+    @staticmethod
+    def decode_timestamps(values: Iterable[int]) -> Iterator[datetime]:
+        """Bulk decode_timestamp without a Python-level call per value."""
+        return map(EPOCH.__add__, map(timedelta, repeat(0), repeat(0), values))
+
+
+class CompactOrder:
+    """
+    Memory-compact Order with the same attribute surface.
+    price: integer number of ticks of tick_size, interned per tick.
+    order_id: integer.
+    timestamp: time.monotonic_ns() at creation.
+    sequence: only set once an OrderQueue rests it.
+    """
+
+    __slots__ = (
+        "order_id",
+        "user_id",
+        "side",
+        "price",
+        "quantity",
+        "status",
+        "timestamp",
+        "symbol",
+        "order_type",
+        "sequence",
+    )
+    id_generator = IntOrderIdGenerator()
+    tick_size = 0.01
+    _ticks: dict[int, int] = {}
+
+    def __init__(
+        self,
+        user_id: str,
+        side: OrderSide,
+        price: float,
+        quantity: int,
+        symbol: str = "",
+        order_type: OrderType = OrderType.LIMIT,
+    ) -> None:
+        self.order_id = self.id_generator.generate_id()
+        self.user_id = sys.intern(user_id) if type(user_id) is str else user_id
+        self.side = side
+        self.price = self.to_ticks(price)
+        self.quantity = quantity
+        self.status = OrderStatus.PENDING
+        self.timestamp = time.monotonic_ns()
+        self.symbol = sys.intern(symbol)
+        self.order_type = order_type
+
+    @property
+    def price_value(self) -> float:
+        return self.price * self.tick_size
+
+    @classmethod
+    def to_ticks(cls, price: float) -> int:
+        ticks = round(price / cls.tick_size)
+        return cls._ticks.setdefault(ticks, ticks)
+
+    @classmethod
+    def set_tick_size(cls, tick_size: float) -> None:
+        cls.tick_size = tick_size
+        cls._ticks = {}
+
+    @classmethod
+    def reset_id_generator(cls) -> None:
+        cls.id_generator.reset()
+
+    @classmethod
+    def restore(
+        cls,
+        order_id: int,
+        user_id: str,
+        side: OrderSide,
+        price: int,
+        quantity: int,
+        status: OrderStatus,
+        timestamp: int,
+        symbol: str = "",
+        order_type: OrderType = OrderType.LIMIT,
+    ) -> "CompactOrder":
+        """Rebuild a CompactOrder from persisted fields; price is already in ticks."""
+        order = cls.__new__(cls)
+        order.order_id = order_id
+        order.user_id = sys.intern(user_id)
+        order.side = side
+        price = int(price)
+        order.price = cls._ticks.setdefault(price, price)
+        order.quantity = quantity
+        order.status = status
+        order.timestamp = timestamp
+        order.symbol = sys.intern(symbol)
+        order.order_type = order_type
+        return order
+
+    @staticmethod
+    def parse_id(order_id: str) -> int:
+        return int(order_id)
+
+    @staticmethod
+    def format_id(order_id: int) -> int:
+        return order_id
+
+    @classmethod
+    def parse_price(cls, price: float) -> int:
+        return cls.to_ticks(price)
+
+    @classmethod
+    def to_price(cls, price: int) -> float:
+        return price * cls.tick_size
+
+    @staticmethod
+    def encode_timestamp(timestamp: int) -> int:
+        return timestamp
+
+    @staticmethod
+    def current_timestamp() -> int:
+        return time.monotonic_ns()
+
+    @staticmethod
+    def decode_timestamp(value: int) -> int:
+        return value
+
+    @staticmethod
+    def decode_timestamps(values: Iterable[int]) -> Iterable[int]:
+        return values
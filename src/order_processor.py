@@ -1,7 +1,22 @@
-from src.order_components import OrderSide, Order
+import logging
+from collections.abc import Sequence
+from itertools import repeat
+from src.order_components import (
+    OrderSide,
+    OrderStatus,
+    OrderType,
+    Order,
+    CompactOrder,
+    SIDES_BY_VALUE,
+)
 from src.order_queue import OrderQueue
+from src.columnar import read_columns, gc_paused
 from src.match_engine import MatchEngine
-from src.logger import Logger
+from src.auction_engine import AuctionEngine
+from src.fill_sink import FillView
+from src.market_data import MarketDataPublisher
+from src.risk import RejectReason
+from src.logger import Logger, AsyncLogger, LogEvent, log_event
 
 
 class OrderProcessor:
@@ -9,66 +24,270 @@ class OrderProcessor:
         self,
         order_queue: OrderQueue,
         match_engine: MatchEngine,
-        logger: Logger | None = None,
+        logger: Logger | AsyncLogger | None = None,
+        order_class: type[Order] | type[CompactOrder] = Order,
+        match_on_arrival: bool = False,
+        auction_engine: AuctionEngine | None = None,
+        market_data: MarketDataPublisher | None = None,
     ) -> None:
         self.order_queue = order_queue
         self.match_engine = match_engine
         self.transactions = 0
         self.logger = logger
+        self.order_class = order_class
+        self.match_on_arrival = match_on_arrival
+        self.auction_engine = auction_engine or AuctionEngine(
+            logger, match_engine.self_trade_prevention
+        )
+        self.market_data = market_data
 
     def receive_order(
-        self, user_id: str, side: OrderSide, price: float, quantity: int
-    ) -> Order:
-        order = Order(user_id, side, price, quantity)
+        self,
+        user_id: str,
+        side: OrderSide,
+        price: float,
+        quantity: int,
+        symbol: str = "",
+        order_type: OrderType = OrderType.LIMIT,
+    ) -> Order | CompactOrder:
+        """
+        price is ignored for MARKET orders. An Order failing the risk checks of
+        the OrderQueue is returned REJECTED without being queued.
+        """
+        order = self.order_class(user_id, side, price, quantity, symbol, order_type)
+        return self.submit_order(order)
+
+    def receive_orders(
+        self,
+        user_ids: Sequence[str],
+        sides: Sequence[int],
+        prices: Sequence[float],
+        quantities: Sequence[int],
+        symbol: str = "",
+        order_type: OrderType = OrderType.LIMIT,
+    ) -> int:
+        """
+        receive_order over equally long columns, e.g. arrays, or NumPy arrays
+        wrapped in memoryview; sides are OrderSide values. Ids are claimed as
+        one block and the batch shares one timestamp. Returns how many orders
+        were queued, which is fewer only if risk checks rejected some.
+        Raises ValueError unless the columns are equally long.
+        """
+        count = len(quantities)
+        if not len(user_ids) == len(sides) == len(prices) == count:
+            raise ValueError("receive_orders needs equally long columns")
+        order_class = self.order_class
+        if issubclass(order_class, CompactOrder):
+            # Historical prices repeat, so convert each distinct one once
+            ticks = {price: order_class.to_ticks(price) for price in set(prices)}
+            prices = map(ticks.__getitem__, prices)
+        # Every order built here survives, so collecting while building is wasted
+        with gc_paused():
+            orders = list(
+                map(
+                    order_class.restore,
+                    order_class.id_generator.generate_ids(count),
+                    user_ids,
+                    map(SIDES_BY_VALUE.__getitem__, sides),
+                    prices,
+                    quantities,
+                    repeat(OrderStatus.PENDING),
+                    repeat(order_class.current_timestamp()),
+                    repeat(symbol),
+                    repeat(order_type),
+                )
+            )
+
+        if self.order_queue.risk or self.logger:
+            submit_order = self.submit_order
+            rejected = OrderStatus.REJECTED
+            return sum(submit_order(order).status is not rejected for order in orders)
+        self.order_queue.add_orders(orders)
+        return count
+
+    def load_orders(
+        self,
+        path: str,
+        symbol: str = "",
+        order_type: OrderType = OrderType.LIMIT,
+    ) -> int:
+        """receive_orders from an order file, see columnar.write_order_file"""
+        _, columns = read_columns(path)
+        return self.receive_orders(
+            columns["user_id"],
+            columns["side"],
+            columns["price"],
+            columns["quantity"],
+            symbol,
+            order_type,
+        )
+
+    def submit_order(self, order: Order | CompactOrder) -> Order | CompactOrder:
+        """Queue an Order built elsewhere, e.g. by an IntakePipeline producer"""
+        risk = self.order_queue.risk
+        if risk:
+            reason = risk.check(order, self.order_queue)
+            if reason is not None:
+                order.status = OrderStatus.REJECTED
+                self._log_order_rejected(order, reason)
+                return order
         self.order_queue.add_order(order)
         self._log_order_received(order)
         return order
 
-    def cancel_order(self, order_id: str) -> bool:
-        return self.order_queue.cancel_order(order_id)
+    def cancel_order(self, order_id: str | int) -> bool:
+        cancelled = self.order_queue.cancel_order(order_id)
+        if self.market_data:
+            self.market_data.publish()
+        return cancelled
 
-    def process_single_order(self) -> None:
-        order = self.order_queue.get_next_order()
-        if order:
+    def amend_order(
+        self,
+        order_id: str | int,
+        quantity: int | None = None,
+        price: float | None = None,
+    ) -> list[tuple] | FillView | None:
+        """
+        Amend an Order in place instead of cancel and replace, keeping its id.
+        Returns the fills of a resting Order whose new price crosses the book,
+        or None if it could not be amended.
+        """
+        if price is not None:
+            price = self.order_class.parse_price(price)
+        risk = self.order_queue.risk
+        order = self.order_queue.order_map.get(order_id)
+        if risk and order is not None:
+            reason = risk.check_amend(
+                order,
+                order.quantity if quantity is None else quantity,
+                order.price if price is None else price,
+                self.order_queue,
+            )
+            if reason is not None:
+                self._log_order_rejected(order, reason)
+                return None
+        if not self.order_queue.amend_order(order_id, quantity, price):
+            return None
+        matches = []
+        if price is not None:
             num_removed_orders, matches = self.match_engine.match_orders(
                 order_queue=self.order_queue
             )
             self.transactions += len(matches)
+            self._journal_fills(matches)
+        if self.market_data:
+            self.market_data.publish()
+        return matches
+
+    def process_single_order(self) -> list[tuple] | FillView:
+        order = self._next_order()
+        if order:
+            num_removed_orders, matches = self._match_order(order)
+            self.transactions += len(matches)
             # self.order_queue.orderbook_size -= num_removed_orders
 
             self._log_order_processing_summary()
+            return matches
+        return []
 
     def process_orders(self) -> None:
         """Use of this function is limited to gauge performance of the match engine when given large amount of orders."""
         while True:
-            order = self.order_queue.get_next_order()
+            order = self._next_order()
             if not order:
                 break
 
             self._log_before_matching()
 
-            num_removed_orders, matches = self.match_engine.match_orders(
-                order_queue=self.order_queue
-            )
+            num_removed_orders, matches = self._match_order(order)
             self.transactions += len(matches)
             # self.order_queue.orderbook_size -= num_removed_orders
 
             self._log_order_processing_summary()
 
+    def process_auction(self) -> float | None:
+        """Uncross all pending orders at once, e.g. for opening and closing auctions."""
+        clearing_price, matches = self.auction_engine.uncross(self.order_queue)
+        self.transactions += len(matches)
+        self._journal_fills(matches)
+        # Remainders may still cross orders that were resting before the auction
+        num_removed_orders, matches = self.match_engine.match_orders(
+            order_queue=self.order_queue
+        )
+        self.transactions += len(matches)
+        self._journal_fills(matches)
+        if self.market_data:
+            self.market_data.publish()
+
+        self._log_order_processing_summary()
+        return clearing_price
+
+    def _next_order(self) -> Order | None:
+        if self.match_on_arrival:
+            return self.order_queue.pop_next_order()
+        return self.order_queue.get_next_order()
+
+    def _match_order(self, order: Order) -> tuple[int, list[tuple] | FillView]:
+        # Only LIMIT orders were placed in the orderbooks by get_next_order
+        if self.match_on_arrival or order.order_type is not OrderType.LIMIT:
+            num_removed_orders, matches = self.match_engine.match_incoming_order(
+                order, self.order_queue
+            )
+        else:
+            num_removed_orders, matches = self.match_engine.match_orders(
+                order_queue=self.order_queue
+            )
+        self._journal_fills(matches)
+        if self.market_data:
+            self.market_data.publish()
+        return num_removed_orders, matches
+
+    def _journal_fills(self, matches: list[tuple] | FillView) -> None:
+        journal = self.order_queue.journal
+        if journal:
+            if isinstance(matches, FillView):
+                for buy_id, sell_id, price, quantity in matches:
+                    journal.record_fill_ids(buy_id, sell_id, price, quantity)
+                return
+            for buy_order, sell_order, price, quantity in matches:
+                journal.record_fill(buy_order, sell_order, price, quantity)
+
     def _log_order_received(self, order: Order) -> None:
         if self.logger:
-            self.logger.info(
-                f"Order received: {order.order_id}, Orders (Total, Pending) ({len(self.order_queue.order_map)}, {len(self.order_queue.queue)})"
+            log_event(
+                self.logger,
+                LogEvent.ORDER_RECEIVED,
+                order.order_id,
+                first=len(self.order_queue.order_map),
+                second=len(self.order_queue.queue),
+            )
+
+    def _log_order_rejected(self, order: Order, reason: RejectReason) -> None:
+        if self.logger:
+            log_event(
+                self.logger,
+                LogEvent.ORDER_REJECTED,
+                order.order_id,
+                first=reason,
+                level=logging.WARNING,
             )
 
     def _log_before_matching(self) -> None:
         if self.logger:
-            self.logger.info(
-                f"-- Before matching - Orders (Total, Remaining): ({len(self.order_queue.order_map)}, {self.order_queue.orderbook_size})"
+            log_event(
+                self.logger,
+                LogEvent.BEFORE_MATCHING,
+                first=len(self.order_queue.order_map),
+                second=self.order_queue.orderbook_size,
             )
 
     def _log_order_processing_summary(self) -> None:
         if self.logger:
-            self.logger.info(
-                f"-- Orders (Total, Remaining, Filled, Transactions): ({len(self.order_queue.order_map)}, {self.order_queue.orderbook_size}, {len(self.order_queue.filled_orders)}, {self.transactions})"
+            log_event(
+                self.logger,
+                LogEvent.PROCESSING_SUMMARY,
+                first=len(self.order_queue.order_map),
+                second=self.order_queue.orderbook_size,
+                third=len(self.order_queue.filled_orders),
+                fourth=self.transactions,
             )
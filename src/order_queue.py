@@ -1,111 +1,492 @@
 from collections import deque
 import heapq
-from src.order_components import OrderSide, OrderStatus, Order
-from src.logger import Logger
+from operator import attrgetter
+from typing import Iterator, NamedTuple
+from src.order_components import OrderSide, OrderStatus, OrderType, Order
+from src.depth_index import DepthIndex
+from src.logger import Logger, AsyncLogger, LogEvent, log_event
+from src.journal import EventJournal
+from src.retention import RetentionPolicy
+from src.risk import RiskChecker
+from src.instrumentation import StatsPage, Stat, Timer
 
 
-class HeapOrder:
+# Module-level, as Enum member lookups are slow on the per-order path
+LIMIT = OrderType.LIMIT
+
+
+class HeapOrder(NamedTuple):
     """
-    __lt__ ensures correct ordering in heap data structure.
+    Compared as a plain tuple, so heap operations never call back into Python.
     min-heap: set price as it is.
     max-heap: negate the price to mimic max-heap in min-heap structure.
+    sequence: arrival in the orderbooks, giving FIFO among equal prices. It is
+    unique, so the Order itself is never compared.
+    """
+
+    price: float
+    sequence: int
+    order: Order
+
+
+_popleft = deque.popleft
+
+
+class IntakeQueue(deque):
     """
+    FIFO of PENDING orders with O(1) remove. A removed Order is only marked and
+    skipped once it reaches the front, so append and popleft keep deque speed.
+    Marks are compacted away once they exceed half of the entries.
+    """
+
+    __slots__ = ("removed",)
+
+    def __init__(self, orders=()) -> None:
+        super().__init__(orders)
+        self.removed: set[Order] = set()
+
+    def remove(self, order: Order) -> None:
+        """order must be queued; unlike deque.remove this cannot check in O(1)"""
+        self.removed.add(order)
+        if len(self.removed) * 2 > deque.__len__(self):
+            removed = self.removed
+            kept = [queued for queued in deque.__iter__(self) if queued not in removed]
+            deque.clear(self)
+            self.extend(kept)
+            self.removed = set()
+
+    def popleft(self) -> Order:
+        order = deque.popleft(self)
+        while self.removed and order in self.removed:
+            self.removed.discard(order)
+            order = deque.popleft(self)
+        return order
+
+    def clear(self) -> None:
+        deque.clear(self)
+        self.removed.clear()
+
+    def __len__(self) -> int:
+        return deque.__len__(self) - len(self.removed)
 
-    def __init__(self, price: float, order: Order) -> None:
-        self.price = price
-        self.order = order
+    def __bool__(self) -> bool:
+        return deque.__len__(self) > len(self.removed)
 
-    def __lt__(self, other) -> bool:
-        return self.price < other.price
+    def __iter__(self):
+        if not self.removed:
+            return deque.__iter__(self)
+        removed = self.removed
+        return (order for order in deque.__iter__(self) if order not in removed)
+
+    def __contains__(self, order) -> bool:
+        return order not in self.removed and deque.__contains__(self, order)
+
+    def __repr__(self) -> str:
+        return f"IntakeQueue({list(self)!r})"
 
 
 class OrderQueue:
-    def __init__(self, logger: Logger | None = None) -> None:
-        self.queue = deque()
+    """
+    lazy_cancel: cancelled PROCESSING orders are left in the heaps as tombstones
+    and skipped once they reach the top. A side is compacted when its tombstones
+    exceed compaction_threshold of the heap length. Amending a resting Order
+    always leaves its old entry as a tombstone, whose sequence no longer
+    matches Order.sequence.
+    buy_depth, sell_depth: resting quantity per price level of each side.
+    journal: order entry, processing, resting and cancels are appended to it.
+    retention: bounds the filled orders kept in memory, archiving the rest.
+    stats: heap, cancel, depth and queue counters plus sampled get_next_order
+    timing are published to it.
+    risk: its per-user exposure is kept current as orders enter, fill, are
+    amended and leave; OrderProcessor runs its checks.
+    """
+
+    def __init__(
+        self,
+        logger: Logger | AsyncLogger | None = None,
+        lazy_cancel: bool = False,
+        compaction_threshold: float = 0.5,
+        journal: EventJournal | None = None,
+        retention: RetentionPolicy | None = None,
+        stats: StatsPage | None = None,
+        risk: RiskChecker | None = None,
+    ) -> None:
+        self.queue = IntakeQueue()
         self.order_map: dict[str, Order] = {}
         self.buy_orders: list[HeapOrder] = []  # max heap
         self.sell_orders: list[HeapOrder] = []  # min heap
+        self.buy_depth = DepthIndex(OrderSide.BUY)
+        self.sell_depth = DepthIndex(OrderSide.SELL)
         self.filled_orders: list[Order] = []
         self.orderbook_size = 0
         self.logger = logger
+        self.lazy_cancel = lazy_cancel
+        self.compaction_threshold = compaction_threshold
+        self.buy_tombstones = 0
+        self.sell_tombstones = 0
+        self.compactions = 0
+        self.compacted_entries = 0
+        self.journal = journal
+        self.retention = retention
+        self.arrival_sequence = 0
+        self.stats = stats
+        self.risk = risk
 
     def add_order(self, order: Order) -> None:
         """Add Order to queue before being processed."""
         self.queue.append(order)
         self.order_map[order.order_id] = order
+        if self.journal:
+            self.journal.record_new_order(order)
+        if self.risk:
+            self.risk.add(order)
+        if self.stats:
+            self.stats.slots[Stat.QUEUE_LENGTH] = len(self.queue)
+
+    def add_orders(self, orders: list[Order]) -> None:
+        """add_order for a batch, extending the queue and order_map in one go"""
+        self.queue.extend(orders)
+        self.order_map.update(zip(map(attrgetter("order_id"), orders), orders))
+        if self.journal:
+            for order in orders:
+                self.journal.record_new_order(order)
+        if self.risk:
+            for order in orders:
+                self.risk.add(order)
+        if self.stats:
+            self.stats.slots[Stat.QUEUE_LENGTH] = len(self.queue)
+
+    def add_filled_order(self, order: Order) -> None:
+        self.filled_orders.append(order)
+        if self.retention:
+            self.retention.record_fill(self)
+
+    def lookup_order(self, order_id: str) -> Order | None:
+        """Find an Order by id, falling back to the archive for evicted ones"""
+        order = self.order_map.get(order_id)
+        if order is None and self.retention:
+            return self.retention.archive.lookup(order_id)
+        return order
 
     def update_orderbooks(self, order: Order) -> None:
         """Updates orderbooks when Order was popped from the queue"""
-        heap_order = HeapOrder(
-            price=-order.price if order.side == OrderSide.BUY else order.price,
-            order=order,
-        )
+        if self.journal:
+            self.journal.record_rest_order(order)
+        self.arrival_sequence += 1
+        order.sequence = self.arrival_sequence
         if order.side == OrderSide.BUY:
-            heapq.heappush(self.buy_orders, heap_order)
+            heapq.heappush(
+                self.buy_orders, HeapOrder(-order.price, self.arrival_sequence, order)
+            )
+            self.buy_depth.add(order.price, order.quantity)
         else:
-            heapq.heappush(self.sell_orders, heap_order)
+            heapq.heappush(
+                self.sell_orders, HeapOrder(order.price, self.arrival_sequence, order)
+            )
+            self.sell_depth.add(order.price, order.quantity)
         self.orderbook_size += 1
+        if self.stats:
+            self.stats.slots[Stat.HEAP_PUSHES] += 1
+            self.stats.slots[Stat.BOOK_DEPTH] = self.orderbook_size
 
     def get_next_order(self) -> Order | None:
-        """Get the next Order for processing"""
-        if self.queue:
-            order: Order = self.queue.popleft()
-            order.status = OrderStatus.PROCESSING
+        """
+        Get the next Order for processing. Only LIMIT orders are placed in the
+        orderbooks; the other types are left to MatchEngine.match_incoming_order.
+        """
+        started = self.stats.start_timer(Timer.GET_NEXT_ORDER) if self.stats else 0
+        order = self.pop_next_order()
+        if order and order.order_type is LIMIT:
             self.update_orderbooks(order)
-            if self.logger:
-                self.logger.info(f"Processing order: {order.order_id}")
-            return order
-        return None
+        if started:
+            self.stats.stop_timer(Timer.GET_NEXT_ORDER, started)
+        return order
+
+    def pop_next_order(self) -> Order | None:
+        """Get the next Order for processing without placing it in the orderbooks"""
+        started = self.stats.start_timer(Timer.POP_NEXT_ORDER) if self.stats else 0
+        queue = self.queue
+        try:
+            # Bypass the Python-level IntakeQueue.popleft unless cancels are marked
+            order: Order = queue.popleft() if queue.removed else _popleft(queue)
+        except IndexError:
+            if started:
+                self.stats.stop_timer(Timer.POP_NEXT_ORDER, started)
+            return None
+        order.status = OrderStatus.PROCESSING
+        if self.journal:
+            self.journal.record_process_order(order)
+        if self.stats:
+            self.stats.slots[Stat.QUEUE_LENGTH] = len(self.queue)
+        if self.logger:
+            log_event(self.logger, LogEvent.PROCESSING_ORDER, order.order_id)
+        if started:
+            self.stats.stop_timer(Timer.POP_NEXT_ORDER, started)
+        return order
 
     def cancel_order(self, order_id: str) -> bool:
-        """Cancel order if it's in either PENDING or PROCESSING state"""
+        """Cancel order if it's PENDING, PROCESSING or resting PARTIALLY_FILLED"""
         if order_id in self.order_map:
             order: Order = self.order_map[order_id]
-            if order.status in [OrderStatus.PENDING, OrderStatus.PROCESSING]:
-                if order.status == OrderStatus.PENDING:
+            if order.status in [
+                OrderStatus.PENDING,
+                OrderStatus.PROCESSING,
+                OrderStatus.PARTIALLY_FILLED,
+            ]:
+                previous_status = order.status
+                order.status = OrderStatus.CANCELLED
+                if previous_status == OrderStatus.PENDING:
                     self.queue.remove(order)
-                elif order.status == OrderStatus.PROCESSING:
-                    # Remove from the appropriate order book
-                    order_book: list[HeapOrder] = (
-                        self.buy_orders
-                        if order.side == OrderSide.BUY
-                        else self.sell_orders
-                    )
-                    order_book: list[HeapOrder] = [
-                        ho for ho in order_book if ho.order.order_id != order_id
-                    ]
-                    heapq.heapify(order_book)
-                    if order.side == OrderSide.BUY:
-                        self.buy_orders = order_book
-                    else:
-                        self.sell_orders = order_book
+                else:
+                    self._remove_from_orderbook(order)
                     self.orderbook_size -= 1
+                    self.depth(order.side).remove(order.price, order.quantity)
+                if self.stats:
+                    self._count_cancel(previous_status)
+                if self.risk:
+                    self.risk.release(order)
 
-                order.status = OrderStatus.CANCELLED
                 del self.order_map[order_id]
+                if self.journal:
+                    self.journal.record_cancel_order(order_id)
                 if self.logger:
-                    self.logger.info(f"Order cancelled: {order_id}")
+                    log_event(self.logger, LogEvent.ORDER_CANCELLED, order_id)
                 return True
+        if self.stats:
+            self.stats.slots[Stat.CANCELS_FAILED] += 1
         if self.logger:
             self.logger.warning(f"Failed to cancel order: {order_id}")
         return False
 
+    def amend_order(
+        self, order_id: str, quantity: int | None = None, price: float | None = None
+    ) -> bool:
+        """
+        Change the quantity and/or price of a PENDING or resting Order, keeping
+        its id. A quantity reduction keeps queue priority in O(1); a price change
+        or a quantity increase moves the Order to the back of its new price level
+        in O(log n). The caller matches again should the new price cross.
+        """
+        order = self.order_map.get(order_id)
+        if (
+            order is None
+            or order.status
+            not in (
+                OrderStatus.PENDING,
+                OrderStatus.PROCESSING,
+                OrderStatus.PARTIALLY_FILLED,
+            )
+            or (quantity is not None and quantity <= 0)
+        ):
+            if self.logger:
+                self.logger.warning(f"Failed to amend order: {order_id}")
+            return False
+
+        old_price, old_quantity = order.price, order.quantity
+        price = old_price if price is None else price
+        quantity = old_quantity if quantity is None else quantity
+        if order.status == OrderStatus.PENDING:
+            order.price, order.quantity = price, quantity
+        elif price == old_price and quantity <= old_quantity:
+            order.quantity = quantity
+            self.depth(order.side).remove(old_price, old_quantity - quantity)
+        else:
+            depth = self.depth(order.side)
+            depth.remove(old_price, old_quantity)
+            order.price, order.quantity = price, quantity
+            self._requeue(order, old_price)
+            depth.add(price, quantity)
+        if self.risk:
+            self.risk.amend(order, old_price, old_quantity)
+
+        if self.journal:
+            self.journal.record_amend_order(order)
+        if self.logger:
+            log_event(
+                self.logger,
+                LogEvent.ORDER_AMENDED,
+                order_id,
+                # CompactOrder prices are ticks
+                price=type(order).to_price(price),
+                first=quantity,
+            )
+        return True
+
+    def expire_order(self, order: Order) -> None:
+        """Cancel the unfilled remainder of an Order that never rests in the book"""
+        order.status = OrderStatus.CANCELLED
+        self.order_map.pop(order.order_id, None)
+        if self.risk:
+            self.risk.release(order)
+        if self.journal:
+            self.journal.record_expire_order(order.order_id)
+        if self.logger:
+            log_event(
+                self.logger,
+                LogEvent.ORDER_EXPIRED,
+                order.order_id,
+                first=order.quantity,
+            )
+
+    def depth(self, side: OrderSide) -> DepthIndex:
+        return self.buy_depth if side == OrderSide.BUY else self.sell_depth
+
+    def resting_orders(self, side: OrderSide) -> Iterator[Order]:
+        """
+        Live resting Orders of side in priority order, walked lazily down the
+        heap so taking k of them costs O(k log k). The book must not change
+        while the iterator is in use.
+        """
+        book = self.buy_orders if side == OrderSide.BUY else self.sell_orders
+        size = len(book)
+        frontier = [(book[0], 0)] if book else []
+        while frontier:
+            entry, index = heapq.heappop(frontier)
+            order = entry.order
+            if (
+                order.status != OrderStatus.CANCELLED
+                and order.sequence == entry.sequence
+            ):
+                yield order
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size:
+                    heapq.heappush(frontier, (book[child], child))
+
+    @property
+    def compaction_stats(self) -> dict[str, int]:
+        return {
+            "buy_tombstones": self.buy_tombstones,
+            "sell_tombstones": self.sell_tombstones,
+            "compactions": self.compactions,
+            "compacted_entries": self.compacted_entries,
+        }
+
+    def _count_cancel(self, previous_status: OrderStatus) -> None:
+        slots = self.stats.slots
+        if previous_status == OrderStatus.PENDING:
+            slots[Stat.CANCELS_PENDING] += 1
+            slots[Stat.QUEUE_LENGTH] = len(self.queue)
+        else:
+            slots[Stat.CANCELS_PROCESSING] += 1
+            slots[Stat.BOOK_DEPTH] = self.orderbook_size
+
+    def _count_pop(self) -> None:
+        self.stats.slots[Stat.HEAP_POPS] += 1
+        self.stats.slots[Stat.BOOK_DEPTH] = self.orderbook_size
+
+    def _requeue(self, order: Order, old_price: float) -> None:
+        """Push a new entry for an amended Order; its old one becomes a tombstone"""
+        self.arrival_sequence += 1
+        order.sequence = self.arrival_sequence
+        if order.side == OrderSide.BUY:
+            heapq.heappush(
+                self.buy_orders, HeapOrder(-order.price, order.sequence, order)
+            )
+        else:
+            heapq.heappush(
+                self.sell_orders, HeapOrder(order.price, order.sequence, order)
+            )
+        self._add_tombstone(order.side)
+
+    def _remove_from_orderbook(self, order: Order) -> None:
+        """Remove a resting Order from the appropriate order book"""
+        if self.lazy_cancel:
+            self._add_tombstone(order.side)
+        else:
+            self._discard_from_orderbook(order)
+
+    def _discard_from_orderbook(self, order: Order) -> None:
+        """Filter an Order out of its order book and restore the heap"""
+        order_book: list[HeapOrder] = (
+            self.buy_orders if order.side == OrderSide.BUY else self.sell_orders
+        )
+        size = len(order_book)
+        order_book: list[HeapOrder] = [
+            ho for ho in order_book if ho.order.order_id != order.order_id
+        ]
+        heapq.heapify(order_book)
+        # Entries left behind by amends went with it
+        stale = size - len(order_book) - 1
+        if order.side == OrderSide.BUY:
+            self.buy_orders = order_book
+            self.buy_tombstones -= stale
+        else:
+            self.sell_orders = order_book
+            self.sell_tombstones -= stale
+
+    def _add_tombstone(self, side: OrderSide) -> None:
+        if side == OrderSide.BUY:
+            self.buy_tombstones += 1
+            if self.buy_tombstones > self.compaction_threshold * len(self.buy_orders):
+                self.buy_orders = self._compact(self.buy_orders, self.buy_tombstones)
+                self.buy_tombstones = 0
+        else:
+            self.sell_tombstones += 1
+            if self.sell_tombstones > self.compaction_threshold * len(self.sell_orders):
+                self.sell_orders = self._compact(self.sell_orders, self.sell_tombstones)
+                self.sell_tombstones = 0
+
+    def _compact(self, order_book: list[HeapOrder], tombstones: int) -> list[HeapOrder]:
+        """Drop every tombstone from the order book in a single pass"""
+        order_book = [
+            ho
+            for ho in order_book
+            if ho.order.status != OrderStatus.CANCELLED
+            and ho.order.sequence == ho.sequence
+        ]
+        heapq.heapify(order_book)
+        self.compactions += 1
+        self.compacted_entries += tombstones
+        return order_book
+
+    def _pop_buy_tombstones(self) -> None:
+        while self.buy_orders and (
+            self.buy_orders[0].order.status == OrderStatus.CANCELLED
+            or self.buy_orders[0].order.sequence != self.buy_orders[0].sequence
+        ):
+            heapq.heappop(self.buy_orders)
+            self.buy_tombstones -= 1
+            if self.stats:
+                self.stats.slots[Stat.TOMBSTONE_POPS] += 1
+
+    def _pop_sell_tombstones(self) -> None:
+        while self.sell_orders and (
+            self.sell_orders[0].order.status == OrderStatus.CANCELLED
+            or self.sell_orders[0].order.sequence != self.sell_orders[0].sequence
+        ):
+            heapq.heappop(self.sell_orders)
+            self.sell_tombstones -= 1
+            if self.stats:
+                self.stats.slots[Stat.TOMBSTONE_POPS] += 1
+
     def get_best_buy_order(self) -> Order | None:
+        if self.buy_tombstones:
+            self._pop_buy_tombstones()
         return self.buy_orders[0].order if self.buy_orders else None
 
     def get_best_sell_order(self) -> Order | None:
+        if self.sell_tombstones:
+            self._pop_sell_tombstones()
         return self.sell_orders[0].order if self.sell_orders else None
 
     def remove_best_buy_order(self) -> Order | None:
+        if self.buy_tombstones:
+            self._pop_buy_tombstones()
         if self.buy_orders:
             heap_order = heapq.heappop(self.buy_orders)
             self.orderbook_size -= 1
+            if self.stats:
+                self._count_pop()
             return heap_order.order
         return None
 
     def remove_best_sell_order(self) -> Order | None:
+        if self.sell_tombstones:
+            self._pop_sell_tombstones()
         if self.sell_orders:
             heap_order = heapq.heappop(self.sell_orders)
             self.orderbook_size -= 1
+            if self.stats:
+                self._count_pop()
             return heap_order.order
         return None
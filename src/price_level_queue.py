@@ -0,0 +1,151 @@
+from collections import OrderedDict
+import heapq
+from typing import Iterator
+from src.order_components import OrderSide, Order
+from src.order_queue import OrderQueue
+from src.logger import Logger
+from src.journal import EventJournal
+from src.retention import RetentionPolicy
+from src.risk import RiskChecker
+from src.instrumentation import StatsPage, Stat
+
+
+class PriceLevelOrderQueue(OrderQueue):
+    """
+    OrderQueue backed by price levels instead of HeapOrder heaps.
+    Each side maps price -> FIFO of orders keyed by order_id, so cancel and
+    amend are O(1). Level prices are kept in a heap (negated for buys) and
+    empty levels are dropped lazily when they reach the top, so a new level
+    costs O(log L) where L is the number of price levels.
+    """
+
+    def __init__(
+        self,
+        logger: Logger | None = None,
+        journal: EventJournal | None = None,
+        retention: RetentionPolicy | None = None,
+        stats: StatsPage | None = None,
+        risk: RiskChecker | None = None,
+    ) -> None:
+        super().__init__(
+            logger, journal=journal, retention=retention, stats=stats, risk=risk
+        )
+        self.buy_levels: dict[float, OrderedDict[str, Order]] = {}
+        self.sell_levels: dict[float, OrderedDict[str, Order]] = {}
+        self._buy_prices: list[float] = []  # max heap
+        self._sell_prices: list[float] = []  # min heap
+        self._buy_price_set: set[float] = set()
+        self._sell_price_set: set[float] = set()
+
+    def update_orderbooks(self, order: Order) -> None:
+        """Appends Order to the back of its price level"""
+        if self.journal:
+            self.journal.record_rest_order(order)
+        self._append_to_level(order)
+        self.depth(order.side).add(order.price, order.quantity)
+        self.orderbook_size += 1
+        if self.stats:
+            self.stats.slots[Stat.HEAP_PUSHES] += 1
+            self.stats.slots[Stat.BOOK_DEPTH] = self.orderbook_size
+
+    def get_best_buy_order(self) -> Order | None:
+        level = self._best_buy_level()
+        return next(iter(level.values())) if level else None
+
+    def get_best_sell_order(self) -> Order | None:
+        level = self._best_sell_level()
+        return next(iter(level.values())) if level else None
+
+    def remove_best_buy_order(self) -> Order | None:
+        level = self._best_buy_level()
+        if level:
+            _, order = level.popitem(last=False)
+            if not level:
+                del self.buy_levels[order.price]
+            self.orderbook_size -= 1
+            if self.stats:
+                self._count_pop()
+            return order
+        return None
+
+    def remove_best_sell_order(self) -> Order | None:
+        level = self._best_sell_level()
+        if level:
+            _, order = level.popitem(last=False)
+            if not level:
+                del self.sell_levels[order.price]
+            self.orderbook_size -= 1
+            if self.stats:
+                self._count_pop()
+            return order
+        return None
+
+    def resting_orders(self, side: OrderSide) -> Iterator[Order]:
+        """Live resting Orders of side in priority order, level by level"""
+        levels = self.buy_levels if side == OrderSide.BUY else self.sell_levels
+        depth = self.depth(side)
+        sign = depth.sign
+        for key in depth.keys:
+            yield from levels[sign * key].values()
+
+    def _requeue(self, order: Order, old_price: float) -> None:
+        """Move an amended Order to the back of its new price level in O(1)"""
+        levels = self.buy_levels if order.side == OrderSide.BUY else self.sell_levels
+        level = levels[old_price]
+        del level[order.order_id]
+        if not level:
+            del levels[old_price]
+        self._append_to_level(order)
+
+    def _append_to_level(self, order: Order) -> None:
+        self.arrival_sequence += 1
+        order.sequence = self.arrival_sequence
+        if order.side == OrderSide.BUY:
+            levels, prices, price_set = (
+                self.buy_levels,
+                self._buy_prices,
+                self._buy_price_set,
+            )
+            heap_price = -order.price
+        else:
+            levels, prices, price_set = (
+                self.sell_levels,
+                self._sell_prices,
+                self._sell_price_set,
+            )
+            heap_price = order.price
+
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = OrderedDict()
+            if order.price not in price_set:
+                price_set.add(order.price)
+                heapq.heappush(prices, heap_price)
+        level[order.order_id] = order
+
+    def _discard_from_orderbook(self, order: Order) -> None:
+        levels = self.buy_levels if order.side == OrderSide.BUY else self.sell_levels
+        level = levels[order.price]
+        del level[order.order_id]
+        if not level:
+            del levels[order.price]
+
+    def _best_buy_level(self) -> OrderedDict[str, Order] | None:
+        while self._buy_prices:
+            price = -self._buy_prices[0]
+            level = self.buy_levels.get(price)
+            if level:
+                return level
+            heapq.heappop(self._buy_prices)
+            self._buy_price_set.discard(price)
+        return None
+
+    def _best_sell_level(self) -> OrderedDict[str, Order] | None:
+        while self._sell_prices:
+            price = self._sell_prices[0]
+            level = self.sell_levels.get(price)
+            if level:
+                return level
+            heapq.heappop(self._sell_prices)
+            self._sell_price_set.discard(price)
+        return None
@@ -0,0 +1,143 @@
+import os
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from src.columnar import write_columns, order_columns, restore_orders, ColumnReader
+from src.order_components import Order, CompactOrder
+
+SEGMENT_PREFIX = "segment-"
+
+
+class OrderArchive:
+    """
+    On-disk columnar archive of evicted orders, one segment file per eviction.
+    Segments are sorted by order id; the index keeps only their sorted ids
+    (8 bytes per order) in memory. A lookup mmaps the segment it needs and
+    decodes just the row it finds; the max_open_segments most recently used
+    segments stay open.
+    Existing segments in directory are indexed on start.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        order_class: type[Order] | type[CompactOrder] = Order,
+        max_open_segments: int = 16,
+    ) -> None:
+        self.directory = directory
+        self.order_class = order_class
+        self.max_open_segments = max_open_segments
+        self.segments: list[tuple[str, array]] = []
+        self.readers: OrderedDict[str, ColumnReader] = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        for name in sorted(os.listdir(directory)):
+            if name.startswith(SEGMENT_PREFIX) and not name.endswith(".tmp"):
+                path = os.path.join(directory, name)
+                reader = ColumnReader(path)
+                try:
+                    ids = array("q", map(int, reader.column("order_id")))
+                finally:
+                    reader.close()
+                self.segments.append((path, ids))
+
+    def __len__(self) -> int:
+        return sum(len(ids) for _, ids in self.segments)
+
+    def append(self, orders: list[Order] | list[CompactOrder]) -> None:
+        if not orders:
+            return
+        orders = sorted(orders, key=lambda order: int(order.order_id))
+        path = os.path.join(
+            self.directory, f"{SEGMENT_PREFIX}{len(self.segments):08d}"
+        )
+        write_columns(path, order_columns(orders, self.order_class))
+        self.segments.append(
+            (path, array("q", [int(order.order_id) for order in orders]))
+        )
+
+    def lookup(self, order_id: str | int) -> Order | CompactOrder | None:
+        """A copy of the archived Order, or None if order_id was never archived."""
+        try:
+            key = int(order_id)
+        except (TypeError, ValueError):
+            return None
+        for path, ids in self.segments:
+            if not ids[0] <= key <= ids[-1]:
+                continue
+            row = bisect_left(ids, key)
+            if ids[row] == key:
+                return restore_orders(self._reader(path).row(row), self.order_class)[0]
+        return None
+
+    def close(self) -> None:
+        for reader in self.readers.values():
+            reader.close()
+        self.readers.clear()
+
+    def _reader(self, path: str) -> ColumnReader:
+        reader = self.readers.get(path)
+        if reader is not None:
+            self.readers.move_to_end(path)
+            return reader
+        if len(self.readers) >= self.max_open_segments:
+            self.readers.popitem(last=False)[1].close()
+        reader = self.readers[path] = ColumnReader(path)
+        return reader
+
+
+class RetentionPolicy:
+    """
+    Bounds the filled orders an OrderQueue keeps in memory, by count and/or by
+    seconds since the fill. Checked once per batch_size fills; the evicted
+    orders leave filled_orders and order_map and are spilled to the archive.
+    """
+
+    def __init__(
+        self,
+        archive: OrderArchive,
+        max_orders: int | None = None,
+        max_age_seconds: float | None = None,
+        batch_size: int = 10_000,
+    ) -> None:
+        self.archive = archive
+        self.max_orders = max_orders
+        self.max_age_seconds = max_age_seconds
+        self.batch_size = batch_size
+        self.fill_times = array("d")
+        self.evicted = 0
+        self._unchecked = 0
+
+    def record_fill(self, order_queue) -> None:
+        if self.max_age_seconds is not None:
+            self.fill_times.append(time.monotonic())
+        self._unchecked += 1
+        if self._unchecked >= self.batch_size:
+            self.enforce(order_queue)
+
+    def enforce(self, order_queue, now: float | None = None) -> int:
+        """Evict every filled order outside the window. Returns how many."""
+        self._unchecked = 0
+        filled_orders = order_queue.filled_orders
+        count = 0
+        if self.max_orders is not None:
+            count = max(count, len(filled_orders) - self.max_orders)
+        if self.max_age_seconds is not None:
+            now = time.monotonic() if now is None else now
+            count = max(
+                count, bisect_left(self.fill_times, now - self.max_age_seconds)
+            )
+        if count <= 0:
+            return 0
+
+        evicted = filled_orders[:count]
+        self.archive.append(evicted)
+        del filled_orders[:count]
+        del self.fill_times[:count]
+        order_map = order_queue.order_map
+        for order in evicted:
+            # An evicted id can no longer be looked up in memory
+            if order_map.get(order.order_id) is order:
+                del order_map[order.order_id]
+        self.evicted += count
+        return count
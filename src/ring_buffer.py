@@ -0,0 +1,77 @@
+import struct
+from multiprocessing import shared_memory
+
+
+class SharedRingBuffer:
+    """
+    Single-producer single-consumer ring of fixed-size records in shared memory.
+    The header holds the read (head) and write (tail) counters; the producer
+    only advances tail and the consumer only advances head, so no lock is needed.
+    Attach from another process with the same name, record_format and capacity.
+
+    Counters go through a 'Q' memoryview: each update is a single 8-byte store,
+    whereas struct.pack_into zero-fills first and can expose a transient 0.
+    """
+
+    HEADER = struct.Struct("QQ")
+
+    def __init__(
+        self,
+        record_format: str,
+        capacity: int,
+        name: str | None = None,
+        create: bool = True,
+    ) -> None:
+        self.record = struct.Struct(record_format)
+        self.capacity = capacity
+        size = self.HEADER.size + self.record.size * capacity
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.buf = self.shm.buf
+        self.counters = self.buf[: self.HEADER.size].cast("Q")
+        if create:
+            self.counters[0] = self.counters[1] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __len__(self) -> int:
+        return self.counters[1] - self.counters[0]
+
+    def put(self, *fields) -> bool:
+        """Write one record. Returns False without writing when the ring is full."""
+        tail = self.counters[1]
+        if tail - self.counters[0] >= self.capacity:
+            return False
+        offset = self.HEADER.size + (tail % self.capacity) * self.record.size
+        self.record.pack_into(self.buf, offset, *fields)
+        # Publish the record only after it is fully written
+        self.counters[1] = tail + 1
+        return True
+
+    def get(self) -> tuple | None:
+        head = self.counters[0]
+        if head == self.counters[1]:
+            return None
+        offset = self.HEADER.size + (head % self.capacity) * self.record.size
+        fields = self.record.unpack_from(self.buf, offset)
+        self.counters[0] = head + 1
+        return fields
+
+    def drain(self) -> list[tuple]:
+        """Read every record published so far."""
+        head, tail = self.counters[0], self.counters[1]
+        records = []
+        for position in range(head, tail):
+            offset = self.HEADER.size + (position % self.capacity) * self.record.size
+            records.append(self.record.unpack_from(self.buf, offset))
+        self.counters[0] = tail
+        return records
+
+    def close(self) -> None:
+        self.counters.release()
+        self.buf = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
@@ -0,0 +1,164 @@
+from enum import Enum, IntEnum
+from src.order_components import OrderType, Order, CompactOrder
+
+MARKET = OrderType.MARKET
+
+
+class RejectReason(IntEnum):
+    PRICE_BAND = 1
+    MAX_QUANTITY = 2
+    OPEN_ORDERS = 3
+    OPEN_NOTIONAL = 4
+
+
+class SelfTradePrevention(Enum):
+    """
+    What MatchEngine does when both sides of a trade belong to one user.
+    The incoming order is the one that arrived last.
+    """
+
+    CANCEL_RESTING = 1
+    CANCEL_INCOMING = 2
+    CANCEL_BOTH = 3
+
+
+class RiskChecker:
+    """
+    Pre-trade checks run by OrderProcessor before an Order reaches the queue:
+    a price band around the last trade (or the mid before any trade), a
+    maximum order quantity, and per-user caps on open orders and notional.
+    Exposure per user is kept in counters that the OrderQueue it is passed to
+    updates on entry, fills, amends, cancels and expiries, so every check is
+    a few dict lookups. A limit of None disables its check.
+    MARKET orders count towards open orders and have their notional checked
+    at the reference price, but hold no notional as they never rest.
+    Notional is in the price units of order_class, i.e. ticks for CompactOrder.
+    """
+
+    def __init__(
+        self,
+        price_band: float | None = None,
+        max_quantity: int | None = None,
+        max_open_orders: int | None = None,
+        max_open_notional: float | None = None,
+        order_class: type[Order] | type[CompactOrder] = Order,
+    ) -> None:
+        self.price_band = price_band
+        self.max_quantity = max_quantity
+        self.max_open_orders = max_open_orders
+        self.max_open_notional = (
+            None
+            if max_open_notional is None
+            else order_class.parse_price(max_open_notional)
+        )
+        self.open_orders: dict[str, int] = {}
+        self.open_notional: dict[str, float] = {}
+        self.last_price: float | None = None
+
+    def check(self, order: Order, order_queue) -> RejectReason | None:
+        """Why order must be rejected, None if it may enter order_queue"""
+        if self.max_quantity is not None and order.quantity > self.max_quantity:
+            return RejectReason.MAX_QUANTITY
+        market = order.order_type is MARKET
+        price_band = self.price_band
+        reference = self.last_price
+        if reference is None and (price_band is not None or market):
+            reference = self.reference_price(order_queue)
+        if (
+            price_band is not None
+            and reference is not None
+            and not market
+            and abs(order.price - reference) > price_band * reference
+        ):
+            return RejectReason.PRICE_BAND
+        user_id = order.user_id
+        if (
+            self.max_open_orders is not None
+            and self.open_orders.get(user_id, 0) >= self.max_open_orders
+        ):
+            return RejectReason.OPEN_ORDERS
+        if self.max_open_notional is not None:
+            price = reference if market else order.price
+            if (
+                price is not None
+                and self.open_notional.get(user_id, 0) + price * order.quantity
+                > self.max_open_notional
+            ):
+                return RejectReason.OPEN_NOTIONAL
+        return None
+
+    def check_amend(
+        self, order: Order, quantity: int, price: float, order_queue
+    ) -> RejectReason | None:
+        """The checks of a new Order for new quantity and price, net of its own"""
+        if self.max_quantity is not None and quantity > self.max_quantity:
+            return RejectReason.MAX_QUANTITY
+        if self.price_band is not None and order.order_type is not MARKET:
+            reference = self.reference_price(order_queue)
+            if (
+                reference is not None
+                and abs(price - reference) > self.price_band * reference
+            ):
+                return RejectReason.PRICE_BAND
+        if self.max_open_notional is not None and (
+            self.open_notional.get(order.user_id, 0)
+            + self._notional(order, quantity, price)
+            - self._notional(order, order.quantity)
+            > self.max_open_notional
+        ):
+            return RejectReason.OPEN_NOTIONAL
+        return None
+
+    def reference_price(self, order_queue) -> float | None:
+        """The last trade price, else the mid of order_queue, else None"""
+        if self.last_price is not None:
+            return self.last_price
+        bid = order_queue.buy_depth.best_price()
+        ask = order_queue.sell_depth.best_price()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def add(self, order: Order) -> None:
+        user_id = order.user_id
+        open_orders = self.open_orders
+        open_orders[user_id] = open_orders.get(user_id, 0) + 1
+        if order.order_type is not MARKET:
+            open_notional = self.open_notional
+            open_notional[user_id] = (
+                open_notional.get(user_id, 0) + order.price * order.quantity
+            )
+
+    def record_fill(
+        self, buy_order: Order, sell_order: Order, price: float, quantity: int
+    ) -> None:
+        """Called once both orders' quantities have been reduced by the fill"""
+        self.last_price = price
+        self.fill(buy_order, quantity)
+        self.fill(sell_order, quantity)
+
+    def fill(self, order: Order, quantity: int) -> None:
+        user_id = order.user_id
+        if order.order_type is not MARKET:
+            self.open_notional[user_id] -= order.price * quantity
+        if order.quantity == 0:
+            self.open_orders[user_id] -= 1
+
+    def amend(self, order: Order, old_price: float, old_quantity: int) -> None:
+        if order.order_type is not MARKET:
+            self.open_notional[order.user_id] += (
+                order.price * order.quantity - old_price * old_quantity
+            )
+
+    def release(self, order: Order) -> None:
+        """The unfilled remainder of a cancelled or expired Order"""
+        user_id = order.user_id
+        self.open_orders[user_id] -= 1
+        if order.order_type is not MARKET:
+            self.open_notional[user_id] -= order.price * order.quantity
+
+    @staticmethod
+    def _notional(order: Order, quantity: int, price: float | None = None) -> float:
+        if order.order_type is MARKET:
+            return 0
+        return (order.price if price is None else price) * quantity
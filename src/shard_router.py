@@ -0,0 +1,224 @@
+import multiprocessing as mp
+import time
+import zlib
+from enum import IntEnum
+from src.order_components import OrderSide, OrderStatus, Order
+from src.order_queue import OrderQueue
+from src.order_processor import OrderProcessor
+from src.match_engine import MatchEngine
+from src.ring_buffer import SharedRingBuffer
+
+
+class ShardMessage(IntEnum):
+    NEW_ORDER = 1
+    CANCEL_ORDER = 2
+
+
+class ShardEvent(IntEnum):
+    FILL = 1
+    STATUS = 2
+
+
+TERMINAL_STATUSES = (OrderStatus.FILLED, OrderStatus.CANCELLED, OrderStatus.REJECTED)
+
+# (event, buy or own client order id, sell client order id, price, quantity or status)
+RESULT_FORMAT = "Bqqdq"
+
+
+class ShardWorker:
+    """
+    The state of one shard: an OrderProcessor per symbol and the client order
+    ids of its live orders. Each fill publishes a FILL record and then a STATUS
+    record for each order it touched. Orders leave the maps once filled,
+    cancelled or rejected.
+    """
+
+    def __init__(self, publish, match_on_arrival: bool) -> None:
+        self.publish = publish
+        self.match_on_arrival = match_on_arrival
+        self.processors: dict[str, OrderProcessor] = {}
+        self.orders: dict[int, Order] = {}
+        self.client_ids: dict[str, int] = {}
+
+    def handle(self, message: tuple) -> None:
+        if message[0] == ShardMessage.NEW_ORDER:
+            self._new_order(*message[1:])
+        elif message[0] == ShardMessage.CANCEL_ORDER:
+            order = self.orders.get(message[1])
+            # The order's own book, whatever symbol the client sent with it
+            processor = self.processors.get(order.symbol) if order else None
+            if processor and processor.cancel_order(order.order_id):
+                self._publish_status(order)
+
+    def _new_order(
+        self,
+        client_id: int,
+        symbol: str,
+        user_id: str,
+        side: int,
+        price: float,
+        quantity: int,
+    ) -> None:
+        processor = self.processors.get(symbol)
+        if processor is None:
+            processor = self.processors[symbol] = OrderProcessor(
+                OrderQueue(), MatchEngine(), match_on_arrival=self.match_on_arrival
+            )
+        order = processor.receive_order(
+            user_id, OrderSide(side), price, quantity, symbol
+        )
+        self.orders[client_id] = order
+        self.client_ids[order.order_id] = client_id
+        client_ids = self.client_ids
+        # The MatchEngine above has no FillSink, so fills hold both Orders.
+        # Resting orders the fills touched, each reported once after the fills
+        touched: dict[str, Order] = {}
+        for buy, sell, fill_price, fill_quantity in processor.process_single_order():
+            self.publish(
+                ShardEvent.FILL,
+                client_ids[buy.order_id],
+                client_ids[sell.order_id],
+                fill_price,
+                fill_quantity,
+            )
+            touched[buy.order_id] = buy
+            touched[sell.order_id] = sell
+        touched.pop(order.order_id, None)
+        for resting in touched.values():
+            self._publish_status(resting)
+        self._publish_status(order)
+
+    def _publish_status(self, order: Order) -> None:
+        client_id = self.client_ids[order.order_id]
+        self.publish(ShardEvent.STATUS, client_id, 0, 0.0, order.status.value)
+        if order.status in TERMINAL_STATUSES:
+            del self.client_ids[order.order_id]
+            del self.orders[client_id]
+
+
+def run_shard(
+    inbox: mp.Queue, ring_name: str, ring_capacity: int, match_on_arrival: bool
+) -> None:
+    """Worker loop owning one OrderQueue + MatchEngine per symbol of its shard."""
+    ring = SharedRingBuffer(RESULT_FORMAT, ring_capacity, name=ring_name, create=False)
+
+    def publish(*fields) -> None:
+        # A full ring waits for the router to drain it
+        while not ring.put(*fields):
+            time.sleep(0)
+
+    worker = ShardWorker(publish, match_on_arrival)
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            break
+        for message in batch:
+            worker.handle(message)
+    ring.close()
+
+
+class ShardRouter:
+    """
+    Shards symbols across worker processes, each owning its own order books.
+    Messages for a shard travel in batches through a single inbox, so per-shard
+    ordering is preserved. Fills and status changes flow back over one
+    SharedRingBuffer per shard, keyed by router-assigned client order ids.
+    """
+
+    def __init__(
+        self,
+        num_shards: int,
+        batch_size: int = 1024,
+        ring_capacity: int = 1 << 16,
+        match_on_arrival: bool = True,
+    ) -> None:
+        self.num_shards = num_shards
+        self.batch_size = batch_size
+        self.ring_capacity = ring_capacity
+        self.match_on_arrival = match_on_arrival
+        self.inboxes: list[mp.Queue] = []
+        self.rings: list[SharedRingBuffer] = []
+        self.workers: list[mp.Process] = []
+        self.pending: list[list[tuple]] = [[] for _ in range(num_shards)]
+        self._next_client_id = 1
+
+    def start(self) -> None:
+        for _ in range(self.num_shards):
+            inbox = mp.Queue()
+            ring = SharedRingBuffer(RESULT_FORMAT, self.ring_capacity)
+            worker = mp.Process(
+                target=run_shard,
+                args=(inbox, ring.name, self.ring_capacity, self.match_on_arrival),
+                daemon=True,
+            )
+            worker.start()
+            self.inboxes.append(inbox)
+            self.rings.append(ring)
+            self.workers.append(worker)
+
+    def shard_for(self, symbol: str) -> int:
+        return zlib.crc32(symbol.encode()) % self.num_shards
+
+    def submit_order(
+        self, symbol: str, user_id: str, side: OrderSide, price: float, quantity: int
+    ) -> int:
+        """Queue a new order for its shard and return its client order id."""
+        client_id = self._next_client_id
+        self._next_client_id += 1
+        self._send(
+            self.shard_for(symbol),
+            (
+                ShardMessage.NEW_ORDER,
+                client_id,
+                symbol,
+                user_id,
+                side.value,
+                price,
+                quantity,
+            ),
+        )
+        return client_id
+
+    def cancel_order(self, symbol: str, client_id: int) -> None:
+        message = (ShardMessage.CANCEL_ORDER, client_id, symbol)
+        self._send(self.shard_for(symbol), message)
+
+    def flush(self) -> None:
+        for shard, messages in enumerate(self.pending):
+            if messages:
+                self.inboxes[shard].put(messages)
+                self.pending[shard] = []
+
+    def poll_results(self) -> list[tuple[int, tuple]]:
+        """Drain fills and status changes published so far as (shard, record)."""
+        return [
+            (shard, record)
+            for shard, ring in enumerate(self.rings)
+            for record in ring.drain()
+        ]
+
+    def stop(self) -> list[tuple[int, tuple]]:
+        """Stop every worker once its inbox is processed and return the last results."""
+        self.flush()
+        for inbox in self.inboxes:
+            inbox.put(None)
+        results = []
+        # Keep draining so that no worker stays blocked on a full ring
+        while any(worker.is_alive() for worker in self.workers):
+            results.extend(self.poll_results())
+            for worker in self.workers:
+                worker.join(timeout=0.001)
+        results.extend(self.poll_results())
+
+        for ring in self.rings:
+            ring.close()
+            ring.unlink()
+        self.inboxes, self.rings, self.workers = [], [], []
+        return results
+
+    def _send(self, shard: int, message: tuple) -> None:
+        messages = self.pending[shard]
+        messages.append(message)
+        if len(messages) >= self.batch_size:
+            self.inboxes[shard].put(messages)
+            self.pending[shard] = []
@@ -0,0 +1,242 @@
+import hashlib
+import math
+import mmap
+import os
+import random
+import struct
+from enum import IntEnum
+from typing import Iterable, Iterator
+from src.order_components import (
+    OrderSide,
+    OrderStatus,
+    OrderType,
+    CompactOrder,
+    SIDES_BY_VALUE,
+)
+from src.order_processor import OrderProcessor
+
+
+class SimulationEvent(IntEnum):
+    NEW_ORDER = 1
+    CANCEL_ORDER = 2
+
+
+# virtual time in ns, event, side, price, quantity, user id, and for cancels
+# the index of the cancelled order among the stream's new orders
+SIMULATION_RECORD = struct.Struct("<QBBdq16sq")
+
+NANOSECONDS = 1_000_000_000
+
+
+class OrderFlow:
+    """
+    Seeded model of order flow on a virtual clock. New orders arrive as a
+    Poisson process of arrival_rate per second, priced around a mid that
+    drifts as a geometric random walk of volatility per square-root second.
+    Cancels are a second Poisson process of cancel_rate per second, each
+    aimed at one of the last cancel_window orders. The same seed always
+    yields the same events.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        arrival_rate: float = 100.0,
+        cancel_rate: float = 30.0,
+        mid: float = 100.0,
+        volatility: float = 0.001,
+        price_spread: float = 0.5,
+        tick_size: float = 0.01,
+        max_quantity: int = 20,
+        users: int = 100,
+        cancel_window: int = 1000,
+    ) -> None:
+        self.seed = seed
+        self.arrival_rate = arrival_rate
+        self.cancel_rate = cancel_rate
+        self.mid = mid
+        self.volatility = volatility
+        self.price_spread = price_spread
+        self.tick_size = tick_size
+        self.max_quantity = max_quantity
+        self.user_ids = [f"user{user}" for user in range(1, users + 1)]
+        self.cancel_window = cancel_window
+
+    def events(self, duration: float) -> Iterator[tuple]:
+        """Events of the first duration virtual seconds, in time order"""
+        rng = random.Random(self.seed)
+        expovariate, gauss, randrange = rng.expovariate, rng.gauss, rng.randrange
+        end = int(duration * NANOSECONDS)
+        mid = self.mid
+        tick_size = self.tick_size
+        buy, sell = OrderSide.BUY.value, OrderSide.SELL.value
+        new_order = SimulationEvent.NEW_ORDER
+        cancel_order = SimulationEvent.CANCEL_ORDER
+        next_arrival = int(expovariate(self.arrival_rate) * NANOSECONDS)
+        next_cancel = (
+            int(expovariate(self.cancel_rate) * NANOSECONDS)
+            if self.cancel_rate
+            else end
+        )
+        now = 0
+        orders = 0
+
+        while True:
+            if next_arrival <= next_cancel:
+                if next_arrival >= end:
+                    return
+                elapsed = (next_arrival - now) / NANOSECONDS
+                now = next_arrival
+                mid *= math.exp(self.volatility * math.sqrt(elapsed) * gauss(0, 1))
+                price = round(gauss(mid, self.price_spread) / tick_size) * tick_size
+                yield (
+                    now,
+                    new_order,
+                    buy if rng.random() < 0.5 else sell,
+                    round(max(price, tick_size), 10),
+                    randrange(1, self.max_quantity + 1),
+                    self.user_ids[randrange(len(self.user_ids))],
+                    0,
+                )
+                orders += 1
+                next_arrival = now + int(expovariate(self.arrival_rate) * NANOSECONDS)
+            else:
+                if next_cancel >= end:
+                    return
+                now = next_cancel
+                if orders:
+                    target = randrange(max(0, orders - self.cancel_window), orders)
+                    yield now, cancel_order, 0, 0.0, 0, "", target
+                next_cancel = now + int(expovariate(self.cancel_rate) * NANOSECONDS)
+
+
+def write_order_stream(path: str, events: Iterable[tuple]) -> int:
+    """Record events, e.g. from OrderFlow.events, for replay; returns the count"""
+    pack = SIMULATION_RECORD.pack
+    count = 0
+    with open(path, "wb") as file:
+        buffer = bytearray()
+        for time_ns, event, side, price, quantity, user_id, target in events:
+            buffer += pack(
+                time_ns, event, side, price, quantity, user_id.encode(), target
+            )
+            count += 1
+            if len(buffer) >= 1 << 20:
+                file.write(buffer)
+                buffer.clear()
+        file.write(buffer)
+    return count
+
+
+def read_order_stream(path: str) -> Iterator[tuple]:
+    """Yields the events write_order_stream recorded, as OrderFlow.events does"""
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        usable = size - size % SIMULATION_RECORD.size
+        if not usable:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            data = memoryview(view)[:usable]
+            try:
+                for time_ns, event, side, price, quantity, user_id, target in (
+                    SIMULATION_RECORD.iter_unpack(data)
+                ):
+                    yield (
+                        time_ns,
+                        event,
+                        side,
+                        price,
+                        quantity,
+                        user_id.rstrip(b"\0").decode(),
+                        target,
+                    )
+            finally:
+                data.release()
+
+
+class Simulator:
+    """
+    Drives an OrderProcessor from simulated or recorded events as fast as
+    they can be processed. Each order is stamped with the virtual time of its
+    event instead of the wall clock, and matched before the next event, so a
+    run depends on nothing but its events. digest() summarises every fill in
+    order to compare runs.
+    Order ids restart from the id generator's first, so the processor should
+    start with an empty book.
+    """
+
+    def __init__(self, order_processor: OrderProcessor) -> None:
+        self.order_processor = order_processor
+        order_processor.order_class.reset_id_generator()
+        self.now = 0
+        self.order_ids: list[str | int] = []
+        self.submitted = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.fills = 0
+        self._digest = hashlib.blake2b(digest_size=16)
+
+    def run(self, events: Iterable[tuple]) -> int:
+        """Apply events in order; returns how many were applied"""
+        order_processor = self.order_processor
+        order_class = order_processor.order_class
+        queue = order_processor.order_queue.queue
+        restore = order_class.restore
+        generate_id = order_class.id_generator.generate_id
+        parse_price = order_class.parse_price
+        decode_timestamp = order_class.decode_timestamp
+        submit_order = order_processor.submit_order
+        cancel_order = order_processor.cancel_order
+        process_single_order = order_processor.process_single_order
+        order_ids = self.order_ids
+        sides = SIDES_BY_VALUE
+        pending, limit = OrderStatus.PENDING, OrderType.LIMIT
+        new_order, rejected = SimulationEvent.NEW_ORDER, OrderStatus.REJECTED
+        # Order timestamps count microseconds, CompactOrder ones nanoseconds
+        scale = 1 if issubclass(order_class, CompactOrder) else 1000
+        applied = 0
+
+        for time_ns, event, side, price, quantity, user_id, target in events:
+            self.now = time_ns
+            applied += 1
+            if event == new_order:
+                order = restore(
+                    generate_id(),
+                    user_id,
+                    sides[side],
+                    parse_price(price),
+                    quantity,
+                    pending,
+                    decode_timestamp(time_ns // scale),
+                    "",
+                    limit,
+                )
+                submit_order(order)
+                order_ids.append(order.order_id)
+                self.submitted += 1
+                if order.status is rejected:
+                    self.rejected += 1
+                while queue:
+                    self._record_fills(process_single_order())
+            elif cancel_order(order_ids[target]):
+                self.cancelled += 1
+        return applied
+
+    def digest(self) -> str:
+        """Hex digest of the fills so far, equal for runs that filled alike"""
+        return self._digest.hexdigest()
+
+    def _record_fills(self, matches) -> None:
+        if not matches:
+            return
+        self.fills += len(matches)
+        update = self._digest.update
+        if type(matches) is list:
+            for buy_order, sell_order, price, quantity in matches:
+                update(
+                    f"{buy_order.order_id},{sell_order.order_id},{price},{quantity};"
+                    .encode()
+                )
+        else:
+            for buy_id, sell_id, price, quantity in matches:
+                update(f"{buy_id},{sell_id},{price},{quantity};".encode())
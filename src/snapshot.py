@@ -0,0 +1,216 @@
+import heapq
+import os
+from collections import deque
+from array import array
+from itertools import chain, repeat
+from operator import attrgetter, neg
+from src.columnar import (
+    write_columns,
+    read_columns,
+    order_columns,
+    restore_orders,
+    gc_paused,
+)
+from src.journal import replay_journal
+from src.order_components import OrderStatus, Order, CompactOrder
+from src.order_queue import OrderQueue, HeapOrder
+from src.price_level_queue import PriceLevelOrderQueue
+
+SECTIONS = ("queue", "buy_orders", "sell_orders")
+
+
+def _check_supported(order_queue: OrderQueue) -> None:
+    if isinstance(order_queue, PriceLevelOrderQueue):
+        raise ValueError("Snapshots do not support PriceLevelOrderQueue")
+
+
+def capture_snapshot(
+    order_queue: OrderQueue, order_class: type[Order] | type[CompactOrder] = Order
+) -> tuple[dict, dict]:
+    """
+    Columns of every queued Order: the intake queue in FIFO order followed by both
+    heaps in their internal layout, tombstones included, so a restore needs no
+    re-heapify and later matches break price ties exactly like the original.
+    Entries left behind by amends are dropped instead, as their Order has moved
+    on; the restore then re-heapifies.
+    """
+    _check_supported(order_queue)
+    buy_orders, sell_orders = order_queue.buy_orders, order_queue.sell_orders
+    buy_tombstones = order_queue.buy_tombstones
+    sell_tombstones = order_queue.sell_tombstones
+    heapify = any(
+        ho.order.sequence != ho.sequence for ho in chain(buy_orders, sell_orders)
+    )
+    if heapify:
+        buy_orders = [ho for ho in buy_orders if ho.order.sequence == ho.sequence]
+        sell_orders = [ho for ho in sell_orders if ho.order.sequence == ho.sequence]
+        buy_tombstones -= len(order_queue.buy_orders) - len(buy_orders)
+        sell_tombstones -= len(order_queue.sell_orders) - len(sell_orders)
+    sections = {
+        "queue": list(order_queue.queue),
+        "buy_orders": [ho.order for ho in buy_orders],
+        "sell_orders": [ho.order for ho in sell_orders],
+    }
+    orders = [order for section in SECTIONS for order in sections[section]]
+    columns = order_columns(orders, order_class)
+    columns["sequence"] = array(
+        "q",
+        chain(
+            repeat(0, len(sections["queue"])),
+            (ho.sequence for ho in buy_orders),
+            (ho.sequence for ho in sell_orders),
+        ),
+    )
+    journal = order_queue.journal
+    metadata = {
+        "order_class": order_class.__name__,
+        "next_id": order_class.id_generator.next_id,
+        "journal_sequence": journal.sequence if journal else None,
+        "sections": {section: len(sections[section]) for section in SECTIONS},
+        "orderbook_size": order_queue.orderbook_size,
+        "arrival_sequence": order_queue.arrival_sequence,
+        "tombstones": [buy_tombstones, sell_tombstones],
+        "heapify": heapify,
+        "depth": [order_queue.buy_depth.levels(), order_queue.sell_depth.levels()],
+    }
+    return metadata, columns
+
+
+def write_snapshot(
+    order_queue: OrderQueue,
+    path: str,
+    order_class: type[Order] | type[CompactOrder] = Order,
+) -> None:
+    if order_queue.journal:
+        order_queue.journal.flush()
+    metadata, columns = capture_snapshot(order_queue, order_class)
+    write_columns(path, columns, metadata)
+
+
+def take_snapshot(
+    order_queue: OrderQueue,
+    path: str,
+    order_class: type[Order] | type[CompactOrder] = Order,
+    fork: bool = True,
+) -> int | None:
+    """
+    Writes a snapshot from a forked child, which sees a copy-on-write image of
+    the book, so matching only pauses for the fork itself.
+    Returns the child pid to pass to wait_for_snapshot, or None when written inline.
+    """
+    _check_supported(order_queue)
+    if order_queue.journal:
+        # Buffered records must not be written by both processes
+        order_queue.journal.flush()
+    if not fork or not hasattr(os, "fork"):
+        write_snapshot(order_queue, path, order_class)
+        return None
+
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            metadata, columns = capture_snapshot(order_queue, order_class)
+            write_columns(path, columns, metadata)
+            status = 0
+        finally:
+            os._exit(status)
+    return pid
+
+
+def wait_for_snapshot(pid: int | None) -> bool:
+    if pid is None:
+        return True
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status) == 0
+
+
+def load_snapshot(
+    path: str,
+    order_queue: OrderQueue,
+    order_class: type[Order] | type[CompactOrder] = Order,
+) -> int:
+    """
+    Restores a snapshot into an empty order_queue.
+    Returns the journal sequence to resume replay_journal from.
+    """
+    _check_supported(order_queue)
+    metadata, columns = read_columns(path)
+    if metadata["order_class"] != order_class.__name__:
+        raise ValueError(
+            f"Snapshot holds {metadata['order_class']}, not {order_class.__name__}"
+        )
+
+    # Every object built below survives, so collecting meanwhile is wasted
+    with gc_paused():
+        _restore_book(columns, metadata, order_queue, order_class)
+
+    order_queue.orderbook_size = metadata["orderbook_size"]
+    order_queue.arrival_sequence = metadata["arrival_sequence"]
+    order_queue.buy_tombstones, order_queue.sell_tombstones = metadata["tombstones"]
+    buy_levels, sell_levels = metadata["depth"]
+    order_queue.buy_depth.load(buy_levels)
+    order_queue.sell_depth.load(sell_levels)
+    order_class.id_generator.advance_past(metadata["next_id"] - 1)
+    return metadata["journal_sequence"] or 0
+
+
+def _restore_book(
+    columns: dict,
+    metadata: dict,
+    order_queue: OrderQueue,
+    order_class: type[Order] | type[CompactOrder],
+) -> None:
+    orders = restore_orders(columns, order_class)
+    prices, sequences = columns["price"], columns["sequence"]
+
+    counts = metadata["sections"]
+    queue_end = counts["queue"]
+    buy_end = queue_end + counts["buy_orders"]
+    order_queue.queue.extend(orders[:queue_end])
+    # tuple.__new__ skips the Python-level __new__ of the NamedTuple
+    order_queue.buy_orders = list(
+        map(
+            tuple.__new__,
+            repeat(HeapOrder),
+            zip(
+                map(neg, prices[queue_end:buy_end]),
+                sequences[queue_end:buy_end],
+                orders[queue_end:buy_end],
+            ),
+        )
+    )
+    order_queue.sell_orders = list(
+        map(
+            tuple.__new__,
+            repeat(HeapOrder),
+            zip(prices[buy_end:], sequences[buy_end:], orders[buy_end:]),
+        )
+    )
+    if metadata["heapify"]:
+        heapq.heapify(order_queue.buy_orders)
+        heapq.heapify(order_queue.sell_orders)
+    # Order.sequence tells a live heap entry from one an amend left behind
+    deque(
+        map(setattr, orders[queue_end:], repeat("sequence"), sequences[queue_end:]),
+        maxlen=0,
+    )
+    order_queue.order_map.update(zip(map(attrgetter("order_id"), orders), orders))
+    if any(metadata["tombstones"]):
+        for order in orders[queue_end:]:
+            if order.status == OrderStatus.CANCELLED:
+                del order_queue.order_map[order.order_id]
+
+
+def recover(
+    snapshot_path: str,
+    journal_path: str,
+    order_queue: OrderQueue,
+    order_class: type[Order] | type[CompactOrder] = Order,
+) -> int:
+    """
+    Loads the snapshot, then replays only the journal events written after it.
+    Returns the number of events replayed.
+    """
+    sequence = load_snapshot(snapshot_path, order_queue, order_class)
+    return replay_journal(journal_path, order_queue, order_class, sequence)
@@ -0,0 +1,178 @@
+import logging
+import unittest
+from unittest.mock import Mock
+from src.auction_engine import AuctionEngine
+from src.match_engine import MatchEngine
+from src.order_queue import OrderQueue
+from src.order_processor import OrderProcessor
+from src.order_components import (
+    Order,
+    CompactOrder,
+    OrderSide,
+    OrderStatus,
+    OrderType,
+)
+from src.risk import SelfTradePrevention
+
+
+class TestAuctionEngine(unittest.TestCase):
+    def setUp(self):
+        self.auction_engine = AuctionEngine()
+        self.order_queue = OrderQueue()
+        Order.reset_id_generator()
+
+    def _add(self, *orders):
+        for order in orders:
+            self.order_queue.add_order(order)
+
+    def test_uncross(self):
+        buy1 = Order(1, OrderSide.BUY, 102, 10)
+        buy2 = Order(2, OrderSide.BUY, 101, 5)
+        buy3 = Order(3, OrderSide.BUY, 100, 10)
+        sell1 = Order(4, OrderSide.SELL, 99, 8)
+        sell2 = Order(5, OrderSide.SELL, 100, 10)
+        sell3 = Order(6, OrderSide.SELL, 101, 10)
+        self._add(buy1, buy2, buy3, sell1, sell2, sell3)
+
+        price, matches = self.auction_engine.uncross(self.order_queue)
+
+        self.assertEqual(price, 100)
+        self.assertEqual(
+            matches,
+            [
+                (buy1, sell1, 100, 8),
+                (buy1, sell2, 100, 2),
+                (buy2, sell2, 100, 5),
+                (buy3, sell2, 100, 3),
+            ],
+        )
+        self.assertEqual(len(self.order_queue.queue), 0)
+        self.assertEqual(len(self.order_queue.filled_orders), 4)
+        self.assertEqual(buy3.status, OrderStatus.PARTIALLY_FILLED)
+        self.assertEqual(sell3.status, OrderStatus.PROCESSING)
+        self.assertEqual(self.order_queue.get_best_buy_order(), buy3)
+        self.assertEqual(self.order_queue.get_best_sell_order(), sell3)
+        self.assertEqual(self.order_queue.orderbook_size, 2)
+
+    def test_minimum_imbalance(self):
+        self._add(
+            Order(1, OrderSide.BUY, 101, 10),
+            Order(2, OrderSide.BUY, 100, 2),
+            Order(3, OrderSide.SELL, 100, 10),
+            Order(4, OrderSide.SELL, 101, 4),
+        )
+
+        price, volume = AuctionEngine.find_clearing_price(
+            [o for o in self.order_queue.queue if o.side == OrderSide.BUY],
+            [o for o in self.order_queue.queue if o.side == OrderSide.SELL],
+        )
+
+        # 10 units are executable at both prices, 100 leaves the lower imbalance
+        self.assertEqual((price, volume), (100, 10))
+
+    def test_no_cross(self):
+        self._add(Order(1, OrderSide.BUY, 99, 10), Order(2, OrderSide.SELL, 100, 10))
+
+        price, matches = self.auction_engine.uncross(self.order_queue)
+
+        self.assertIsNone(price)
+        self.assertEqual(matches, [])
+        self.assertEqual(self.order_queue.orderbook_size, 2)
+
+    def test_fill_or_kill_never_partially_fills(self):
+        fok = Order(1, OrderSide.BUY, 101, 10, order_type=OrderType.FOK)
+        limit = Order(2, OrderSide.BUY, 100, 4)
+        sell = Order(3, OrderSide.SELL, 100, 4)
+        self._add(fok, limit, sell)
+
+        price, matches = self.auction_engine.uncross(self.order_queue)
+
+        self.assertEqual((price, matches), (100, [(limit, sell, 100, 4)]))
+        self.assertEqual((fok.status, fok.quantity), (OrderStatus.CANCELLED, 10))
+        self.assertNotIn(fok.order_id, self.order_queue.order_map)
+        self.assertEqual(self.order_queue.orderbook_size, 0)
+
+    def test_post_only_never_takes_liquidity(self):
+        crossing = Order(1, OrderSide.BUY, 101, 5, order_type=OrderType.POST_ONLY)
+        passive = Order(2, OrderSide.BUY, 99, 5, order_type=OrderType.POST_ONLY)
+        sell = Order(3, OrderSide.SELL, 100, 5)
+        self._add(crossing, passive, sell)
+
+        price, matches = self.auction_engine.uncross(self.order_queue)
+
+        self.assertEqual((price, matches), (None, []))
+        self.assertEqual(crossing.status, OrderStatus.CANCELLED)
+        self.assertEqual(self.order_queue.get_best_buy_order(), passive)
+        self.assertEqual(self.order_queue.get_best_sell_order(), sell)
+
+    def test_post_only_crossing_resting_book(self):
+        self.order_queue.update_orderbooks(Order(1, OrderSide.SELL, 100, 5))
+        post_only = Order(2, OrderSide.BUY, 100, 5, order_type=OrderType.POST_ONLY)
+        self._add(post_only)
+
+        self.auction_engine.uncross(self.order_queue)
+
+        self.assertEqual(post_only.status, OrderStatus.CANCELLED)
+        self.assertIsNone(self.order_queue.get_best_buy_order())
+
+    def test_self_trade_prevention(self):
+        expected = {
+            SelfTradePrevention.CANCEL_RESTING: (OrderStatus.CANCELLED, 1),
+            SelfTradePrevention.CANCEL_INCOMING: (OrderStatus.PROCESSING, 0),
+            SelfTradePrevention.CANCEL_BOTH: (OrderStatus.CANCELLED, 0),
+        }
+        for mode, (own_sell_status, fills) in expected.items():
+            with self.subTest(mode=mode):
+                order_queue = OrderQueue()
+                own_sell = Order("user1", OrderSide.SELL, 100, 5)
+                other_sell = Order("user2", OrderSide.SELL, 100, 5)
+                buy = Order("user1", OrderSide.BUY, 101, 5)
+                for order in (own_sell, other_sell, buy):
+                    order_queue.add_order(order)
+
+                price, matches = AuctionEngine(
+                    self_trade_prevention=mode
+                ).uncross(order_queue)
+
+                self.assertEqual(own_sell.status, own_sell_status)
+                self.assertTrue(
+                    all(match[0].user_id != match[1].user_id for match in matches)
+                )
+                self.assertEqual(len(matches), fills)
+                if fills:
+                    self.assertEqual(matches, [(buy, other_sell, 100, 5)])
+                else:
+                    self.assertEqual(buy.status, OrderStatus.CANCELLED)
+                    self.assertIsNone(price)
+
+    def test_log_in_price_units(self):
+        CompactOrder.set_tick_size(0.01)
+        logger = Mock(spec=logging.Logger)
+        self._add(
+            CompactOrder("user1", OrderSide.BUY, 100.5, 10),
+            CompactOrder("user2", OrderSide.SELL, 100.5, 10),
+        )
+
+        AuctionEngine(logger).uncross(self.order_queue)
+
+        logger.info.assert_called_once_with(
+            "-- Auction: 2 orders uncrossed 10 units at $100.50"
+        )
+
+    def test_process_auction_then_continuous(self):
+        order_processor = OrderProcessor(self.order_queue, MatchEngine())
+        order_processor.receive_order("user1", OrderSide.BUY, 100.0, 10)
+        order_processor.receive_order("user2", OrderSide.SELL, 99.0, 4)
+
+        self.assertEqual(order_processor.process_auction(), 99.0)
+        self.assertEqual(order_processor.transactions, 1)
+
+        order_processor.receive_order("user3", OrderSide.SELL, 100.0, 6)
+        order_processor.process_orders()
+
+        self.assertEqual(order_processor.transactions, 2)
+        self.assertEqual(self.order_queue.orderbook_size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+from src.benchmark import (
+    WORKLOADS,
+    COMPONENTS,
+    generate_workload,
+    percentile,
+    latency_histogram,
+    run_suite,
+    compare_results,
+    main,
+)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_workloads_are_reproducible(self):
+        for name in WORKLOADS:
+            workload = generate_workload(name, 200, seed=3)
+            self.assertEqual(len(workload), 200)
+            self.assertEqual(workload, generate_workload(name, 200, seed=3))
+            self.assertNotEqual(workload, generate_workload(name, 200, seed=4))
+
+    def test_cancels_refer_to_earlier_orders(self):
+        workload = generate_workload("cancel_heavy", 500)
+        cancels = [operation for operation in workload if operation[0] == "cancel"]
+        self.assertGreater(len(cancels), 100)
+        for index, operation in enumerate(workload):
+            if operation[0] == "cancel":
+                self.assertLess(operation[1], index)
+                self.assertEqual(workload[operation[1]][0], "new")
+
+    def test_percentile_and_histogram(self):
+        values = list(range(1, 1001))
+        self.assertEqual(percentile(values, 0.5), 501)
+        self.assertEqual(percentile(values, 0.999), 1000)
+        self.assertEqual(percentile([], 0.5), 0)
+        self.assertEqual(
+            latency_histogram([1, 2, 3, 4, 5]), [[1, 1], [2, 1], [4, 2], [8, 1]]
+        )
+
+    def test_suite_results(self):
+        report = run_suite(300, workloads=["sweep"], isolate=False)
+
+        self.assertEqual(report["metadata"]["operations"], 300)
+        self.assertEqual(
+            [result["component"] for result in report["results"]], list(COMPONENTS)
+        )
+        for result in report["results"]:
+            self.assertEqual(result["operations"], 300)
+            self.assertGreater(result["throughput_ops"], 0)
+            self.assertLessEqual(
+                result["latency_ns"]["p50"], result["latency_ns"]["p99.9"]
+            )
+            self.assertEqual(sum(count for _, count in result["histogram_ns"]), 300)
+            self.assertGreater(result["peak_rss_kb"], 0)
+
+        comparison = compare_results(report, report)
+        self.assertEqual(len(comparison), len(COMPONENTS))
+        self.assertEqual(comparison[0]["throughput_ratio"], 1.0)
+
+    def test_compare_with_zero_baseline_throughput(self):
+        result = {
+            "workload": "uniform",
+            "component": "order_queue",
+            "order_class": "Order",
+            "throughput_ops": 1000.0,
+            "latency_ns": {"p99": 500},
+        }
+        baseline = dict(result, throughput_ops=0.0, latency_ns={"p99": 0})
+
+        [row] = compare_results({"results": [baseline]}, {"results": [result]})
+        self.assertIsNone(row["throughput_ratio"])
+        self.assertEqual(row["p99_ratio"], 500)
+
+    def test_main_writes_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.json")
+            options = ["--operations", "100", "--workloads", "uniform"]
+            options += ["--components", "order_queue", "--output", path]
+            main(options + ["--order-classes", "Order", "CompactOrder"])
+            main(options + ["--compare", path])
+            with open(path, encoding="utf-8") as file:
+                report = json.load(file)
+
+        self.assertEqual(len(report["results"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import random
+import sys
+import threading
+import time
+import unittest
+from src.book_query import BookQuery
+from src.match_engine import MatchEngine
+from src.order_components import Order, OrderSide, OrderStatus
+from src.order_processor import OrderProcessor
+from src.order_queue import OrderQueue
+
+
+def heap_levels(order_book, side: OrderSide) -> list[tuple]:
+    """Levels the slow way, by sorting every live heap entry"""
+    levels = {}
+    for entry in order_book:
+        order = entry.order
+        if order.status != OrderStatus.CANCELLED and order.sequence == entry.sequence:
+            levels[order.price] = levels.get(order.price, 0) + order.quantity
+    return sorted(levels.items(), reverse=side == OrderSide.BUY)
+
+
+class TestBookQuery(unittest.TestCase):
+    def setUp(self):
+        Order.reset_id_generator()
+        self.order_queue = OrderQueue()
+        self.order_processor = OrderProcessor(self.order_queue, MatchEngine())
+        self.query = BookQuery(self.order_queue)
+
+    def _rest(self, orders):
+        for side, price, quantity in orders:
+            self.order_processor.receive_order("user1", side, price, quantity)
+        self.order_processor.process_orders()
+
+    def test_empty_book(self):
+        self.assertIsNone(self.query.best_bid())
+        self.assertIsNone(self.query.best_ask())
+        self.assertIsNone(self.query.spread())
+        self.assertEqual(self.query.depth(OrderSide.BUY), [])
+        self.assertEqual(self.query.cumulative_quantity(OrderSide.SELL, 100), 0)
+        self.assertIsNone(self.query.vwap(OrderSide.SELL, 1))
+
+    def test_top_spread_and_depth(self):
+        self._rest(
+            [
+                (OrderSide.BUY, 99.0, 5),
+                (OrderSide.BUY, 98.0, 3),
+                (OrderSide.BUY, 99.0, 2),
+                (OrderSide.SELL, 101.0, 4),
+                (OrderSide.SELL, 102.5, 6),
+            ]
+        )
+
+        self.assertEqual(self.query.best_bid(), (99.0, 7))
+        self.assertEqual(self.query.best_ask(), (101.0, 4))
+        self.assertEqual(self.query.top(), ((99.0, 7), (101.0, 4)))
+        self.assertEqual(self.query.spread(), 2.0)
+        self.assertEqual(self.query.depth(OrderSide.BUY), [(99.0, 7), (98.0, 3)])
+        self.assertEqual(self.query.depth(OrderSide.SELL, 1), [(101.0, 4)])
+        self.assertEqual(self.query.cumulative_quantity(OrderSide.BUY, 98.5), 7)
+        self.assertEqual(self.query.cumulative_quantity(OrderSide.SELL, 103), 10)
+
+    def test_vwap(self):
+        self._rest([(OrderSide.SELL, 100.0, 4), (OrderSide.SELL, 102.0, 6)])
+
+        self.assertEqual(self.query.vwap(OrderSide.SELL, 2), 100.0)
+        self.assertEqual(self.query.vwap(OrderSide.SELL, 8), (400 + 408) / 8)
+        self.assertEqual(self.query.vwap(OrderSide.SELL, 10), 101.2)
+        self.assertIsNone(self.query.vwap(OrderSide.SELL, 11))
+        with self.assertRaises(ValueError):
+            self.query.vwap(OrderSide.SELL, 0)
+
+    def test_matches_heaps_after_random_flow(self):
+        rng = random.Random(3)
+        for _ in range(2_000):
+            order = self.order_processor.receive_order(
+                f"user{rng.randint(1, 5)}",
+                rng.choice([OrderSide.BUY, OrderSide.SELL]),
+                round(rng.uniform(95, 105), 1),
+                rng.randint(1, 20),
+            )
+            if rng.random() < 0.2:
+                self.order_processor.cancel_order(order.order_id)
+            self.order_processor.process_single_order()
+        self.order_processor.process_orders()
+
+        buys = heap_levels(self.order_queue.buy_orders, OrderSide.BUY)
+        sells = heap_levels(self.order_queue.sell_orders, OrderSide.SELL)
+        self.assertEqual(self.query.depth(OrderSide.BUY), buys)
+        self.assertEqual(self.query.depth(OrderSide.SELL), sells)
+        self.assertEqual(self.query.spread(), sells[0][0] - buys[0][0])
+        self.assertEqual(
+            self.query.cumulative_quantity(OrderSide.SELL, sells[2][0]),
+            sum(quantity for _, quantity in sells[:3]),
+        )
+
+    def test_waits_out_a_change_in_progress(self):
+        self._rest([(OrderSide.BUY, 99.0, 5)])
+        buy_depth = self.order_queue.buy_depth
+        buy_depth.version += 1
+        results = []
+        reader = threading.Thread(target=lambda: results.append(self.query.best_bid()))
+        reader.start()
+        time.sleep(0.05)
+
+        self.assertTrue(reader.is_alive())
+        buy_depth.quantities[99.0] = 8
+        buy_depth.version += 1
+        reader.join()
+        self.assertEqual(results, [(99.0, 8)])
+        self.assertGreater(self.query.retries, 0)
+
+    def test_monitoring_thread_while_matching(self):
+        stop = threading.Event()
+        errors = []
+        queries = []
+
+        def monitor():
+            while not stop.is_set():
+                try:
+                    for side in (OrderSide.BUY, OrderSide.SELL):
+                        levels = self.query.depth(side, 20)
+                        prices = [price for price, _ in levels]
+                        if prices != sorted(prices, reverse=side == OrderSide.BUY):
+                            errors.append(("unsorted", levels))
+                        if any(quantity <= 0 for _, quantity in levels):
+                            errors.append(("empty level", levels))
+                        self.query.vwap(side, 50)
+                    self.query.spread()
+                    queries.append(1)
+                except Exception as error:
+                    errors.append(error)
+
+        # Switch threads often, so queries interleave with changes to the book
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        thread = threading.Thread(target=monitor)
+        thread.start()
+        try:
+            rng = random.Random(5)
+            for _ in range(20_000):
+                order = self.order_processor.receive_order(
+                    "user1",
+                    rng.choice([OrderSide.BUY, OrderSide.SELL]),
+                    round(rng.uniform(95, 105), 1),
+                    rng.randint(1, 20),
+                )
+                if rng.random() < 0.2:
+                    self.order_processor.cancel_order(order.order_id)
+                self.order_processor.process_single_order()
+        finally:
+            stop.set()
+            thread.join()
+            sys.setswitchinterval(switch_interval)
+
+        self.assertEqual(errors, [])
+        self.assertGreater(len(queries), 0)
+        self.assertEqual(
+            self.query.depth(OrderSide.BUY),
+            heap_levels(self.order_queue.buy_orders, OrderSide.BUY),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from src.depth_index import DepthIndex
+from src.order_components import OrderSide
+
+
+class TestDepthIndex(unittest.TestCase):
+    def setUp(self):
+        self.bids = DepthIndex(OrderSide.BUY)
+        self.asks = DepthIndex(OrderSide.SELL)
+        for price, quantity in [(99, 5), (101, 3), (100, 4), (99, 2)]:
+            self.bids.add(price, quantity)
+            self.asks.add(price, quantity)
+
+    def test_levels_best_first(self):
+        self.assertEqual(self.bids.levels(), [(101, 3), (100, 4), (99, 7)])
+        self.assertEqual(self.asks.levels(), [(99, 7), (100, 4), (101, 3)])
+        self.assertEqual(self.asks.levels(2), [(99, 7), (100, 4)])
+        self.assertEqual(self.bids.best_price(), 101)
+        self.assertEqual(self.asks.best_price(), 99)
+        self.assertEqual(len(self.bids), 3)
+
+    def test_remove_drops_empty_levels(self):
+        self.bids.remove(101, 1)
+        self.assertEqual(self.bids.levels(1), [(101, 2)])
+        self.bids.remove(101, 2)
+        self.assertEqual(self.bids.best_price(), 100)
+        for price, quantity in self.asks.levels():
+            self.asks.remove(price, quantity)
+        self.assertIsNone(self.asks.best_price())
+        self.assertEqual(self.asks.levels(), [])
+
+    def test_available_up_to_limit(self):
+        self.assertEqual(self.asks.available(), 14)
+        self.assertEqual(self.asks.available(100), 11)
+        self.assertEqual(self.asks.available(98), 0)
+        self.assertEqual(self.bids.available(100), 7)
+        self.assertEqual(self.bids.available(100, wanted=2), 3)
+
+    def test_load(self):
+        restored = DepthIndex(OrderSide.BUY)
+        restored.load([[price, quantity] for price, quantity in self.bids.levels()])
+        self.assertEqual(restored.levels(), self.bids.levels())
+
+
+    def test_tracks_changed_levels_when_enabled(self):
+        self.bids.add(98, 1)
+        self.assertIsNone(self.bids.changed)
+
+        self.bids.changed = set()
+        self.bids.add(98, 1)
+        self.bids.remove(101, 3)
+        self.assertEqual(self.bids.changed, {98, 101})
+        self.bids.load([(97, 1)])
+        self.assertEqual(self.bids.changed, {97, 98, 99, 100, 101})
+
+    def test_version_moves_on_with_every_change(self):
+        version = self.bids.version
+        self.assertEqual(version % 2, 0)
+        self.bids.add(98, 1)
+        self.bids.remove(98, 1)
+        self.bids.load([(97, 1)])
+        self.assertEqual(self.bids.version, version + 6)
+        with self.assertRaises(KeyError):
+            self.bids.remove(50, 1)
+        self.assertEqual(self.bids.version % 2, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import random
+import unittest
+from src.fill_sink import FillSink, FillView
+from src.match_engine import MatchEngine
+from src.order_components import Order, CompactOrder, OrderSide, OrderType
+from src.order_queue import OrderQueue
+from src.order_processor import OrderProcessor
+
+
+class TestFillSink(unittest.TestCase):
+    def test_record_and_view(self):
+        sink = FillSink()
+        sink.record("00000001", "00000002", 100.5, 10)
+        sink.record("00000003", "00000002", 101.0, 5)
+
+        self.assertEqual(len(sink), 2)
+        self.assertEqual(
+            list(sink.view()),
+            [("00000001", "00000002", 100.5, 10), ("00000003", "00000002", 101.0, 5)],
+        )
+        view = sink.view(1)
+        self.assertEqual(len(view), 1)
+        self.assertEqual(view[0], ("00000003", "00000002", 101.0, 5))
+        self.assertEqual(view[-1], view[0])
+        with self.assertRaises(IndexError):
+            view[1]
+        self.assertFalse(sink.view(2))
+
+    def test_compact_orders_keep_integer_ids_and_ticks(self):
+        sink = FillSink(CompactOrder)
+        sink.record(7, 8, CompactOrder.to_ticks(100.25), 3)
+
+        self.assertEqual(sink.prices.typecode, "q")
+        self.assertEqual(sink.view()[0], (7, 8, CompactOrder.to_ticks(100.25), 3))
+
+    def test_grow_keeps_held_columns(self):
+        sink = FillSink(capacity=2)
+        sink.record(1, 2, 100.0, 1)
+        sink.record(1, 3, 100.0, 2)
+        columns = sink.columns()
+        sink.record(1, 4, 101.0, 3)
+
+        self.assertEqual(sink.capacity, 4)
+        self.assertEqual(columns["quantity"].tolist(), [1, 2])
+        self.assertEqual(sink.columns()["quantity"].tolist(), [1, 2, 3])
+        self.assertEqual(sink.columns()["sequence"].tolist(), [0, 1, 2])
+
+    def test_columns_are_zero_copy(self):
+        sink = FillSink()
+        sink.record(1, 2, 100.0, 4)
+        prices = sink.columns()["price"]
+        sink.prices[0] = 99.0
+
+        self.assertEqual(prices.format, "d")
+        self.assertEqual(prices.tolist(), [99.0])
+
+    def test_clear_reuses_buffers(self):
+        sink = FillSink()
+        buy_ids = sink.buy_ids
+        sink.record(1, 2, 100.0, 4)
+        sink.clear()
+        sink.record(5, 6, 100.0, 1)
+
+        self.assertIs(sink.buy_ids, buy_ids)
+        self.assertEqual(list(sink.view()), [("00000005", "00000006", 100.0, 1)])
+        self.assertEqual(sink.sequences[0], 1)
+
+
+class TestMatchEngineFillSink(unittest.TestCase):
+    def setUp(self):
+        Order.reset_id_generator()
+        CompactOrder.reset_id_generator()
+
+    def _fills(self, order_class, fill_sink, match_on_arrival):
+        order_class.reset_id_generator()
+        order_processor = OrderProcessor(
+            OrderQueue(),
+            MatchEngine(fill_sink=fill_sink),
+            order_class=order_class,
+            match_on_arrival=match_on_arrival,
+        )
+        rng = random.Random(3)
+        fills = []
+        for _ in range(400):
+            order_processor.receive_order(
+                "user",
+                rng.choice([OrderSide.BUY, OrderSide.SELL]),
+                rng.randint(95, 105),
+                rng.randint(1, 20),
+                order_type=rng.choice(list(OrderType)),
+            )
+            matches = order_processor.process_single_order()
+            if fill_sink is not None:
+                self.assertIsInstance(matches, FillView)
+                fills.extend(matches)
+            else:
+                fills.extend(
+                    (buy.order_id, sell.order_id, price, quantity)
+                    for buy, sell, price, quantity in matches
+                )
+        return fills
+
+    def test_same_fills_as_tuples(self):
+        for order_class in (Order, CompactOrder):
+            for match_on_arrival in (False, True):
+                with self.subTest(order_class=order_class, on_arrival=match_on_arrival):
+                    fills = self._fills(order_class, None, match_on_arrival)
+                    sink = FillSink(order_class, capacity=8)
+                    self.assertTrue(fills)
+                    self.assertEqual(
+                        self._fills(order_class, sink, match_on_arrival), fills
+                    )
+                    self.assertEqual(len(sink), len(fills))
+
+    def test_unfilled_order_returns_empty_view(self):
+        sink = FillSink()
+        order_processor = OrderProcessor(OrderQueue(), MatchEngine(fill_sink=sink))
+        order_processor.receive_order(
+            "user", OrderSide.BUY, 100, 5, order_type=OrderType.FOK
+        )
+
+        matches = order_processor.process_single_order()
+
+        self.assertIsInstance(matches, FillView)
+        self.assertEqual(len(matches), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
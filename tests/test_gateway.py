@@ -0,0 +1,141 @@
+import asyncio
+import unittest
+from src.gateway import OrderGateway, GatewayClient, MessageType, encode
+from src.fill_sink import FillSink
+from src.order_components import Order, CompactOrder, OrderSide, OrderStatus
+from src.order_queue import OrderQueue
+from src.match_engine import MatchEngine
+from src.order_processor import OrderProcessor
+
+
+class TestOrderGateway(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        Order.reset_id_generator()
+        self.order_queue = OrderQueue()
+        self.gateway = OrderGateway(OrderProcessor(self.order_queue, MatchEngine()))
+        await self.gateway.start()
+        self.host, self.port = self.gateway.address[:2]
+
+    async def asyncTearDown(self):
+        await self.gateway.stop()
+
+    async def _client(self):
+        client = GatewayClient()
+        await client.connect(self.host, self.port)
+        return client
+
+    async def test_orders_acked_and_filled(self):
+        buyer, seller = await self._client(), await self._client()
+
+        buyer.send_order("user1", OrderSide.BUY, 100.0, 10)
+        await buyer.wait_for_acks(1)
+        seller.send_order("user2", OrderSide.SELL, 99.5, 4)
+        await seller.wait_for_acks(1)
+        await buyer.wait_for_fills(1)
+
+        self.assertEqual(buyer.acks, [(1, OrderStatus.PROCESSING, "00000001")])
+        self.assertEqual(seller.acks, [(1, OrderStatus.FILLED, "00000002")])
+        self.assertEqual(seller.fills, [("00000002", 99.5, 4)])
+        self.assertEqual(len(buyer.latencies), 1)
+        self.assertEqual(buyer.fills, [("00000001", 99.5, 4)])
+
+        await buyer.close()
+        await seller.close()
+
+    async def test_fills_from_fill_sink(self):
+        await self.gateway.stop()
+        CompactOrder.reset_id_generator()
+        self.order_queue = OrderQueue()
+        self.gateway = OrderGateway(
+            OrderProcessor(
+                self.order_queue,
+                MatchEngine(fill_sink=FillSink(CompactOrder)),
+                order_class=CompactOrder,
+            )
+        )
+        await self.gateway.start()
+        self.host, self.port = self.gateway.address[:2]
+        buyer, seller = await self._client(), await self._client()
+
+        buyer.send_order("user1", OrderSide.BUY, 100.0, 10)
+        await buyer.wait_for_acks(1)
+        seller.send_order("user2", OrderSide.SELL, 99.5, 10)
+        await seller.wait_for_acks(1)
+        await buyer.wait_for_fills(1)
+
+        self.assertEqual(seller.acks, [(1, OrderStatus.FILLED, "2")])
+        self.assertEqual(seller.fills, [("2", 99.5, 10)])
+        self.assertEqual(buyer.fills, [("1", 99.5, 10)])
+        self.assertEqual(self.gateway.owners, {})
+
+        await buyer.close()
+        await seller.close()
+
+    async def test_cancel(self):
+        client = await self._client()
+        client.send_order("user1", OrderSide.BUY, 100.0, 10)
+        await client.wait_for_acks(1)
+        client.send_cancel(client.acks[0][2])
+        client.send_cancel("nonexistent_id")
+        await client.wait_for_acks(3)
+
+        self.assertEqual(client.acks[1][:2], (2, OrderStatus.CANCELLED))
+        self.assertEqual(client.acks[2][:2], (3, OrderStatus.REJECTED))
+        self.assertEqual(self.order_queue.orderbook_size, 0)
+
+        client.send_cancel(client.acks[0][2])
+        await client.wait_for_acks(4)
+        self.assertEqual(client.acks[3][:2], (4, OrderStatus.REJECTED))
+        await client.close()
+
+    async def test_cancel_of_another_clients_order(self):
+        owner, other = await self._client(), await self._client()
+        owner.send_order("user1", OrderSide.BUY, 100.0, 10)
+        await owner.wait_for_acks(1)
+        other.send_cancel(owner.acks[0][2])
+        await other.wait_for_acks(1)
+
+        self.assertEqual(other.acks[0][:2], (1, OrderStatus.REJECTED))
+        self.assertEqual(self.order_queue.orderbook_size, 1)
+        await owner.close()
+        await other.close()
+
+    async def test_malformed_frames_rejected(self):
+        bad, good = await self._client(), await self._client()
+        frames = [
+            (MessageType.NEW_ORDER, 7, 100.0, 10, b"user1"),
+            (MessageType.NEW_ORDER, 1, 100.0, 10, b"\xff\xfe"),
+            (MessageType.NEW_ORDER, 1, float("nan"), 10, b"user1"),
+            (MessageType.NEW_ORDER, 1, 100.0, 0, b"user1"),
+            (MessageType.CANCEL_ORDER, b"\xff"),
+        ]
+        for message_type, *fields in frames:
+            bad.writer.write(encode(message_type, bad._next_frame(), *fields))
+        await bad.wait_for_acks(5)
+        good.send_order("user2", OrderSide.BUY, 100.0, 10)
+        await good.wait_for_acks(1)
+
+        self.assertEqual(
+            [ack[:2] for ack in bad.acks],
+            [(sequence, OrderStatus.REJECTED) for sequence in range(1, 6)],
+        )
+        self.assertEqual(good.acks[0][1], OrderStatus.PROCESSING)
+        self.assertEqual(len(self.order_queue.order_map), 1)
+        await bad.close()
+        await good.close()
+
+    async def test_unknown_message_type_drops_client(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        writer.write(b"\xff" + bytes(32))
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+
+        client = await self._client()
+        client.send_order("user1", OrderSide.BUY, 100.0, 10)
+        await client.wait_for_acks(1)
+        self.assertEqual(client.acks[0][1], OrderStatus.PROCESSING)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import multiprocessing as mp
+import unittest
+from src.instrumentation import StatsPage, Stat
+from src.order_components import Order, OrderSide
+from src.order_queue import OrderQueue
+from src.price_level_queue import PriceLevelOrderQueue
+from src.match_engine import MatchEngine
+from src.order_processor import OrderProcessor
+
+
+def read_stats(name: str, results: mp.Queue) -> None:
+    stats = StatsPage(name, create=False)
+    results.put(stats.read())
+    stats.set_sampling(0)
+    stats.close()
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        Order.reset_id_generator()
+        self.stats = StatsPage()
+
+    def tearDown(self):
+        self.stats.close()
+        self.stats.unlink()
+
+    def _trade(self, order_queue, match_on_arrival=False):
+        order_processor = OrderProcessor(
+            order_queue,
+            MatchEngine(stats=self.stats),
+            match_on_arrival=match_on_arrival,
+        )
+        for price in (101, 102, 103):
+            order_processor.receive_order("seller", OrderSide.SELL, price, 5)
+        order_processor.receive_order("buyer", OrderSide.BUY, 99, 5)
+        order_processor.process_orders()
+        order_processor.cancel_order("00000004")
+        order_processor.receive_order("pending", OrderSide.BUY, 99, 5)
+        order_processor.cancel_order("00000005")
+        order_processor.cancel_order("00000005")
+        order_processor.receive_order("sweeper", OrderSide.BUY, 103, 12)
+        order_processor.process_orders()
+
+    def _assert_counters(self, stats):
+        self.assertEqual(stats["HEAP_PUSHES"], 5)
+        self.assertEqual(stats["HEAP_POPS"], 3)
+        self.assertEqual(stats["CANCELS_PENDING"], 1)
+        self.assertEqual(stats["CANCELS_PROCESSING"], 1)
+        self.assertEqual(stats["CANCELS_FAILED"], 1)
+        self.assertEqual(stats["AGGRESSORS"], 1)
+        self.assertEqual(stats["MATCHES"], 3)
+        self.assertEqual(stats["MAX_MATCHES_PER_AGGRESSOR"], 3)
+        self.assertEqual(stats["BOOK_DEPTH"], 1)
+        self.assertEqual(stats["QUEUE_LENGTH"], 0)
+
+    def test_counters(self):
+        self._trade(OrderQueue(stats=self.stats))
+        self._assert_counters(self.stats.read())
+
+    def test_price_level_counters(self):
+        self._trade(PriceLevelOrderQueue(stats=self.stats))
+        self._assert_counters(self.stats.read())
+
+    def test_sampled_timing(self):
+        self.stats.set_sampling(2)
+        self._trade(OrderQueue(stats=self.stats))
+        stats = self.stats.read()
+
+        self.assertEqual(stats["GET_NEXT_ORDER_CALLS"], 7)
+        self.assertEqual(stats["GET_NEXT_ORDER_SAMPLES"], 3)
+        self.assertEqual(stats["MATCH_ORDERS_CALLS"], 5)
+        self.assertEqual(stats["MATCH_ORDERS_SAMPLES"], 2)
+        self.assertGreater(stats["MATCH_ORDERS_NS"], 0)
+        self.assertLessEqual(stats["MATCH_ORDERS_MAX_NS"], stats["MATCH_ORDERS_NS"])
+        # get_next_order pops through pop_next_order
+        self.assertEqual(stats["POP_NEXT_ORDER_CALLS"], 7)
+        self.assertEqual(stats["POP_NEXT_ORDER_SAMPLES"], 3)
+        self.assertEqual(stats["MATCH_INCOMING_ORDER_CALLS"], 0)
+
+    def test_sampled_timing_on_arrival(self):
+        self.stats.set_sampling(1)
+        self._trade(OrderQueue(stats=self.stats), match_on_arrival=True)
+        stats = self.stats.read()
+
+        self.assertEqual(stats["POP_NEXT_ORDER_CALLS"], 7)
+        self.assertEqual(stats["POP_NEXT_ORDER_SAMPLES"], 7)
+        self.assertEqual(stats["GET_NEXT_ORDER_CALLS"], 0)
+        self.assertEqual(stats["MATCH_INCOMING_ORDER_CALLS"], 5)
+        self.assertEqual(stats["MATCH_INCOMING_ORDER_SAMPLES"], 5)
+        self.assertGreater(stats["MATCH_INCOMING_ORDER_NS"], 0)
+        self.assertEqual(stats["MATCH_ORDERS_CALLS"], 0)
+
+    def test_read_and_control_from_other_process(self):
+        self.stats.set_sampling(1)
+        self._trade(OrderQueue(stats=self.stats))
+        results = mp.Queue()
+        reader = mp.Process(target=read_stats, args=(self.stats.name, results))
+        reader.start()
+        stats = results.get(timeout=10)
+        reader.join()
+
+        self._assert_counters(stats)
+        self.assertEqual(stats["SAMPLE_EVERY"], 1)
+        self.assertEqual(self.stats.slots[Stat.SAMPLE_EVERY], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
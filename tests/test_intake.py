@@ -0,0 +1,119 @@
+import random
+import unittest
+from src.gateway import MESSAGE_BODIES, MessageType
+from src.intake import IntakePipeline
+from src.match_engine import MatchEngine
+from src.order_components import (
+    Order,
+    CompactOrder,
+    OrderSide,
+    OrderStatus,
+    pack_id,
+    unpack_id,
+)
+from src.order_processor import OrderProcessor
+from src.order_queue import OrderQueue
+
+
+def make_frames(count: int, seed: int = 1) -> list[bytes]:
+    rng = random.Random(seed)
+    return [
+        MESSAGE_BODIES[MessageType.NEW_ORDER].pack(
+            sequence,
+            rng.choice([OrderSide.BUY, OrderSide.SELL]).value,
+            rng.randint(95, 105),
+            rng.randint(1, 20),
+            f"user{rng.randint(1, 5)}".encode(),
+        )
+        for sequence in range(count)
+    ]
+
+
+class TestIntakePipeline(unittest.TestCase):
+    def setUp(self):
+        CompactOrder.reset_id_generator()
+        self.order_processor = OrderProcessor(
+            OrderQueue(), MatchEngine(), order_class=CompactOrder
+        )
+
+    def _run(self, sources, ring_capacity=1 << 14):
+        pipeline = IntakePipeline(self.order_processor, ring_capacity)
+        pipeline.start(sources)
+        try:
+            pipeline.run()
+        finally:
+            pipeline.close()
+        return pipeline
+
+    def test_matches_like_direct_intake(self):
+        frames = make_frames(500)
+        self._run([frames])
+
+        direct = OrderProcessor(OrderQueue(), MatchEngine(), order_class=CompactOrder)
+        for frame in frames:
+            _, side, price, quantity, user_id = MESSAGE_BODIES[
+                MessageType.NEW_ORDER
+            ].unpack(frame)
+            direct.receive_order(
+                user_id.rstrip(b"\0").decode(), OrderSide(side), price, quantity
+            )
+            direct.process_single_order()
+
+        order_queue = self.order_processor.order_queue
+        self.assertEqual(self.order_processor.transactions, direct.transactions)
+        self.assertEqual(
+            order_queue.buy_depth.levels(), direct.order_queue.buy_depth.levels()
+        )
+        self.assertEqual(
+            order_queue.sell_depth.levels(), direct.order_queue.sell_depth.levels()
+        )
+
+    def test_producers_with_backpressure(self):
+        sources = [make_frames(300, seed) for seed in range(3)]
+        sources[0][10] = MESSAGE_BODIES[MessageType.NEW_ORDER].pack(
+            0, 1, 100.0, 0, b"user1"
+        )
+        pipeline = self._run(sources, ring_capacity=8)
+
+        order_map = self.order_processor.order_queue.order_map
+        self.assertEqual(pipeline.submitted, 899)
+        self.assertEqual(pipeline.invalid, 1)
+        self.assertEqual(len(order_map), 899)
+        self.assertEqual(
+            {unpack_id(order_id)[1] for order_id in order_map}, {1, 2, 3}
+        )
+
+    def test_restarts_never_reuse_ids(self):
+        pipeline = IntakePipeline(self.order_processor)
+        try:
+            for _ in range(2):
+                pipeline.start([make_frames(200, seed) for seed in range(2)])
+                pipeline.run()
+        finally:
+            pipeline.close()
+
+        self.assertEqual(pipeline.submitted, 800)
+        self.assertEqual(len(self.order_processor.order_queue.order_map), 800)
+
+    def test_skips_restored_ids(self):
+        restored = CompactOrder.restore(
+            pack_id(0, 1, 5), "user1", OrderSide.BUY, 1, 5, OrderStatus.PENDING, 0
+        )
+        self.order_processor.submit_order(restored)
+        pipeline = self._run([make_frames(10)])
+
+        order_map = self.order_processor.order_queue.order_map
+        self.assertEqual(pipeline.submitted, 10)
+        self.assertEqual(len(order_map), 11)
+        new_ids = order_map.keys() - {restored.order_id}
+        self.assertGreater(min(new_ids), pack_id(0, 1, 5))
+
+    def test_requires_integer_ids(self):
+        with self.assertRaises(ValueError):
+            IntakePipeline(
+                OrderProcessor(OrderQueue(), MatchEngine(), order_class=Order)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
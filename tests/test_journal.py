@@ -0,0 +1,250 @@
+import os
+import random
+import tempfile
+import unittest
+from src.journal import (
+    EventJournal,
+    FsyncPolicy,
+    JournalEvent,
+    read_journal,
+    replay_journal,
+)
+from src.fill_sink import FillSink
+from src.order_components import (
+    Order,
+    CompactOrder,
+    OrderSide,
+    OrderStatus,
+    OrderType,
+)
+from src.order_queue import OrderQueue
+from src.match_engine import MatchEngine
+from src.order_processor import OrderProcessor
+from src.risk import RiskChecker, SelfTradePrevention
+
+
+def book_state(order_queue: OrderQueue, heap_layout: bool = True) -> tuple:
+    def describe(order):
+        return (
+            order.order_id,
+            order.user_id,
+            order.side,
+            order.price,
+            order.quantity,
+            order.status,
+            order.timestamp,
+            order.order_type,
+        )
+
+    def resting(order_book):
+        if heap_layout:
+            return [describe(ho.order) for ho in order_book]
+        # Replay pops the entries amends leave behind at other points
+        return sorted(
+            describe(ho.order) for ho in order_book if ho.order.sequence == ho.sequence
+        )
+
+    return (
+        [describe(order) for order in order_queue.queue],
+        {order_id: describe(order) for order_id, order in order_queue.order_map.items()},
+        resting(order_queue.buy_orders),
+        resting(order_queue.sell_orders),
+        [order.order_id for order in order_queue.filled_orders],
+        order_queue.orderbook_size,
+        order_queue.buy_depth.levels(),
+        order_queue.sell_depth.levels(),
+    )
+
+
+class TestEventJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "events.journal")
+        Order.reset_id_generator()
+        CompactOrder.reset_id_generator()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _trade(
+        self, order_processor, orders=500, seed=1, order_types=None, amends=False
+    ):
+        rng = random.Random(seed)
+        received = []
+        for _ in range(orders):
+            side = rng.choice([OrderSide.BUY, OrderSide.SELL])
+            received.append(
+                order_processor.receive_order(
+                    f"user{rng.randint(1, 5)}",
+                    side,
+                    rng.randint(95, 105),
+                    rng.randint(1, 20),
+                    order_type=(
+                        rng.choice(order_types) if order_types else OrderType.LIMIT
+                    ),
+                )
+            )
+            if rng.random() < 0.2:
+                order_processor.cancel_order(rng.choice(received).order_id)
+            if amends and rng.random() < 0.3:
+                order_processor.amend_order(
+                    rng.choice(received).order_id,
+                    rng.randint(1, 20),
+                    rng.choice([None, rng.randint(95, 105)]),
+                )
+            if rng.random() < 0.8:
+                order_processor.process_single_order()
+        if rng.random() < 0.5:
+            order_processor.process_auction()
+
+    def _replay_matches(
+        self,
+        order_class,
+        order_types=None,
+        amends=False,
+        fill_sink=False,
+        **processor_options,
+    ):
+        journal = EventJournal(self.path, fsync_policy=FsyncPolicy.NEVER)
+        order_queue = OrderQueue(journal=journal)
+        match_engine = MatchEngine(
+            fill_sink=FillSink(order_class) if fill_sink else None
+        )
+        order_processor = OrderProcessor(
+            order_queue, match_engine, order_class=order_class, **processor_options
+        )
+        self._trade(order_processor, order_types=order_types, amends=amends)
+        journal.close()
+        next_id = order_class.id_generator._next_id
+
+        order_class.reset_id_generator()
+        restored = OrderQueue()
+        count = replay_journal(self.path, restored, order_class)
+
+        self.assertTrue(order_queue.filled_orders)
+        self.assertEqual(count, journal.sequence)
+        self.assertEqual(
+            book_state(restored, not amends), book_state(order_queue, not amends)
+        )
+        self.assertEqual(order_class.id_generator._next_id, next_id)
+
+    def test_replay_rebuilds_book(self):
+        self._replay_matches(Order)
+
+    def test_replay_match_on_arrival(self):
+        self._replay_matches(Order, match_on_arrival=True)
+
+    def test_replay_compact_orders(self):
+        self._replay_matches(CompactOrder)
+
+    def test_replay_order_types(self):
+        self._replay_matches(Order, order_types=list(OrderType))
+
+    def test_replay_compact_order_types(self):
+        self._replay_matches(CompactOrder, order_types=list(OrderType))
+
+    def test_replay_amends(self):
+        self._replay_matches(Order, amends=True)
+
+    def test_replay_compact_amends_on_arrival(self):
+        self._replay_matches(CompactOrder, amends=True, match_on_arrival=True)
+
+    def test_replay_fill_sink(self):
+        self._replay_matches(Order, amends=True, fill_sink=True)
+
+    def test_replay_compact_fill_sink_order_types(self):
+        self._replay_matches(
+            CompactOrder, order_types=list(OrderType), fill_sink=True
+        )
+
+    def test_replay_self_trade_cancel_mid_match(self):
+        # The incoming order is cancelled before its fills are journaled
+        for mode in (
+            SelfTradePrevention.CANCEL_INCOMING,
+            SelfTradePrevention.CANCEL_BOTH,
+        ):
+            with self.subTest(mode=mode):
+                Order.reset_id_generator()
+                journal = EventJournal(self.path, fsync_policy=FsyncPolicy.NEVER)
+                order_queue = OrderQueue(journal=journal, risk=RiskChecker())
+                order_processor = OrderProcessor(
+                    order_queue, MatchEngine(self_trade_prevention=mode)
+                )
+                order_processor.receive_order("user2", OrderSide.SELL, 99, 5)
+                order_processor.receive_order("user1", OrderSide.SELL, 100, 5)
+                incoming = order_processor.receive_order(
+                    "user1", OrderSide.BUY, 100, 10
+                )
+                order_processor.process_orders()
+                journal.close()
+                self.assertEqual(incoming.status, OrderStatus.CANCELLED)
+                self.assertEqual(incoming.quantity, 5)
+
+                Order.reset_id_generator()
+                restored = OrderQueue(risk=RiskChecker())
+                replay_journal(self.path, restored)
+
+                self.assertEqual(book_state(restored), book_state(order_queue))
+                self.assertEqual(
+                    restored.risk.open_notional, order_queue.risk.open_notional
+                )
+                self.assertEqual(
+                    restored.risk.open_orders, order_queue.risk.open_orders
+                )
+                os.remove(self.path)
+
+    def test_replay_amend_to_fractional_price(self):
+        for order_class in (Order, CompactOrder):
+            with self.subTest(order_class=order_class.__name__):
+                order_class.reset_id_generator()
+                with EventJournal(self.path) as journal:
+                    order_queue = OrderQueue(journal=journal)
+                    order_processor = OrderProcessor(
+                        order_queue, MatchEngine(), order_class=order_class
+                    )
+                    order = order_processor.receive_order(
+                        "user1", OrderSide.BUY, 100, 10
+                    )
+                    order_processor.amend_order(order.order_id, 10, 100.25)
+
+                order_class.reset_id_generator()
+                restored = OrderQueue()
+                replay_journal(self.path, restored, order_class)
+
+                self.assertEqual(
+                    restored.order_map[order.order_id].price, order.price
+                )
+                self.assertEqual(order_class.to_price(order.price), 100.25)
+                os.remove(self.path)
+
+    def test_replay_advances_id_generator(self):
+        with EventJournal(self.path) as journal:
+            order_queue = OrderQueue(journal=journal)
+            OrderProcessor(order_queue, MatchEngine()).receive_order(
+                "user1", OrderSide.BUY, 100.0, 10
+            )
+
+        Order.reset_id_generator()
+        replay_journal(self.path, OrderQueue())
+
+        self.assertEqual(Order.id_generator.generate_id(), "00000002")
+
+    def test_fsync_policies(self):
+        journal = EventJournal(self.path, fsync_policy=FsyncPolicy.EVERY_EVENT)
+        journal.record_cancel_order("00000001")
+        self.assertEqual(len(list(read_journal(self.path))), 1)
+        journal.close()
+
+        journal = EventJournal(self.path, fsync_policy=FsyncPolicy.NEVER, batch_size=2)
+        journal.record_cancel_order("00000002")
+        self.assertEqual(len(list(read_journal(self.path))), 1)
+        journal.record_cancel_order("00000003")
+        records = list(read_journal(self.path))
+        self.assertEqual([record[0] for record in records], [0, 1, 2])
+        self.assertEqual(records[2][1], JournalEvent.CANCEL_ORDER)
+        self.assertEqual(len(list(read_journal(self.path, from_sequence=2))), 1)
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
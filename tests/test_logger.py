@@ -0,0 +1,69 @@
+import copy
+import logging
+import os
+import tempfile
+import unittest
+from src.logger import AsyncLogger, LOGGING_CONFIG
+from src.order_components import Order, OrderSide
+from src.order_queue import OrderQueue
+from src.match_engine import MatchEngine
+from src.order_processor import OrderProcessor
+
+
+class TestAsyncLogger(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "async.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _trade(self, logger):
+        Order.reset_id_generator()
+        order_processor = OrderProcessor(
+            OrderQueue(logger=logger), MatchEngine(logger), logger=logger
+        )
+        order_processor.receive_order("user1", OrderSide.BUY, 100.0, 10)
+        order_processor.receive_order("user2", OrderSide.SELL, 99.5, 4)
+        order_processor.receive_order("user3", OrderSide.SELL, 101.0, 4)
+        order_processor.process_orders()
+        order_processor.cancel_order("00000003")
+        order_processor.cancel_order("nonexistent_id")
+        order_processor.receive_order("user4", OrderSide.SELL, 99.0, 2)
+        order_processor.process_auction()
+
+    def _read_messages(self):
+        with open(self.path, encoding="utf-8") as file:
+            return [line.rstrip("\n").split(" - ", 2)[2] for line in file]
+
+    def test_same_messages_as_synchronous_logger(self):
+        logger = logging.getLogger("test_sync_logger")
+        with self.assertLogs(logger, logging.INFO) as captured:
+            self._trade(logger)
+
+        with AsyncLogger(
+            "test_async_logger", copy.deepcopy(LOGGING_CONFIG), self.path
+        ) as async_logger:
+            self._trade(async_logger)
+
+        self.assertEqual(
+            self._read_messages(),
+            [record.getMessage() for record in captured.records],
+        )
+
+    def test_levels_and_long_text(self):
+        message = "Ümlaut " * 20
+        with AsyncLogger(
+            "test_async_logger", copy.deepcopy(LOGGING_CONFIG), self.path, capacity=4
+        ) as async_logger:
+            async_logger.warning(message)
+            async_logger.info("")
+
+        with open(self.path, encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        self.assertIn(" - WARNING - ", lines[0])
+        self.assertEqual(self._read_messages(), [message, ""])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import random
+import unittest
+from src.market_data import (
+    MarketDataEvent,
+    MarketDataPublisher,
+    MarketDataSubscriber,
+)
+from src.match_engine import MatchEngine
+from src.order_components import Order, OrderSide, OrderType
+from src.order_queue import OrderQueue
+from src.price_level_queue import PriceLevelOrderQueue
+from src.order_processor import OrderProcessor
+
+
+class TestMarketData(unittest.TestCase):
+    def setUp(self):
+        Order.reset_id_generator()
+        self.order_queue = OrderQueue()
+        self.publisher = MarketDataPublisher(self.order_queue)
+        self.order_processor = OrderProcessor(
+            self.order_queue, MatchEngine(), market_data=self.publisher
+        )
+        self.subscribers = []
+
+    def tearDown(self):
+        for subscriber in self.subscribers:
+            subscriber.close()
+        self.publisher.close()
+
+    def _subscribe(self, capacity=1 << 12, **options):
+        name = self.publisher.subscribe(capacity, **options)
+        subscriber = MarketDataSubscriber(name, capacity)
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def _assert_book(self, subscriber, order_queue=None):
+        order_queue = order_queue or self.order_queue
+        self.assertEqual(
+            subscriber.levels(OrderSide.BUY), order_queue.buy_depth.levels()
+        )
+        self.assertEqual(
+            subscriber.levels(OrderSide.SELL), order_queue.sell_depth.levels()
+        )
+        self.assertEqual(subscriber.top, self.publisher._top())
+
+    def _trade(self, order_processor, rng, steps, after_step=None):
+        received = []
+        for _ in range(steps):
+            received.append(
+                order_processor.receive_order(
+                    "user",
+                    rng.choice([OrderSide.BUY, OrderSide.SELL]),
+                    rng.randint(95, 105),
+                    rng.randint(1, 20),
+                    order_type=rng.choice(list(OrderType)),
+                )
+            )
+            if rng.random() < 0.2:
+                order_processor.cancel_order(rng.choice(received).order_id)
+            if rng.random() < 0.2:
+                order_processor.amend_order(
+                    rng.choice(received).order_id,
+                    rng.randint(1, 20),
+                    rng.choice([None, rng.randint(95, 105)]),
+                )
+            order_processor.process_single_order()
+            if after_step:
+                after_step()
+
+    def test_deltas_track_book(self):
+        subscriber = self._subscribe()
+        sequences = []
+
+        def check():
+            subscriber.poll()
+            sequences.append(subscriber.sequence)
+            self._assert_book(subscriber)
+
+        self._trade(self.order_processor, random.Random(1), 300, check)
+        self.assertEqual(sequences, sorted(sequences))
+        self.assertEqual(subscriber.sequence, self.publisher.sequence)
+
+    def test_price_level_queue(self):
+        order_queue = PriceLevelOrderQueue()
+        self.publisher = MarketDataPublisher(order_queue)
+        order_processor = OrderProcessor(
+            order_queue,
+            MatchEngine(),
+            match_on_arrival=True,
+            market_data=self.publisher,
+        )
+        subscriber = self._subscribe()
+        self._trade(order_processor, random.Random(2), 300)
+
+        subscriber.poll()
+        self._assert_book(subscriber, order_queue)
+
+    def test_late_subscriber_starts_from_snapshot(self):
+        self._trade(self.order_processor, random.Random(3), 100)
+        subscriber = self._subscribe()
+
+        records = subscriber.ring.drain()
+        self.assertEqual(records[0][1], MarketDataEvent.SNAPSHOT)
+        self.assertEqual(records[0][4], len(records) - 2)
+        self.assertEqual(records[-1][1], MarketDataEvent.TOP)
+
+    def test_publish_without_changes_sends_nothing(self):
+        subscriber = self._subscribe()
+        self.order_processor.receive_order("user", OrderSide.BUY, 100, 5)
+        self.order_processor.process_single_order()
+        subscriber.poll()
+
+        self.publisher.publish()
+        self.order_processor.cancel_order("00000002")
+
+        self.assertEqual(subscriber.poll(), 0)
+
+    def test_conflation_between_publishes(self):
+        subscriber = self._subscribe(conflate_every=10)
+        for _ in range(5):
+            self.order_processor.receive_order("user", OrderSide.BUY, 100, 5)
+            self.order_processor.process_single_order()
+        # Only the snapshot of the empty book taken on subscribing
+        self.assertEqual(subscriber.poll(), 2)
+        self.assertEqual(subscriber.levels(OrderSide.BUY), [])
+
+        for _ in range(5):
+            self.order_processor.receive_order("user", OrderSide.BUY, 100, 5)
+            self.order_processor.process_single_order()
+
+        # One LEVEL and one TOP record for the ten orders at 100
+        self.assertEqual(subscriber.poll(), 2)
+        self.assertEqual(subscriber.levels(OrderSide.BUY), [(100, 50)])
+
+    def test_slow_subscriber_catches_up(self):
+        subscriber = self._subscribe(capacity=16)
+        rng = random.Random(4)
+        self._trade(self.order_processor, rng, 200)
+
+        for _ in range(10):
+            subscriber.poll()
+            self.publisher.publish()
+        subscriber.poll()
+        self._assert_book(subscriber)
+
+    def test_periodic_snapshots(self):
+        self.publisher.snapshot_every = 10
+        subscriber = self._subscribe()
+        snapshots = 0
+
+        def count_snapshots():
+            nonlocal snapshots
+            records = subscriber.ring.drain()
+            snapshots += sum(
+                record[1] == MarketDataEvent.SNAPSHOT for record in records
+            )
+
+        self._trade(self.order_processor, random.Random(5), 50, count_snapshots)
+
+        self.assertGreaterEqual(snapshots, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
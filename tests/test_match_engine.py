@@ -1,7 +1,9 @@
+import random
 import unittest
 from src.match_engine import MatchEngine
 from src.order_queue import OrderQueue
-from src.order_components import Order, OrderSide, OrderStatus
+from src.order_components import Order, OrderSide, OrderStatus, OrderType
+from src.order_processor import OrderProcessor
 from src.logger import Logger, LOGGING_CONFIG
 
 
@@ -97,6 +99,184 @@ class TestMatchEngine(unittest.TestCase):
         self.assertEqual(len(matches), 0)
         self.assertEqual(len(self.order_queue.filled_orders), 0)
 
+    def test_incoming_order_rests_without_match(self):
+        resting = Order(1, OrderSide.SELL, 100, 10)
+        self.order_queue.add_order(resting)
+        self.order_queue.get_next_order()
+        incoming = Order(2, OrderSide.BUY, 99, 10)
+        self.order_queue.add_order(incoming)
+        self.order_queue.pop_next_order()
+
+        num_removed, matches = self.match_engine.match_incoming_order(
+            incoming, self.order_queue
+        )
+
+        self.assertEqual((num_removed, matches), (0, []))
+        self.assertEqual(self.order_queue.get_best_buy_order(), incoming)
+        self.assertEqual(self.order_queue.orderbook_size, 2)
+
+    def test_incoming_order_sweeps_book(self):
+        for order in [
+            Order(1, OrderSide.SELL, 100, 5),
+            Order(2, OrderSide.SELL, 101, 5),
+            Order(3, OrderSide.SELL, 105, 5),
+        ]:
+            self.order_queue.add_order(order)
+            self.order_queue.get_next_order()
+        incoming = Order(4, OrderSide.BUY, 102, 12)
+        self.order_queue.add_order(incoming)
+        self.order_queue.pop_next_order()
+
+        num_removed, matches = self.match_engine.match_incoming_order(
+            incoming, self.order_queue
+        )
+
+        self.assertEqual(num_removed, 2)
+        self.assertEqual([(m[2], m[3]) for m in matches], [(100, 5), (101, 5)])
+        self.assertEqual(incoming.status, OrderStatus.PARTIALLY_FILLED)
+        self.assertEqual(self.order_queue.get_best_buy_order(), incoming)
+        self.assertEqual(self.order_queue.get_best_sell_order().price, 105)
+
+
+class TestMatchOnArrivalDifferential(unittest.TestCase):
+    """Replays one random order flow through both matching paths."""
+
+    def _run(self, operations, match_on_arrival):
+        Order.reset_id_generator()
+        order_queue = OrderQueue()
+        order_processor = OrderProcessor(
+            order_queue, MatchEngine(), match_on_arrival=match_on_arrival
+        )
+        fills = []
+        orders = []
+        for operation in operations:
+            if operation[0] == "cancel":
+                if operation[1] < len(orders):
+                    order_processor.cancel_order(orders[operation[1]].order_id)
+                continue
+            orders.append(order_processor.receive_order(*operation[1:]))
+            order = order_processor._next_order()
+            fills.extend(
+                (buy.order_id, sell.order_id, price, quantity)
+                for buy, sell, price, quantity in order_processor._match_order(order)[1]
+            )
+        book = [(order.order_id, order.status, order.quantity) for order in orders]
+        return fills, book, order_queue.orderbook_size
+
+    def test_fills_identical(self):
+        rng = random.Random(7)
+        # Few distinct prices, so most fills depend on time priority
+        prices = [rng.randint(9900, 10100) for _ in range(1500)]
+        operations = []
+        for price in prices:
+            if rng.random() < 0.2:
+                operations.append(("cancel", rng.randrange(len(operations) + 1)))
+            side = rng.choice([OrderSide.BUY, OrderSide.SELL])
+            user_id = f"user{rng.randint(1, 10)}"
+            quantity = rng.randint(1, 20)
+            operations.append(("new", user_id, side, price / 100, quantity))
+
+        expected = self._run(operations, match_on_arrival=False)
+        actual = self._run(operations, match_on_arrival=True)
+
+        self.assertGreater(len(expected[0]), 100)
+        self.assertEqual(expected, actual)
+
+
+class TestOrderTypes(unittest.TestCase):
+    def setUp(self):
+        Order.reset_id_generator()
+        self.order_queue = OrderQueue()
+        self.order_processor = OrderProcessor(self.order_queue, MatchEngine())
+        for price, quantity in [(100, 5), (101, 5), (102, 5)]:
+            self.order_processor.receive_order("maker", OrderSide.SELL, price, quantity)
+        self.order_processor.receive_order("maker", OrderSide.BUY, 98, 5)
+        self.order_processor.process_orders()
+
+    def _submit(self, side, price, quantity, order_type):
+        order = self.order_processor.receive_order(
+            "taker", side, price, quantity, order_type=order_type
+        )
+        matches = self.order_processor.process_single_order()
+        return order, [(match[2], match[3]) for match in matches]
+
+    def _assert_expired(self, order):
+        self.assertEqual(order.status, OrderStatus.CANCELLED)
+        self.assertNotIn(order.order_id, self.order_queue.order_map)
+        resting = [ho.order for ho in self.order_queue.buy_orders]
+        self.assertNotIn(order, resting)
+
+    def test_market_sweeps_at_resting_prices(self):
+        order, fills = self._submit(OrderSide.BUY, 0, 12, OrderType.MARKET)
+        self.assertEqual(fills, [(100, 5), (101, 5), (102, 2)])
+        self.assertEqual(order.status, OrderStatus.FILLED)
+        self.assertEqual(self.order_queue.sell_depth.levels(), [(102, 3)])
+
+        order, fills = self._submit(OrderSide.SELL, 0, 8, OrderType.MARKET)
+        self.assertEqual(fills, [(98, 5)])
+        self.assertEqual(order.quantity, 3)
+        self.assertEqual(order.status, OrderStatus.CANCELLED)
+        self.assertIsNone(self.order_queue.get_best_buy_order())
+
+    def test_ioc_cancels_remainder(self):
+        order, fills = self._submit(OrderSide.BUY, 101, 20, OrderType.IOC)
+        self.assertEqual(fills, [(100, 5), (101, 5)])
+        self.assertEqual(order.quantity, 10)
+        self._assert_expired(order)
+        self.assertEqual(self.order_queue.orderbook_size, 2)
+
+    def test_fok_needs_full_quantity_up_to_limit(self):
+        order, fills = self._submit(OrderSide.BUY, 101, 11, OrderType.FOK)
+        self.assertEqual(fills, [])
+        self.assertEqual(order.quantity, 11)
+        self._assert_expired(order)
+        self.assertEqual(self.order_queue.sell_depth.available(), 15)
+
+        order, fills = self._submit(OrderSide.BUY, 101, 10, OrderType.FOK)
+        self.assertEqual(fills, [(100, 5), (101, 5)])
+        self.assertEqual(order.status, OrderStatus.FILLED)
+
+    def test_post_only_never_takes(self):
+        order, fills = self._submit(OrderSide.BUY, 100, 5, OrderType.POST_ONLY)
+        self.assertEqual(fills, [])
+        self._assert_expired(order)
+
+        order, fills = self._submit(OrderSide.BUY, 99, 5, OrderType.POST_ONLY)
+        self.assertEqual(fills, [])
+        self.assertIs(self.order_queue.get_best_buy_order(), order)
+        self.assertEqual(self.order_queue.buy_depth.levels(), [(99, 5), (98, 5)])
+
+    def test_depth_matches_book(self):
+        rng = random.Random(11)
+        order_processor = OrderProcessor(
+            self.order_queue, MatchEngine(), match_on_arrival=True
+        )
+        orders = []
+        for _ in range(2000):
+            if orders and rng.random() < 0.2:
+                order_processor.cancel_order(rng.choice(orders).order_id)
+            orders.append(
+                order_processor.receive_order(
+                    "user",
+                    rng.choice(list(OrderSide)),
+                    rng.randint(95, 105),
+                    rng.randint(1, 20),
+                    order_type=rng.choice(list(OrderType)),
+                )
+            )
+            order_processor.process_single_order()
+
+        for order_book, depth in [
+            (self.order_queue.buy_orders, self.order_queue.buy_depth),
+            (self.order_queue.sell_orders, self.order_queue.sell_depth),
+        ]:
+            expected = {}
+            for ho in order_book:
+                expected[ho.order.price] = (
+                    expected.get(ho.order.price, 0) + ho.order.quantity
+                )
+            self.assertEqual(dict(depth.levels()), expected)
+
 
 if __name__ == "__main__":
     unittest.main()
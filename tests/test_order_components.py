@@ -0,0 +1,242 @@
+import logging
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock
+from src.journal import EventJournal, replay_journal
+from src.order_components import (
+    CompactOrder,
+    IdBlockAllocator,
+    OrderSide,
+    OrderStatus,
+    PackedIdGenerator,
+    format_packed_id,
+    pack_id,
+    unpack_id,
+)
+from src.order_queue import OrderQueue
+from src.snapshot import take_snapshot, load_snapshot
+from src.match_engine import MatchEngine
+from src.order_processor import OrderProcessor
+
+
+class TestCompactOrder(unittest.TestCase):
+    def setUp(self):
+        CompactOrder.set_tick_size(0.01)
+        CompactOrder.reset_id_generator()
+
+    def test_integer_fields(self):
+        order = CompactOrder("user1", OrderSide.BUY, 100.25, 10)
+
+        self.assertEqual(order.order_id, 1)
+        self.assertEqual(order.price, 10025)
+        self.assertAlmostEqual(order.price_value, 100.25)
+        self.assertIsInstance(order.timestamp, int)
+        self.assertEqual(order.status, OrderStatus.PENDING)
+        self.assertFalse(hasattr(order, "__dict__"))
+
+    def test_tick_size(self):
+        CompactOrder.set_tick_size(0.5)
+        order1 = CompactOrder("user1", OrderSide.SELL, 100.5, 1)
+        order2 = CompactOrder("user2", OrderSide.SELL, 100.5, 1)
+
+        self.assertEqual(order1.price, 201)
+        self.assertIs(order1.price, order2.price)
+
+    def test_end_to_end(self):
+        order_queue = OrderQueue()
+        order_processor = OrderProcessor(
+            order_queue, MatchEngine(), order_class=CompactOrder
+        )
+        order1 = order_processor.receive_order("user1", OrderSide.BUY, 100.0, 10)
+        order2 = order_processor.receive_order("user2", OrderSide.SELL, 99.99, 4)
+        order_processor.process_orders()
+
+        self.assertEqual(order_processor.transactions, 1)
+        self.assertEqual(order1.status, OrderStatus.PARTIALLY_FILLED)
+        self.assertEqual(order1.quantity, 6)
+        self.assertEqual(order2.status, OrderStatus.FILLED)
+        self.assertEqual(order_queue.get_best_buy_order(), order1)
+        self.assertEqual(order_queue.orderbook_size, 1)
+
+    def test_match_log_in_price_units(self):
+        logger = Mock(spec=logging.Logger)
+        order_processor = OrderProcessor(
+            OrderQueue(), MatchEngine(logger), order_class=CompactOrder
+        )
+        order_processor.receive_order("user1", OrderSide.BUY, 100.5, 10)
+        order_processor.receive_order("user2", OrderSide.SELL, 100.5, 10)
+        order_processor.process_orders()
+
+        messages = [call.args[1] for call in logger.log.call_args_list]
+        self.assertIn("-- Matched: Buy 1 Sell 2 for 10 units at $100.50", messages)
+
+
+
+def generate_ids(allocator: IdBlockAllocator, count: int, results: mp.Queue) -> None:
+    generator = PackedIdGenerator(allocator=allocator)
+    results.put([generator.generate_id() for _ in range(count)])
+
+
+class TestPackedIds(unittest.TestCase):
+    def setUp(self):
+        self.default_generator = CompactOrder.id_generator
+
+    def tearDown(self):
+        CompactOrder.id_generator = self.default_generator
+
+    def test_pack_and_format(self):
+        order_id = pack_id(255, 255, (1 << 37) - 1)
+
+        self.assertEqual(unpack_id(order_id), (255, 255, (1 << 37) - 1))
+        self.assertEqual(order_id, (1 << 53) - 1)
+        self.assertLessEqual(len(str(order_id)), 16)
+        self.assertEqual(format_packed_id(pack_id(3, 1, 42)), "3-1-42")
+
+    def test_blocks(self):
+        allocator = IdBlockAllocator(block_size=4)
+        first = PackedIdGenerator(shard=1, allocator=allocator)
+        second = PackedIdGenerator(shard=1, allocator=allocator)
+
+        ids = [first.generate_id() for _ in range(5)] + [second.generate_id()]
+
+        self.assertEqual(
+            [unpack_id(order_id)[2] for order_id in ids], [1, 2, 3, 4, 5, 9]
+        )
+        self.assertEqual({unpack_id(order_id)[0] for order_id in ids}, {1})
+        with self.assertRaises(ValueError):
+            PackedIdGenerator(shard=256)
+
+    def test_generate_ids(self):
+        allocator = IdBlockAllocator(block_size=4)
+        first = PackedIdGenerator(allocator=allocator)
+        second = PackedIdGenerator(allocator=allocator)
+        first.generate_id()
+
+        ids = list(first.generate_ids(6)) + [second.generate_id(), first.generate_id()]
+
+        # Bulk ids come from fresh blocks; the rest of the last one is kept
+        self.assertEqual(
+            [unpack_id(order_id)[2] for order_id in ids], [5, 6, 7, 8, 9, 10, 13, 11]
+        )
+        self.assertEqual(list(first.generate_ids(0)), [])
+
+    def test_advance_past(self):
+        generator = PackedIdGenerator(session=2, allocator=IdBlockAllocator(8))
+        generator.advance_past(pack_id(0, 2, 20))
+        generator.advance_past(pack_id(0, 3, 100))
+
+        self.assertEqual(unpack_id(generator.generate_id()), (0, 2, 25))
+        self.assertGreater(generator.next_id, pack_id(0, 2, 25))
+
+    def test_threads_share_generator(self):
+        generator = PackedIdGenerator(allocator=IdBlockAllocator(block_size=64))
+        ids = [[] for _ in range(4)]
+
+        def produce(out):
+            for _ in range(5_000):
+                out.append(generator.generate_id())
+
+        threads = [threading.Thread(target=produce, args=(out,)) for out in ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        generated = [order_id for out in ids for order_id in out]
+        self.assertEqual(len(set(generated)), 20_000)
+
+    def test_threads_share_generator_in_bulk(self):
+        generator = PackedIdGenerator(allocator=IdBlockAllocator(block_size=64))
+        ids = [[] for _ in range(4)]
+
+        def produce(out, bulk):
+            for _ in range(500):
+                if bulk:
+                    out.extend(generator.generate_ids(10))
+                else:
+                    out.extend(generator.generate_id() for _ in range(10))
+
+        threads = [
+            threading.Thread(target=produce, args=(out, index % 2))
+            for index, out in enumerate(ids)
+        ]
+        # Switch threads often, so bulk claims interleave with single ids
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        generated = [order_id for out in ids for order_id in out]
+        self.assertEqual(len(set(generated)), 20_000)
+
+    def test_processes_share_allocator(self):
+        allocator = IdBlockAllocator(block_size=16, shared=True)
+        results = mp.Queue()
+        producers = [
+            mp.Process(target=generate_ids, args=(allocator, 100, results))
+            for _ in range(3)
+        ]
+        for producer in producers:
+            producer.start()
+        generated = [
+            order_id for _ in producers for order_id in results.get(timeout=10)
+        ]
+        for producer in producers:
+            producer.join()
+
+        self.assertEqual(len(set(generated)), 300)
+
+    def test_journal_replay_with_packed_ids(self):
+        CompactOrder.id_generator = PackedIdGenerator(shard=255, session=255)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.journal")
+            with EventJournal(path) as journal:
+                order_queue = OrderQueue(journal=journal)
+                order_processor = OrderProcessor(
+                    order_queue, MatchEngine(), order_class=CompactOrder
+                )
+                for _ in range(3):
+                    order_processor.receive_order("user1", OrderSide.BUY, 99.0, 10)
+                order_processor.cancel_order(pack_id(255, 255, 2))
+
+            CompactOrder.reset_id_generator()
+            restored = OrderQueue()
+            replay_journal(path, restored, CompactOrder)
+
+        self.assertEqual(
+            sorted(restored.order_map),
+            [pack_id(255, 255, 1), pack_id(255, 255, 3)],
+        )
+        self.assertEqual(
+            unpack_id(CompactOrder.id_generator.generate_id()), (255, 255, 1 << 16 | 1)
+        )
+
+    def test_snapshot_after_whole_blocks(self):
+        CompactOrder.id_generator = PackedIdGenerator(
+            allocator=IdBlockAllocator(block_size=4)
+        )
+        order_processor = OrderProcessor(
+            OrderQueue(), MatchEngine(), order_class=CompactOrder
+        )
+        order_processor.receive_orders(["user1"] * 8, [1] * 8, [99.0] * 8, [10] * 8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "book.snapshot")
+            take_snapshot(order_processor.order_queue, path, CompactOrder, fork=False)
+
+            CompactOrder.reset_id_generator()
+            load_snapshot(path, OrderQueue(), CompactOrder)
+
+        self.assertEqual(unpack_id(CompactOrder.id_generator.generate_id())[2], 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
+import os
+import tempfile
 import unittest
+from array import array
 from unittest.mock import Mock, patch
-from src.order_components import Order, OrderSide, OrderStatus
+from src.columnar import write_order_file
+from src.order_components import Order, CompactOrder, OrderSide, OrderStatus
+from src.risk import RiskChecker
 from src.order_queue import OrderQueue
 from src.match_engine import MatchEngine
 from src.logger import Logger, LOGGING_CONFIG
@@ -33,6 +38,21 @@ class TestOrderProcessor(unittest.TestCase):
         self.assertNotIn(order, self.order_queue.queue)
         self.assertEqual(order.status, OrderStatus.CANCELLED)
 
+    def test_amend_order(self):
+        buy = self.order_processor.receive_order("user1", OrderSide.BUY, 99.0, 10)
+        sell = self.order_processor.receive_order("user2", OrderSide.SELL, 101.0, 4)
+        self.order_processor.process_orders()
+
+        self.assertEqual(self.order_processor.amend_order(buy.order_id, 8), [])
+        matches = self.order_processor.amend_order(sell.order_id, price=98.0)
+
+        self.assertEqual([(m[2], m[3]) for m in matches], [(98.0, 4)])
+        self.assertEqual(buy.order_id, "00000001")
+        self.assertEqual(buy.quantity, 4)
+        self.assertEqual(sell.status, OrderStatus.FILLED)
+        self.assertEqual(self.order_processor.transactions, 1)
+        self.assertIsNone(self.order_processor.amend_order(sell.order_id, 1))
+
     def test_process_single_order(self):
         order1 = self.order_processor.receive_order("user1", OrderSide.BUY, 100.0, 10)
         self.order_processor.process_single_order()
@@ -74,5 +94,109 @@ class TestOrderProcessor(unittest.TestCase):
         self.match_engine.match_orders.assert_not_called()
 
 
+class TestBulkLoading(unittest.TestCase):
+    user_ids = ["user1", "user2", "user3", "user1"]
+    sides = array("b", [1, 2, 1, 2])
+    prices = array("d", [100.0, 101.5, 99.25, 100.0])
+    quantities = array("q", [10, 5, 7, 3])
+
+    def setUp(self):
+        Order.reset_id_generator()
+        CompactOrder.set_tick_size(0.01)
+        CompactOrder.reset_id_generator()
+
+    def _queued(self, order_processor):
+        return [
+            (order.order_id, order.user_id, order.side, order.price, order.quantity)
+            for order in order_processor.order_queue.queue
+        ]
+
+    def test_matches_receive_order(self):
+        for order_class in (Order, CompactOrder):
+            with self.subTest(order_class=order_class.__name__):
+                order_class.reset_id_generator()
+                single = OrderProcessor(
+                    OrderQueue(), MatchEngine(), order_class=order_class
+                )
+                for user_id, side, price, quantity in zip(
+                    self.user_ids, self.sides, self.prices, self.quantities
+                ):
+                    single.receive_order(user_id, OrderSide(side), price, quantity)
+                order_class.reset_id_generator()
+                bulk = OrderProcessor(
+                    OrderQueue(), MatchEngine(), order_class=order_class
+                )
+
+                queued = bulk.receive_orders(
+                    self.user_ids, self.sides, self.prices, self.quantities
+                )
+
+                self.assertEqual(queued, 4)
+                self.assertEqual(self._queued(bulk), self._queued(single))
+                self.assertEqual(
+                    list(bulk.order_queue.order_map),
+                    list(single.order_queue.order_map),
+                )
+                orders = list(bulk.order_queue.queue)
+                self.assertEqual(len({order.timestamp for order in orders}), 1)
+                self.assertTrue(
+                    all(order.status == OrderStatus.PENDING for order in orders)
+                )
+                bulk.process_orders()
+                single.process_orders()
+                self.assertEqual(bulk.transactions, single.transactions)
+                self.assertEqual(
+                    bulk.order_queue.buy_depth.levels(),
+                    single.order_queue.buy_depth.levels(),
+                )
+
+    def test_risk_checks_each_order(self):
+        order_processor = OrderProcessor(
+            OrderQueue(risk=RiskChecker(max_quantity=6)), MatchEngine()
+        )
+
+        queued = order_processor.receive_orders(
+            self.user_ids, self.sides, self.prices, self.quantities
+        )
+
+        self.assertEqual(queued, 2)
+        self.assertEqual(
+            [order.quantity for order in order_processor.order_queue.queue], [5, 3]
+        )
+
+    def test_rejects_unequal_columns(self):
+        order_processor = OrderProcessor(OrderQueue(), MatchEngine())
+
+        with self.assertRaises(ValueError):
+            order_processor.receive_orders(
+                self.user_ids, self.sides[:-1], self.prices, self.quantities
+            )
+        self.assertEqual(len(order_processor.order_queue.queue), 0)
+
+    def test_load_orders(self):
+        order_processor = OrderProcessor(
+            OrderQueue(), MatchEngine(), order_class=CompactOrder
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "orders")
+            write_order_file(
+                path, self.user_ids, self.sides, self.prices, self.quantities
+            )
+            queued = order_processor.load_orders(path, symbol="ABC")
+
+        self.assertEqual(queued, 4)
+        self.assertEqual(
+            self._queued(order_processor),
+            [
+                (1, "user1", OrderSide.BUY, 10000, 10),
+                (2, "user2", OrderSide.SELL, 10150, 5),
+                (3, "user3", OrderSide.BUY, 9925, 7),
+                (4, "user1", OrderSide.SELL, 10000, 3),
+            ],
+        )
+        self.assertEqual(order_processor.order_queue.queue[0].symbol, "ABC")
+        self.assertEqual(CompactOrder.id_generator.generate_id(), 5)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,8 @@
+import logging
 import unittest
+from unittest.mock import Mock
 from src.order_queue import OrderQueue
-from src.order_components import Order, OrderSide, OrderStatus
+from src.order_components import Order, CompactOrder, OrderSide, OrderStatus
 from src.logger import Logger, LOGGING_CONFIG
 
 
@@ -136,7 +138,219 @@ class TestOrderQueue(unittest.TestCase):
         self.assertNotIn(order1, sell_orders)
         self.assertEqual(100, best_sell.price)
         self.assertEqual(order1, best_sell)
-    
+
+    def test_time_priority_at_equal_price(self):
+        orders = [Order(i, side, 100, 5) for side in OrderSide for i in range(20)]
+        for order in orders:
+            self.order_queue.add_order(order)
+            self.order_queue.get_next_order()
+
+        buys = [self.order_queue.remove_best_buy_order() for _ in range(20)]
+        sells = [self.order_queue.remove_best_sell_order() for _ in range(20)]
+
+        self.assertEqual(buys + sells, orders)
+
+    def test_cancel_pending_keeps_fifo(self):
+        orders = [Order(i, OrderSide.BUY, 100, 5) for i in range(10)]
+        for order in orders:
+            self.order_queue.add_order(order)
+        for order in orders[2:4] + orders[-1:]:
+            self.assertTrue(self.order_queue.cancel_order(order.order_id))
+
+        remaining = orders[:2] + orders[4:-1]
+        queue = self.order_queue.queue
+        self.assertEqual(len(queue), 7)
+        self.assertEqual(list(queue), remaining)
+        self.assertNotIn(orders[2], queue)
+        self.assertIn(orders[4], queue)
+        self.assertEqual(
+            [self.order_queue.get_next_order() for _ in range(8)], remaining + [None]
+        )
+        self.assertFalse(queue)
+
+    def test_cancel_pending_compacts_markers(self):
+        orders = [Order(i, OrderSide.SELL, 100, 5) for i in range(10)]
+        for order in orders:
+            self.order_queue.add_order(order)
+        for order in orders[:6]:
+            self.order_queue.cancel_order(order.order_id)
+
+        self.assertEqual(len(self.order_queue.queue.removed), 0)
+        self.assertEqual(list(self.order_queue.queue), orders[6:])
+
+
+class TestLazyCancelOrderQueue(unittest.TestCase):
+    def setUp(self):
+        self.order_queue = OrderQueue(lazy_cancel=True, compaction_threshold=0.5)
+        Order.reset_id_generator()
+
+    def _process(self, *orders):
+        for order in orders:
+            self.order_queue.add_order(order)
+            self.order_queue.get_next_order()
+
+    def test_cancel_leaves_tombstone(self):
+        orders = [Order(i, OrderSide.BUY, 100 + i, 5) for i in range(4)]
+        self._process(*orders)
+
+        result = self.order_queue.cancel_order(orders[3].order_id)
+
+        self.assertTrue(result)
+        self.assertEqual(orders[3].status, OrderStatus.CANCELLED)
+        self.assertEqual(len(self.order_queue.buy_orders), 4)
+        self.assertEqual(self.order_queue.orderbook_size, 3)
+        self.assertEqual(self.order_queue.compaction_stats["buy_tombstones"], 1)
+
+    def test_tombstones_skipped_at_top(self):
+        orders = [Order(i, OrderSide.SELL, 100 + i, 5) for i in range(4)]
+        self._process(*orders)
+        self.order_queue.cancel_order(orders[0].order_id)
+
+        self.assertEqual(orders[1], self.order_queue.get_best_sell_order())
+        self.assertEqual(self.order_queue.sell_tombstones, 0)
+        self.assertEqual(orders[1], self.order_queue.remove_best_sell_order())
+        self.assertEqual(self.order_queue.orderbook_size, 2)
+
+    def test_compaction_past_threshold(self):
+        orders = [Order(i, OrderSide.BUY, 100 + i, 5) for i in range(4)]
+        self._process(*orders)
+
+        self.order_queue.cancel_order(orders[0].order_id)
+        self.order_queue.cancel_order(orders[1].order_id)
+        self.assertEqual(self.order_queue.compactions, 0)
+        self.order_queue.cancel_order(orders[2].order_id)
+
+        buy_orders = [od.order for od in self.order_queue.buy_orders]
+        self.assertEqual(buy_orders, [orders[3]])
+        self.assertEqual(
+            self.order_queue.compaction_stats,
+            {
+                "buy_tombstones": 0,
+                "sell_tombstones": 0,
+                "compactions": 1,
+                "compacted_entries": 3,
+            },
+        )
+        self.assertEqual(self.order_queue.orderbook_size, 1)
+
+    def test_cancel_all_orders(self):
+        orders = [Order(i, OrderSide.SELL, 100 + i, 5) for i in range(3)]
+        self._process(*orders)
+        for order in orders:
+            self.order_queue.cancel_order(order.order_id)
+
+        self.assertIsNone(self.order_queue.get_best_sell_order())
+        self.assertIsNone(self.order_queue.remove_best_sell_order())
+        self.assertEqual(self.order_queue.orderbook_size, 0)
+
+    def test_resting_orders_in_priority_order(self):
+        prices = [101, 99, 100, 99, 102, 100, 98]
+        orders = [Order(i, OrderSide.BUY, price, 5) for i, price in enumerate(prices)]
+        self._process(*orders)
+        self.order_queue.cancel_order(orders[1].order_id)
+
+        self.assertEqual(
+            list(self.order_queue.resting_orders(OrderSide.BUY)),
+            [orders[4], orders[0], orders[2], orders[5], orders[3], orders[6]],
+        )
+        self.assertEqual(list(self.order_queue.resting_orders(OrderSide.SELL)), [])
+
+
+class TestAmendOrderQueue(unittest.TestCase):
+    def setUp(self):
+        self.order_queue = OrderQueue()
+        Order.reset_id_generator()
+        self.orders = [Order(i, OrderSide.BUY, 100, 5) for i in range(3)]
+        for order in self.orders:
+            self.order_queue.add_order(order)
+            self.order_queue.get_next_order()
+
+    def _drain(self):
+        drained = []
+        while self.order_queue.get_best_buy_order():
+            drained.append(self.order_queue.remove_best_buy_order())
+        return drained
+
+    def test_quantity_reduction_keeps_priority(self):
+        first, second, third = self.orders
+        self.assertTrue(self.order_queue.amend_order(first.order_id, 2))
+
+        self.assertEqual(first.quantity, 2)
+        self.assertEqual(len(self.order_queue.buy_orders), 3)
+        self.assertEqual(self.order_queue.buy_depth.levels(), [(100, 12)])
+        self.assertEqual(self._drain(), [first, second, third])
+
+    def test_quantity_increase_loses_priority(self):
+        first, second, third = self.orders
+        self.assertTrue(self.order_queue.amend_order(first.order_id, 6))
+
+        self.assertEqual(self.order_queue.buy_tombstones, 1)
+        self.assertEqual(self.order_queue.buy_depth.levels(), [(100, 16)])
+        self.assertEqual(self._drain(), [second, third, first])
+        self.assertEqual(self.order_queue.buy_tombstones, 0)
+        self.assertEqual(self.order_queue.orderbook_size, 0)
+
+    def test_price_change_moves_level(self):
+        first, second, third = self.orders
+        self.assertTrue(self.order_queue.amend_order(third.order_id, price=101))
+        self.assertTrue(self.order_queue.amend_order(second.order_id, 1, 99))
+
+        self.assertIs(self.order_queue.get_best_buy_order(), third)
+        self.assertEqual(
+            self.order_queue.buy_depth.levels(), [(101, 5), (100, 5), (99, 1)]
+        )
+        self.assertEqual(self._drain(), [third, first, second])
+
+    def test_pending_order_amended_in_place(self):
+        pending = Order(9, OrderSide.SELL, 103, 5)
+        self.order_queue.add_order(pending)
+        self.assertTrue(self.order_queue.amend_order(pending.order_id, 7, 102))
+
+        self.assertEqual((pending.price, pending.quantity), (102, 7))
+        self.assertEqual(list(self.order_queue.queue), [pending])
+        self.assertEqual(self.order_queue.sell_depth.levels(), [])
+
+    def test_invalid_amends(self):
+        self.assertFalse(self.order_queue.amend_order("nonexistent_id", 1))
+        self.assertFalse(self.order_queue.amend_order(self.orders[0].order_id, 0))
+        self.order_queue.cancel_order(self.orders[1].order_id)
+        self.assertFalse(self.order_queue.amend_order(self.orders[1].order_id, 1))
+
+    def test_amend_logs_price_units(self):
+        CompactOrder.set_tick_size(0.01)
+        logger = Mock(spec=logging.Logger)
+        order_queue = OrderQueue(logger)
+        order = CompactOrder("user1", OrderSide.BUY, 100.0, 5)
+        order_queue.add_order(order)
+
+        order_queue.amend_order(order.order_id, 4, CompactOrder.parse_price(100.5))
+
+        self.assertEqual(
+            logger.log.call_args.args[1],
+            f"Order amended: {order.order_id}, price 100.5, quantity 4",
+        )
+
+    def test_cancel_after_amends(self):
+        first, second, third = self.orders
+        self.order_queue.amend_order(first.order_id, price=101)
+        self.order_queue.amend_order(first.order_id, price=99)
+        self.order_queue.cancel_order(first.order_id)
+
+        self.assertEqual(self.order_queue.buy_tombstones, 0)
+        self.assertEqual(self.order_queue.buy_depth.levels(), [(100, 10)])
+        self.assertEqual(self._drain(), [second, third])
+
+    def test_compaction_drops_amended_entries(self):
+        first, second, third = self.orders
+        for order in self.orders:
+            self.order_queue.amend_order(order.order_id, price=99)
+        self.assertEqual(self.order_queue.compactions, 0)
+        self.order_queue.amend_order(first.order_id, price=98)
+
+        self.assertEqual(self.order_queue.compactions, 1)
+        self.assertEqual(len(self.order_queue.buy_orders), 3)
+        self.assertEqual(self._drain(), [second, third, first])
+
 
 if __name__ == "__main__":
     unittest.main()
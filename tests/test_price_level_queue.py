@@ -0,0 +1,116 @@
+import unittest
+from src.price_level_queue import PriceLevelOrderQueue
+from src.match_engine import MatchEngine
+from src.order_components import Order, OrderSide, OrderStatus
+
+
+class TestPriceLevelOrderQueue(unittest.TestCase):
+    def setUp(self):
+        self.order_queue = PriceLevelOrderQueue()
+        self.match_engine = MatchEngine()
+        Order.reset_id_generator()
+
+    def _process(self, *orders):
+        for order in orders:
+            self.order_queue.add_order(order)
+            self.order_queue.get_next_order()
+
+    def test_best_orders(self):
+        self._process(
+            Order(1, OrderSide.BUY, 100, 5),
+            Order(2, OrderSide.BUY, 101, 5),
+            Order(3, OrderSide.SELL, 103, 5),
+            Order(4, OrderSide.SELL, 102, 5),
+        )
+
+        self.assertEqual(101, self.order_queue.get_best_buy_order().price)
+        self.assertEqual(102, self.order_queue.get_best_sell_order().price)
+        self.assertEqual(self.order_queue.orderbook_size, 4)
+
+    def test_fifo_within_level(self):
+        order1 = Order(1, OrderSide.SELL, 100, 5)
+        order2 = Order(2, OrderSide.SELL, 100, 5)
+        self._process(order1, order2)
+
+        self.assertEqual(order1, self.order_queue.remove_best_sell_order())
+        self.assertEqual(order2, self.order_queue.remove_best_sell_order())
+        self.assertIsNone(self.order_queue.remove_best_sell_order())
+        self.assertEqual(self.order_queue.sell_levels, {})
+        self.assertEqual(self.order_queue.orderbook_size, 0)
+
+    def test_cancel_processing_order(self):
+        order1 = Order(1, OrderSide.BUY, 101, 5)
+        order2 = Order(2, OrderSide.BUY, 100, 5)
+        self._process(order1, order2)
+
+        result = self.order_queue.cancel_order(order1.order_id)
+
+        self.assertTrue(result)
+        self.assertEqual(order1.status, OrderStatus.CANCELLED)
+        self.assertEqual(self.order_queue.orderbook_size, 1)
+        self.assertNotIn(101, self.order_queue.buy_levels)
+        self.assertEqual(order2, self.order_queue.get_best_buy_order())
+
+    def test_level_recreated_after_emptied(self):
+        order1 = Order(1, OrderSide.BUY, 101, 5)
+        self._process(order1)
+        self.order_queue.cancel_order(order1.order_id)
+        order2 = Order(2, OrderSide.BUY, 101, 5)
+        self._process(order2)
+
+        self.assertEqual(order2, self.order_queue.remove_best_buy_order())
+        self.assertIsNone(self.order_queue.get_best_buy_order())
+        self.assertEqual(self.order_queue._buy_prices, [])
+
+    def test_amend_order(self):
+        order1 = Order(1, OrderSide.SELL, 100, 5)
+        order2 = Order(2, OrderSide.SELL, 100, 5)
+        self._process(order1, order2)
+
+        self.assertTrue(self.order_queue.amend_order(order1.order_id, 3))
+        self.assertEqual(order1, self.order_queue.get_best_sell_order())
+        self.assertEqual(order1.quantity, 3)
+
+        self.assertTrue(self.order_queue.amend_order(order1.order_id, 8))
+        self.assertEqual(order2, self.order_queue.get_best_sell_order())
+        self.assertFalse(self.order_queue.amend_order("nonexistent_id", 1))
+
+    def test_amend_price(self):
+        order1 = Order(1, OrderSide.BUY, 100, 5)
+        order2 = Order(2, OrderSide.BUY, 100, 5)
+        self._process(order1, order2)
+
+        self.assertTrue(self.order_queue.amend_order(order2.order_id, price=101))
+        self.assertEqual(order2, self.order_queue.get_best_buy_order())
+        self.assertTrue(self.order_queue.amend_order(order1.order_id, 2, 101))
+
+        self.assertEqual(list(self.order_queue.buy_levels), [101])
+        self.assertEqual(self.order_queue.buy_depth.levels(), [(101, 7)])
+        self.assertEqual(order2, self.order_queue.remove_best_buy_order())
+        self.assertEqual(order1, self.order_queue.remove_best_buy_order())
+
+    def test_match_engine_runs_on_price_levels(self):
+        self._process(
+            Order(1, OrderSide.BUY, 100, 10),
+            Order(2, OrderSide.BUY, 100, 5),
+            Order(3, OrderSide.SELL, 95, 8),
+            Order(4, OrderSide.SELL, 98, 10),
+        )
+
+        num_removed, matches = self.match_engine.match_orders(self.order_queue)
+
+        self.assertEqual(num_removed, 3)
+        self.assertEqual(
+            [(b.order_id, s.order_id) for b, s, *_ in matches],
+            [
+                ("00000001", "00000003"),
+                ("00000001", "00000004"),
+                ("00000002", "00000004"),
+            ],
+        )
+        self.assertEqual(self.order_queue.get_best_sell_order().quantity, 3)
+        self.assertEqual(self.order_queue.orderbook_size, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import tempfile
+import time
+import unittest
+from src.columnar import ColumnReader
+from src.retention import OrderArchive, RetentionPolicy
+from src.order_components import Order, CompactOrder, OrderSide, OrderStatus
+from src.order_queue import OrderQueue
+from src.match_engine import MatchEngine
+from src.order_processor import OrderProcessor
+
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        Order.reset_id_generator()
+        CompactOrder.reset_id_generator()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _trade(self, retention, order_class=Order, pairs=20):
+        order_queue = OrderQueue(retention=retention)
+        order_processor = OrderProcessor(
+            order_queue, MatchEngine(), order_class=order_class
+        )
+        for i in range(pairs):
+            order_processor.receive_order(f"user{i}", OrderSide.BUY, 100, 5)
+            order_processor.receive_order(f"user{i}", OrderSide.SELL, 100, 5)
+        order_processor.receive_order("resting", OrderSide.BUY, 90, 5)
+        order_processor.process_orders()
+        return order_queue
+
+    def test_count_window(self):
+        archive = OrderArchive(self.directory.name)
+        retention = RetentionPolicy(archive, max_orders=10, batch_size=4)
+        order_queue = self._trade(retention)
+
+        self.assertLessEqual(len(order_queue.filled_orders), 10 + 4)
+        self.assertEqual(len(archive) + len(order_queue.filled_orders), 40)
+        self.assertEqual(retention.evicted, len(archive))
+        self.assertNotIn("00000001", order_queue.order_map)
+        self.assertIn("00000041", order_queue.order_map)
+
+        archived = order_queue.lookup_order("00000001")
+        self.assertEqual(archived.order_id, "00000001")
+        self.assertEqual(archived.user_id, "user0")
+        self.assertEqual(archived.status, OrderStatus.FILLED)
+        self.assertIs(
+            order_queue.lookup_order("00000041"), order_queue.order_map["00000041"]
+        )
+        self.assertIsNone(order_queue.lookup_order("00000099"))
+
+    def test_age_window(self):
+        archive = OrderArchive(self.directory.name)
+        retention = RetentionPolicy(archive, max_age_seconds=60)
+        order_queue = self._trade(retention)
+
+        self.assertEqual(retention.enforce(order_queue), 0)
+        self.assertEqual(retention.enforce(order_queue, time.monotonic() + 61), 40)
+        self.assertEqual(order_queue.filled_orders, [])
+        self.assertEqual(list(order_queue.order_map), ["00000041"])
+
+    def test_archive_reopens_segments(self):
+        retention = RetentionPolicy(
+            OrderArchive(self.directory.name, CompactOrder), max_orders=0, batch_size=1
+        )
+        self._trade(retention, CompactOrder)
+
+        archive = OrderArchive(self.directory.name, CompactOrder)
+        self.assertEqual(len(archive), 40)
+        self.assertEqual(archive.lookup(2).side, OrderSide.SELL)
+        self.assertEqual(archive.lookup(39).user_id, "user19")
+        self.assertIsNone(archive.lookup(41))
+        archive.close()
+
+    def test_archive_bounds_open_segments(self):
+        retention = RetentionPolicy(
+            OrderArchive(self.directory.name, max_open_segments=2),
+            max_orders=0,
+            batch_size=1,
+        )
+        order_queue = self._trade(retention)
+        archive = retention.archive
+
+        for number in range(1, 41):
+            archived = archive.lookup(f"{number:08d}")
+            self.assertEqual(archived.order_id, f"{number:08d}")
+            self.assertLessEqual(len(archive.readers), 2)
+        self.assertIsNone(order_queue.lookup_order("not-an-id"))
+        self.assertIsNone(archive.lookup(None))
+        # Ids are stored as integers, whatever the Order class
+        reader = ColumnReader(archive.segments[0][0])
+        self.assertEqual(reader.entries["order_id"][0]["type"], "q")
+        reader.close()
+        archive.close()
+        self.assertEqual(len(archive.readers), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from src.ring_buffer import SharedRingBuffer
+
+
+class TestSharedRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.ring = SharedRingBuffer("qd", capacity=4)
+
+    def tearDown(self):
+        self.ring.close()
+        self.ring.unlink()
+
+    def test_put_and_get(self):
+        self.assertTrue(self.ring.put(1, 100.5))
+        self.assertTrue(self.ring.put(2, 101.0))
+
+        self.assertEqual(len(self.ring), 2)
+        self.assertEqual(self.ring.get(), (1, 100.5))
+        self.assertEqual(self.ring.get(), (2, 101.0))
+        self.assertIsNone(self.ring.get())
+
+    def test_full_ring_rejects_put(self):
+        for i in range(4):
+            self.assertTrue(self.ring.put(i, 0.0))
+
+        self.assertFalse(self.ring.put(4, 0.0))
+        self.ring.get()
+        self.assertTrue(self.ring.put(4, 0.0))
+
+    def test_drain_wraps_around(self):
+        for i in range(3):
+            self.ring.put(i, 0.0)
+        self.ring.drain()
+        for i in range(3, 7):
+            self.ring.put(i, float(i))
+
+        self.assertEqual([record[0] for record in self.ring.drain()], [3, 4, 5, 6])
+        self.assertEqual(len(self.ring), 0)
+
+    def test_attach_by_name(self):
+        other = SharedRingBuffer("qd", capacity=4, name=self.ring.name, create=False)
+        other.put(7, 1.5)
+
+        self.assertEqual(self.ring.get(), (7, 1.5))
+        other.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,307 @@
+import os
+import random
+import tempfile
+import unittest
+from src.journal import EventJournal, FsyncPolicy, replay_journal
+from src.match_engine import MatchEngine
+from src.order_components import (
+    Order,
+    CompactOrder,
+    OrderSide,
+    OrderStatus,
+    OrderType,
+)
+from src.order_queue import OrderQueue
+from src.order_processor import OrderProcessor
+from src.price_level_queue import PriceLevelOrderQueue
+from src.risk import RejectReason, RiskChecker, SelfTradePrevention
+
+OPEN = (OrderStatus.PENDING, OrderStatus.PROCESSING, OrderStatus.PARTIALLY_FILLED)
+
+
+def exposure(order_queue: OrderQueue) -> tuple[dict, dict]:
+    """Per-user open orders and notional recomputed from scratch"""
+    open_orders, open_notional = {}, {}
+    for order in order_queue.order_map.values():
+        if order.status in OPEN:
+            user_id = order.user_id
+            open_orders[user_id] = open_orders.get(user_id, 0) + 1
+            if order.order_type is not OrderType.MARKET:
+                open_notional[user_id] = (
+                    open_notional.get(user_id, 0) + order.price * order.quantity
+                )
+    return open_orders, open_notional
+
+
+def tracked(risk: RiskChecker) -> tuple[dict, dict]:
+    return (
+        {user: count for user, count in risk.open_orders.items() if count},
+        {user: total for user, total in risk.open_notional.items() if total},
+    )
+
+
+class TestRiskChecks(unittest.TestCase):
+    def setUp(self):
+        Order.reset_id_generator()
+        self.risk = RiskChecker(
+            price_band=0.1, max_quantity=100, max_open_orders=3, max_open_notional=1000
+        )
+        self.order_queue = OrderQueue(risk=self.risk)
+        self.order_processor = OrderProcessor(self.order_queue, MatchEngine())
+
+    def _receive(self, user_id, side, price, quantity, **options):
+        order = self.order_processor.receive_order(
+            user_id, side, price, quantity, **options
+        )
+        self.order_processor.process_single_order()
+        return order
+
+    def _assert_rejected(self, order, reason):
+        self.assertEqual(order.status, OrderStatus.REJECTED)
+        # check has no side effects, so it names the reason again
+        self.assertEqual(self.risk.check(order, self.order_queue), reason)
+
+    def test_max_quantity(self):
+        order = self.order_processor.receive_order("user1", OrderSide.BUY, 5, 101)
+
+        self._assert_rejected(order, RejectReason.MAX_QUANTITY)
+        self.assertNotIn(order.order_id, self.order_queue.order_map)
+        self.assertEqual(len(self.order_queue.queue), 0)
+
+    def test_price_band_around_mid_then_last_trade(self):
+        self._receive("user1", OrderSide.BUY, 95, 1)
+        self._receive("user2", OrderSide.SELL, 105, 1)
+        self.assertEqual(self.risk.reference_price(self.order_queue), 100)
+        self._assert_rejected(
+            self._receive("user3", OrderSide.BUY, 111, 1), RejectReason.PRICE_BAND
+        )
+
+        self._receive("user3", OrderSide.BUY, 105, 1)
+        self.assertEqual(self.risk.last_price, 105)
+        self.assertNotEqual(
+            self._receive("user3", OrderSide.SELL, 112, 1).status,
+            OrderStatus.REJECTED,
+        )
+
+    def test_open_orders_released_by_fill_and_cancel(self):
+        for _ in range(3):
+            self._receive("user1", OrderSide.BUY, 10, 1)
+        self._assert_rejected(
+            self._receive("user1", OrderSide.BUY, 10, 1), RejectReason.OPEN_ORDERS
+        )
+
+        self._receive("user2", OrderSide.SELL, 10, 1)
+        self.order_processor.cancel_order("00000002")
+        self.assertEqual(self.risk.open_orders["user1"], 1)
+        self.assertNotEqual(
+            self._receive("user1", OrderSide.BUY, 10, 1).status, OrderStatus.REJECTED
+        )
+
+    def test_open_notional(self):
+        self._receive("user1", OrderSide.BUY, 10, 60)
+        self._assert_rejected(
+            self._receive("user1", OrderSide.BUY, 10, 50), RejectReason.OPEN_NOTIONAL
+        )
+        self._receive("user1", OrderSide.BUY, 10, 10)
+        self.assertIsNone(self.order_processor.amend_order("00000001", quantity=101))
+        self.assertIsNone(self.order_processor.amend_order("00000001", quantity=95))
+        self.assertEqual(self.order_processor.amend_order("00000001", quantity=90), [])
+        self.assertEqual(self.risk.open_notional["user1"], 1000)
+
+        self._receive("user2", OrderSide.SELL, 10, 50)
+        self.assertEqual(self.risk.open_notional["user1"], 500)
+        self.assertEqual(
+            self._receive("user1", OrderSide.BUY, 10, 50).status,
+            OrderStatus.PROCESSING,
+        )
+
+    def test_market_orders_checked_at_reference_price(self):
+        self._receive("user2", OrderSide.SELL, 10, 100)
+        self._receive("user1", OrderSide.BUY, 10, 1)
+        self._receive("user1", OrderSide.BUY, 9, 10)
+        order = self._receive(
+            "user1", OrderSide.BUY, 0, 100, order_type=OrderType.MARKET
+        )
+
+        self._assert_rejected(order, RejectReason.OPEN_NOTIONAL)
+        self.assertEqual(self.risk.open_notional["user1"], 90)
+
+
+class TestExposureTracking(unittest.TestCase):
+    def setUp(self):
+        Order.reset_id_generator()
+        CompactOrder.reset_id_generator()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "events.journal")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _trade(self, order_processor, seed=1, orders=500):
+        rng = random.Random(seed)
+        received = []
+        for _ in range(orders):
+            side = rng.choice([OrderSide.BUY, OrderSide.SELL])
+            received.append(
+                order_processor.receive_order(
+                    f"user{rng.randint(1, 5)}",
+                    side,
+                    rng.randint(95, 105),
+                    rng.randint(1, 20),
+                    order_type=rng.choice(list(OrderType)),
+                )
+            )
+            if rng.random() < 0.2:
+                order_processor.cancel_order(rng.choice(received).order_id)
+            if rng.random() < 0.2:
+                order_processor.amend_order(
+                    rng.choice(received).order_id,
+                    rng.randint(1, 20),
+                    rng.choice([None, rng.randint(95, 105)]),
+                )
+            if rng.random() < 0.8:
+                order_processor.process_single_order()
+            if rng.random() < 0.02:
+                order_processor.process_auction()
+
+    def test_counters_match_open_orders(self):
+        queues = {
+            "heap": lambda risk: OrderQueue(risk=risk),
+            "lazy": lambda risk: OrderQueue(lazy_cancel=True, risk=risk),
+            "levels": lambda risk: PriceLevelOrderQueue(risk=risk),
+        }
+        for name, make_queue in queues.items():
+            for order_class in (Order, CompactOrder):
+                for match_on_arrival in (False, True):
+                    with self.subTest(
+                        queue=name, order_class=order_class, on_arrival=match_on_arrival
+                    ):
+                        risk = RiskChecker(max_open_orders=50, order_class=order_class)
+                        order_queue = make_queue(risk)
+                        order_processor = OrderProcessor(
+                            order_queue,
+                            MatchEngine(
+                                self_trade_prevention=SelfTradePrevention.CANCEL_BOTH
+                            ),
+                            order_class=order_class,
+                            match_on_arrival=match_on_arrival,
+                        )
+                        self._trade(order_processor)
+                        self.assertEqual(tracked(risk), exposure(order_queue))
+
+    def test_replay_rebuilds_exposure(self):
+        journal = EventJournal(self.path, fsync_policy=FsyncPolicy.NEVER)
+        risk = RiskChecker(max_open_orders=50)
+        order_queue = OrderQueue(journal=journal, risk=risk)
+        order_processor = OrderProcessor(
+            order_queue,
+            MatchEngine(self_trade_prevention=SelfTradePrevention.CANCEL_RESTING),
+        )
+        self._trade(order_processor, seed=2)
+        journal.close()
+
+        Order.reset_id_generator()
+        restored = OrderQueue(risk=RiskChecker())
+        replay_journal(self.path, restored)
+
+        self.assertEqual(tracked(restored.risk), tracked(risk))
+
+
+class TestSelfTradePrevention(unittest.TestCase):
+    def setUp(self):
+        Order.reset_id_generator()
+
+    def _self_trade(self, mode, match_on_arrival):
+        order_queue = OrderQueue()
+        order_processor = OrderProcessor(
+            order_queue,
+            MatchEngine(self_trade_prevention=mode),
+            match_on_arrival=match_on_arrival,
+        )
+        resting = order_processor.receive_order("user1", OrderSide.SELL, 100, 5)
+        other = order_processor.receive_order("user2", OrderSide.SELL, 101, 5)
+        order_processor.process_orders()
+        incoming = order_processor.receive_order("user1", OrderSide.BUY, 101, 8)
+        matches = order_processor.process_single_order()
+        return order_queue, resting, other, incoming, matches
+
+    def test_modes(self):
+        expected = {
+            SelfTradePrevention.CANCEL_RESTING: (OrderStatus.CANCELLED, 1),
+            SelfTradePrevention.CANCEL_INCOMING: (OrderStatus.PROCESSING, 0),
+            SelfTradePrevention.CANCEL_BOTH: (OrderStatus.CANCELLED, 0),
+        }
+        for mode, (resting_status, fills) in expected.items():
+            for match_on_arrival in (False, True):
+                with self.subTest(mode=mode, on_arrival=match_on_arrival):
+                    order_queue, resting, other, incoming, matches = (
+                        self._self_trade(mode, match_on_arrival)
+                    )
+                    self.assertEqual(resting.status, resting_status)
+                    self.assertEqual(len(matches), fills)
+                    if fills:
+                        self.assertIs(matches[0][1], other)
+                        self.assertEqual(incoming.status, OrderStatus.PARTIALLY_FILLED)
+                        self.assertEqual(order_queue.buy_depth.levels(), [(101, 3)])
+                    else:
+                        self.assertEqual(incoming.status, OrderStatus.CANCELLED)
+                        self.assertEqual(order_queue.buy_depth.levels(), [])
+                    self.assertNotIn(
+                        incoming.order_id if not fills else resting.order_id,
+                        order_queue.order_map,
+                    )
+
+    def _fill_or_kill(self, mode, order_queue, sells):
+        order_processor = OrderProcessor(
+            order_queue, MatchEngine(self_trade_prevention=mode)
+        )
+        for user_id, price in sells:
+            order_processor.receive_order(user_id, OrderSide.SELL, price, 5)
+        order_processor.process_orders()
+        incoming = order_processor.receive_order(
+            "user1", OrderSide.BUY, 101, 10, order_type=OrderType.FOK
+        )
+        return incoming, order_processor.process_single_order()
+
+    def test_fill_or_kill_excludes_own_orders(self):
+        queues = {
+            "heap": OrderQueue,
+            "lazy": lambda: OrderQueue(lazy_cancel=True),
+            "levels": PriceLevelOrderQueue,
+        }
+        # Only CANCEL_RESTING trades through the user's own order at 100
+        expected = {
+            SelfTradePrevention.CANCEL_RESTING: 2,
+            SelfTradePrevention.CANCEL_INCOMING: 0,
+            SelfTradePrevention.CANCEL_BOTH: 0,
+        }
+        for name, make_queue in queues.items():
+            for mode, fills in expected.items():
+                with self.subTest(queue=name, mode=mode):
+                    order_queue = make_queue()
+                    incoming, matches = self._fill_or_kill(
+                        mode,
+                        order_queue,
+                        [("user2", 100), ("user1", 100), ("user3", 101)],
+                    )
+                    self.assertEqual(len(matches), fills)
+                    if fills:
+                        self.assertEqual(incoming.status, OrderStatus.FILLED)
+                    else:
+                        self.assertEqual(incoming.status, OrderStatus.CANCELLED)
+                        self.assertEqual(
+                            order_queue.sell_depth.levels(), [(100, 10), (101, 5)]
+                        )
+
+                with self.subTest(queue=name, mode=mode, liquidity="short"):
+                    order_queue = make_queue()
+                    incoming, matches = self._fill_or_kill(
+                        mode, order_queue, [("user2", 100), ("user1", 100)]
+                    )
+                    self.assertEqual(len(matches), 0)
+                    self.assertEqual(incoming.status, OrderStatus.CANCELLED)
+                    self.assertEqual(order_queue.sell_depth.levels(), [(100, 10)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from src.order_components import OrderSide, OrderStatus
+from src.shard_router import ShardRouter, ShardEvent, ShardMessage, ShardWorker
+
+
+class TestShardRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = ShardRouter(num_shards=2, batch_size=2)
+        self.router.start()
+
+    def tearDown(self):
+        if self.router.workers:
+            self.router.stop()
+
+    def test_shard_for_is_stable(self):
+        self.assertEqual(self.router.shard_for("AAPL"), self.router.shard_for("AAPL"))
+        self.assertIn(self.router.shard_for("MSFT"), range(2))
+
+    def test_orders_matched_per_symbol(self):
+        buy = self.router.submit_order("AAPL", "user1", OrderSide.BUY, 100.0, 10)
+        other = self.router.submit_order("MSFT", "user2", OrderSide.SELL, 99.0, 10)
+        sell = self.router.submit_order("AAPL", "user3", OrderSide.SELL, 100.0, 4)
+        self.router.cancel_order("MSFT", other)
+
+        results = [record for _, record in self.router.stop()]
+
+        fills = [r for r in results if r[0] == ShardEvent.FILL]
+        self.assertEqual(fills, [(ShardEvent.FILL, buy, sell, 100.0, 4)])
+        statuses = [(r[1], r[4]) for r in results if r[0] == ShardEvent.STATUS]
+        self.assertEqual(
+            sorted(statuses),
+            [
+                (buy, OrderStatus.PROCESSING.value),
+                (buy, OrderStatus.PARTIALLY_FILLED.value),
+                (other, OrderStatus.CANCELLED.value),
+                (other, OrderStatus.PROCESSING.value),
+                (sell, OrderStatus.FILLED.value),
+            ],
+        )
+
+
+class TestShardWorker(unittest.TestCase):
+    def setUp(self):
+        self.published = []
+        self.worker = ShardWorker(
+            lambda *fields: self.published.append(fields), match_on_arrival=True
+        )
+
+    def _new_order(self, client_id, side, price, quantity):
+        message = ShardMessage.NEW_ORDER, client_id, "AAPL", "user1", side.value
+        self.worker.handle((*message, price, quantity))
+
+    def test_status_of_both_sides(self):
+        self._new_order(1, OrderSide.SELL, 100.0, 5)
+        self._new_order(2, OrderSide.SELL, 100.0, 5)
+        self.published.clear()
+        self._new_order(3, OrderSide.BUY, 100.0, 7)
+
+        self.assertEqual(
+            self.published,
+            [
+                (ShardEvent.FILL, 3, 1, 100.0, 5),
+                (ShardEvent.FILL, 3, 2, 100.0, 2),
+                (ShardEvent.STATUS, 1, 0, 0.0, OrderStatus.FILLED.value),
+                (ShardEvent.STATUS, 2, 0, 0.0, OrderStatus.PARTIALLY_FILLED.value),
+                (ShardEvent.STATUS, 3, 0, 0.0, OrderStatus.FILLED.value),
+            ],
+        )
+
+    def test_forgets_finished_orders(self):
+        self._new_order(1, OrderSide.SELL, 100.0, 5)
+        self._new_order(2, OrderSide.BUY, 100.0, 5)
+        self._new_order(3, OrderSide.BUY, 99.0, 5)
+        self.worker.handle((ShardMessage.CANCEL_ORDER, 3, "AAPL"))
+        self._new_order(4, OrderSide.BUY, 98.0, 5)
+
+        self.assertEqual(list(self.worker.orders), [4])
+        self.assertEqual(list(self.worker.client_ids.values()), [4])
+        self.published.clear()
+        self.worker.handle((ShardMessage.CANCEL_ORDER, 1, "AAPL"))
+        self.assertEqual(self.published, [])
+
+    def test_cancel_with_wrong_symbol(self):
+        self._new_order(1, OrderSide.BUY, 99.0, 5)
+        self.worker.handle((ShardMessage.CANCEL_ORDER, 1, "MSFT"))
+
+        self.assertEqual(
+            self.published[-1],
+            (ShardEvent.STATUS, 1, 0, 0.0, OrderStatus.CANCELLED.value),
+        )
+        self.assertEqual(self.worker.orders, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
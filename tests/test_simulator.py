@@ -0,0 +1,170 @@
+import os
+import tempfile
+import unittest
+from src.match_engine import MatchEngine
+from src.order_components import Order, CompactOrder, OrderStatus
+from src.order_processor import OrderProcessor
+from src.order_queue import OrderQueue
+from src.simulator import (
+    NANOSECONDS,
+    OrderFlow,
+    SimulationEvent,
+    Simulator,
+    read_order_stream,
+    write_order_stream,
+)
+
+
+def simulate(events, order_class=CompactOrder, lazy_cancel=True) -> tuple:
+    order_queue = OrderQueue(lazy_cancel=lazy_cancel)
+    simulator = Simulator(
+        OrderProcessor(order_queue, MatchEngine(), order_class=order_class)
+    )
+    simulator.run(events)
+    return simulator, order_queue
+
+
+def book_state(order_queue: OrderQueue) -> tuple:
+    return (
+        {
+            order_id: (order.side, order.price, order.quantity, order.timestamp)
+            for order_id, order in order_queue.order_map.items()
+        },
+        order_queue.buy_depth.levels(),
+        order_queue.sell_depth.levels(),
+    )
+
+
+class TestOrderFlow(unittest.TestCase):
+    def test_same_seed_same_events(self):
+        self.assertEqual(
+            list(OrderFlow(seed=3).events(60)), list(OrderFlow(seed=3).events(60))
+        )
+        self.assertNotEqual(
+            list(OrderFlow(seed=3).events(60)), list(OrderFlow(seed=4).events(60))
+        )
+
+    def test_poisson_rates_and_ordering(self):
+        events = list(OrderFlow(arrival_rate=200, cancel_rate=50).events(100))
+        times = [event[0] for event in events]
+        self.assertEqual(times, sorted(times))
+        self.assertLess(times[-1], 100 * NANOSECONDS)
+        new_orders = [e for e in events if e[1] == SimulationEvent.NEW_ORDER]
+        cancels = [e for e in events if e[1] == SimulationEvent.CANCEL_ORDER]
+        self.assertAlmostEqual(len(new_orders) / 100, 200, delta=10)
+        self.assertAlmostEqual(len(cancels) / 100, 50, delta=5)
+        self.assertTrue(all(e[3] > 0 and 1 <= e[4] <= 20 for e in new_orders))
+
+    def test_cancels_target_earlier_orders(self):
+        orders = 0
+        for event in OrderFlow(cancel_rate=100, cancel_window=10).events(20):
+            if event[1] == SimulationEvent.NEW_ORDER:
+                orders += 1
+            else:
+                self.assertTrue(max(0, orders - 10) <= event[6] < orders)
+
+    def test_mid_drifts(self):
+        prices = [
+            event[3]
+            for event in OrderFlow(volatility=0.01, price_spread=0).events(600)
+            if event[1] == SimulationEvent.NEW_ORDER
+        ]
+        self.assertNotEqual(prices[0], prices[-1])
+        self.assertAlmostEqual(prices[0], 100, delta=1)
+
+
+class TestSimulator(unittest.TestCase):
+    def test_runs_are_identical(self):
+        for order_class in (Order, CompactOrder):
+            with self.subTest(order_class=order_class.__name__):
+                first, first_queue = simulate(
+                    OrderFlow(seed=7).events(120), order_class
+                )
+                second, second_queue = simulate(
+                    OrderFlow(seed=7).events(120), order_class
+                )
+                self.assertGreater(first.fills, 0)
+                self.assertGreater(first.cancelled, 0)
+                self.assertEqual(first.digest(), second.digest())
+                self.assertEqual(book_state(first_queue), book_state(second_queue))
+
+    def test_cancel_mode_does_not_change_results(self):
+        lazy, lazy_queue = simulate(OrderFlow(seed=2).events(60))
+        eager, eager_queue = simulate(OrderFlow(seed=2).events(60), lazy_cancel=False)
+        self.assertEqual(lazy.digest(), eager.digest())
+        self.assertEqual(book_state(lazy_queue), book_state(eager_queue))
+
+    def test_orders_carry_virtual_time(self):
+        events = list(OrderFlow(cancel_rate=0).events(5))
+        simulator, order_queue = simulate(events)
+        self.assertEqual(simulator.now, events[-1][0])
+        timestamps = {event[0] for event in events}
+        resting = list(order_queue.order_map.values())
+        self.assertTrue(resting)
+        self.assertTrue(all(order.timestamp in timestamps for order in resting))
+
+        simulator, order_queue = simulate(events, Order)
+        microseconds = {timestamp // 1000 for timestamp in timestamps}
+        self.assertTrue(
+            all(
+                Order.encode_timestamp(order.timestamp) in microseconds
+                for order in order_queue.order_map.values()
+            )
+        )
+
+    def test_cancelled_orders_leave_the_book(self):
+        simulator, order_queue = simulate(OrderFlow(seed=5).events(60))
+        self.assertEqual(simulator.submitted, len(simulator.order_ids))
+        self.assertGreater(simulator.cancelled, 0)
+        missing = [
+            order_id
+            for order_id in simulator.order_ids
+            if order_id not in order_queue.order_map
+        ]
+        self.assertEqual(len(missing), simulator.cancelled)
+        resting = {}
+        for order in order_queue.order_map.values():
+            self.assertNotEqual(order.status, OrderStatus.CANCELLED)
+            if order.status != OrderStatus.FILLED:
+                key = order.side, order.price
+                resting[key] = resting.get(key, 0) + order.quantity
+        depth = {
+            (depth.side, price): quantity
+            for depth in (order_queue.buy_depth, order_queue.sell_depth)
+            for price, quantity in depth.levels()
+        }
+        self.assertEqual(resting, depth)
+
+
+class TestOrderStream(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "flow.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        events = list(OrderFlow(seed=9).events(30))
+        self.assertEqual(write_order_stream(self.path, events), len(events))
+        self.assertEqual(list(read_order_stream(self.path)), events)
+
+    def test_replay_matches_live_run(self):
+        write_order_stream(self.path, OrderFlow(seed=11).events(120))
+        live, live_queue = simulate(OrderFlow(seed=11).events(120))
+        replayed, replayed_queue = simulate(read_order_stream(self.path))
+        self.assertEqual(live.digest(), replayed.digest())
+        self.assertEqual(book_state(live_queue), book_state(replayed_queue))
+
+    def test_empty_and_torn_files(self):
+        write_order_stream(self.path, [])
+        self.assertEqual(list(read_order_stream(self.path)), [])
+        events = list(OrderFlow(seed=1).events(5))
+        write_order_stream(self.path, events)
+        with open(self.path, "ab") as file:
+            file.write(b"\0" * 5)
+        self.assertEqual(list(read_order_stream(self.path)), events)
+
+
+if __name__ == "__main__":
+    unittest.main()
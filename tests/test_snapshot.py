@@ -0,0 +1,241 @@
+import gc
+import os
+import random
+import tempfile
+import unittest
+from array import array
+from src.columnar import (
+    write_columns,
+    read_columns,
+    convert_order_csv,
+    gc_paused,
+    ColumnReader,
+)
+from src.journal import EventJournal, FsyncPolicy
+from src.snapshot import take_snapshot, wait_for_snapshot, load_snapshot, recover
+from src.order_components import Order, CompactOrder, OrderSide, OrderStatus
+from src.order_queue import OrderQueue
+from src.price_level_queue import PriceLevelOrderQueue
+from src.match_engine import MatchEngine
+from src.order_processor import OrderProcessor
+
+
+def book_state(order_queue: OrderQueue, heap_layout: bool = True) -> tuple:
+    def describe(order):
+        return (
+            order.order_id,
+            order.user_id,
+            order.side,
+            order.price,
+            order.quantity,
+            order.status,
+            order.timestamp,
+            order.symbol,
+            order.order_type,
+        )
+
+    def resting(order_book):
+        if heap_layout:
+            return [describe(ho.order) for ho in order_book]
+        # Replay pops tombstones at other points than the engine did
+        return sorted(
+            describe(ho.order)
+            for ho in order_book
+            if ho.order.status != OrderStatus.CANCELLED
+            and ho.order.sequence == ho.sequence
+        )
+
+    return (
+        [describe(order) for order in order_queue.queue],
+        {
+            order_id: describe(order)
+            for order_id, order in order_queue.order_map.items()
+            if order.status != OrderStatus.FILLED
+        },
+        resting(order_queue.buy_orders),
+        resting(order_queue.sell_orders),
+        order_queue.orderbook_size,
+        order_queue.buy_depth.levels(),
+        order_queue.sell_depth.levels(),
+    )
+
+
+class TestColumnar(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "columns")
+            write_columns(
+                path,
+                {
+                    "ids": array("q", [1, 2, 3, 4]),
+                    "names": ["a", "", "b", "c"],
+                    "symbols": ["ABC", "ABC", "XYZ", "ABC"],
+                    "empty": [],
+                },
+                {"version": 1},
+            )
+            metadata, columns = read_columns(path)
+
+        self.assertEqual(metadata, {"version": 1})
+        self.assertEqual(columns["ids"], array("q", [1, 2, 3, 4]))
+        self.assertEqual(columns["names"], ["a", "", "b", "c"])
+        self.assertEqual(columns["symbols"], ["ABC", "ABC", "XYZ", "ABC"])
+        self.assertEqual(columns["empty"], [])
+
+    def test_column_reader_rows(self):
+        columns = {
+            "ids": array("q", [1, 2, 3, 4]),
+            "prices": array("d", [1.5, 2.5, 3.5, 4.5]),
+            "names": ["a", "", "b", "c"],
+            "symbols": ["ABC", "ABC", "XYZ", "ABC"],
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "columns")
+            write_columns(path, columns, {"version": 1})
+            reader = ColumnReader(path)
+            try:
+                self.assertEqual(reader.metadata, {"version": 1})
+                self.assertEqual(reader.column("names"), columns["names"])
+                for row in range(4):
+                    self.assertEqual(
+                        reader.row(row),
+                        {
+                            name: column[row : row + 1]
+                            for name, column in columns.items()
+                        },
+                    )
+            finally:
+                reader.close()
+
+    def test_convert_order_csv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, "orders.csv")
+            path = os.path.join(directory, "orders")
+            with open(csv_path, "w") as file:
+                file.write("price,quantity,side,user_id\n")
+                file.write("100.5,10,BUY,user1\n99.25,3,sell,user2\n101,7,2,user1\n")
+            rows = convert_order_csv(csv_path, path)
+            metadata, columns = read_columns(path)
+
+            with open(csv_path, "w") as file:
+                file.write("price,quantity\n")
+            with self.assertRaises(ValueError):
+                convert_order_csv(csv_path, path)
+
+        self.assertEqual(rows, 3)
+        self.assertEqual(metadata, {"rows": 3})
+        self.assertEqual(columns["user_id"], ["user1", "user2", "user1"])
+        self.assertEqual(columns["side"], array("b", [1, 2, 2]))
+        self.assertEqual(columns["price"], array("d", [100.5, 99.25, 101.0]))
+        self.assertEqual(columns["quantity"], array("q", [10, 3, 7]))
+
+    def test_gc_paused(self):
+        self.assertTrue(gc.isenabled())
+        with self.assertRaises(KeyError):
+            with gc_paused():
+                self.assertFalse(gc.isenabled())
+                raise KeyError
+        self.assertTrue(gc.isenabled())
+
+        gc.disable()
+        try:
+            with gc_paused():
+                pass
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.directory.name, "events.journal")
+        self.snapshot_path = os.path.join(self.directory.name, "book.snapshot")
+        Order.reset_id_generator()
+        CompactOrder.reset_id_generator()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _trade(self, order_processor, rng, orders=300, amends=False):
+        received = []
+        for _ in range(orders):
+            received.append(
+                order_processor.receive_order(
+                    f"user{rng.randint(1, 5)}",
+                    rng.choice([OrderSide.BUY, OrderSide.SELL]),
+                    rng.randint(95, 105),
+                    rng.randint(1, 20),
+                    "ABC",
+                )
+            )
+            if rng.random() < 0.2:
+                order_processor.cancel_order(rng.choice(received).order_id)
+            if amends and rng.random() < 0.3:
+                order_processor.amend_order(
+                    rng.choice(received).order_id,
+                    rng.randint(1, 20),
+                    rng.choice([None, rng.randint(95, 105)]),
+                )
+            if rng.random() < 0.8:
+                order_processor.process_single_order()
+
+    def _recover(self, order_class, fork=True, lazy_cancel=False, amends=False):
+        rng = random.Random(7)
+        journal = EventJournal(self.journal_path, fsync_policy=FsyncPolicy.NEVER)
+        order_queue = OrderQueue(lazy_cancel=lazy_cancel, journal=journal)
+        order_processor = OrderProcessor(
+            order_queue, MatchEngine(), order_class=order_class
+        )
+        self._trade(order_processor, rng, amends=amends)
+        pid = take_snapshot(order_queue, self.snapshot_path, order_class, fork=fork)
+        self._trade(order_processor, rng, amends=amends)
+        self.assertTrue(wait_for_snapshot(pid))
+        journal.close()
+        next_id = order_class.id_generator._next_id
+
+        order_class.reset_id_generator()
+        restored = OrderQueue(lazy_cancel=lazy_cancel)
+        count = recover(self.snapshot_path, self.journal_path, restored, order_class)
+
+        self.assertLess(count, journal.sequence)
+        # Amends leave entries behind that a restore drops
+        heap_layout = not lazy_cancel and not amends
+        self.assertEqual(
+            book_state(restored, heap_layout), book_state(order_queue, heap_layout)
+        )
+        self.assertEqual(order_class.id_generator._next_id, next_id)
+
+    def test_recover_from_forked_snapshot(self):
+        self._recover(Order)
+
+    def test_recover_inline_snapshot(self):
+        self._recover(Order, fork=False)
+
+    def test_recover_compact_orders(self):
+        self._recover(CompactOrder)
+
+    def test_recover_lazy_cancel(self):
+        self._recover(Order, lazy_cancel=True)
+
+    def test_recover_amended_orders(self):
+        self._recover(Order, amends=True)
+
+    def test_recover_amended_compact_orders(self):
+        self._recover(CompactOrder, amends=True)
+
+    def test_rejects_other_order_class(self):
+        take_snapshot(OrderQueue(), self.snapshot_path, fork=False)
+        with self.assertRaises(ValueError):
+            load_snapshot(self.snapshot_path, OrderQueue(), CompactOrder)
+
+    def test_rejects_price_level_queue(self):
+        with self.assertRaises(ValueError):
+            take_snapshot(PriceLevelOrderQueue(), self.snapshot_path)
+        take_snapshot(OrderQueue(), self.snapshot_path, fork=False)
+        with self.assertRaises(ValueError):
+            load_snapshot(self.snapshot_path, PriceLevelOrderQueue())
+
+
+if __name__ == "__main__":
+    unittest.main()